@@ -0,0 +1,180 @@
+"""
+Copyright Harvey Mudd College
+MIT License
+Spring 2020
+
+Benchmark - Detecting the border colors of AR markers
+
+Detects the colors of markers printed on red, green, and blue paper in a synthetic
+640x480 camera frame, first as ARMarker.detect_colors used to (contouring each color
+in a crop around each marker), then with detect_colors on each marker, and then with
+a single call to detect_ar_marker_colors at full and at half resolution.  The markers
+are created from the corners at which they were drawn, so no ArUco detection is
+needed.  Runs on any machine.
+
+Usage: python3 ar_marker_colors.py [iterations]
+"""
+
+########################################################################################
+# Imports
+########################################################################################
+
+import sys
+import time
+
+import cv2 as cv
+import numpy as np
+
+sys.path.insert(1, "../library")
+import racecar_utils as rc_utils
+
+########################################################################################
+# Global variables
+########################################################################################
+
+NUM_ITERATIONS = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+
+# The lab 5 colors, in the (hsv_lower, hsv_upper, color_name) format
+COLORS = [
+    ((170, 100, 100), (10, 255, 255), "red"),
+    ((40, 50, 50), (80, 255, 255), "green"),
+    ((90, 100, 100), (120, 255, 255), "blue"),
+]
+
+# The bgr value of each color of paper
+PAPER = {"red": (30, 30, 200), "green": (40, 170, 40), "blue": (200, 80, 20)}
+
+# The (top, left, size, color) of each marker drawn in the frame
+MARKERS = [
+    (40, 40, 60, "red"),
+    (50, 230, 80, "blue"),
+    (60, 450, 100, "green"),
+    (260, 60, 120, "green"),
+    (300, 280, 70, "red"),
+    (280, 460, 110, "blue"),
+]
+
+########################################################################################
+# Functions
+########################################################################################
+
+
+def create_frame() -> tuple:
+    """
+    Returns a noisy gray frame with each marker on its paper, and the markers.
+    """
+    rng = np.random.default_rng(0)
+    frame = rng.integers(80, 96, (480, 640, 3), np.uint8)
+
+    markers = []
+    for marker_id, (top, left, size, color) in enumerate(MARKERS):
+        border = size // 3
+        cv.rectangle(
+            frame,
+            (left - border, top - border),
+            (left + size + border, top + size + border),
+            PAPER[color],
+            -1,
+        )
+        frame[top : top + size, left : left + size] = 0
+        bottom, right = top + size - 1, left + size - 1
+        corners = np.array(((top, left), (top, right), (bottom, right), (bottom, left)))
+        markers.append(rc_utils.ARMarker(marker_id, corners))
+    return frame, markers
+
+
+def detect_in_crops(frame: np.ndarray, markers: list) -> list:
+    """
+    Returns the color of each marker as found by detect_colors before it was batched.
+    """
+    colors = []
+    for marker in markers:
+        corners = marker.get_corners()
+        top, left = corners[0]
+        bottom, right = corners[2]
+        half_height, half_width = (bottom - top) // 2, (right - left) // 2
+        cropped_image = rc_utils.crop(
+            frame,
+            (max(0, top - half_height), max(0, left - half_width)),
+            (
+                min(frame.shape[0], bottom + half_height) + 1,
+                min(frame.shape[1], right + half_width) + 1,
+            ),
+        )
+
+        color, color_area = "not detected", 0
+        for hsv_lower, hsv_upper, color_name in COLORS:
+            contours = rc_utils.find_contours(cropped_image, hsv_lower, hsv_upper)
+            largest_contour = rc_utils.get_largest_contour(contours)
+            if largest_contour is not None:
+                contour_area = rc_utils.get_contour_area(largest_contour)
+                if contour_area > color_area:
+                    color, color_area = color_name, contour_area
+        colors.append(color)
+    return colors
+
+
+def detect_each(frame: np.ndarray, markers: list) -> list:
+    for marker in markers:
+        marker.detect_colors(frame, COLORS)
+    return [marker.get_color() for marker in markers]
+
+
+def detect_batched(frame: np.ndarray, markers: list) -> list:
+    colors = rc_utils.detect_ar_marker_colors(frame, markers, COLORS)
+    return [color for color, _ in colors]
+
+
+def detect_batched_half(frame: np.ndarray, markers: list) -> list:
+    colors = rc_utils.detect_ar_marker_colors(frame, markers, COLORS, scale=0.5)
+    return [color for color, _ in colors]
+
+
+def measure(function, frame: np.ndarray, markers: list) -> np.ndarray:
+    """
+    Returns the seconds taken by each of NUM_ITERATIONS calls of function on a new
+    frame.
+    """
+    times = np.empty(NUM_ITERATIONS)
+    for i in range(NUM_ITERATIONS):
+        rc_utils.clear_frame_caches()
+        start = time.perf_counter()
+        function(frame, markers)
+        times[i] = time.perf_counter() - start
+    return times
+
+
+def report(name: str, times: np.ndarray, colors: list) -> None:
+    times_ms = times * 1000
+    num_correct = sum(color == marker[3] for color, marker in zip(colors, MARKERS))
+    print(
+        f"{name:>24}: mean {times_ms.mean():6.3f} ms | "
+        f"p99 {np.percentile(times_ms, 99):6.3f} ms | "
+        f"correct {num_correct}/{len(MARKERS)}"
+    )
+
+
+########################################################################################
+# DO NOT MODIFY: Run the benchmark
+########################################################################################
+
+if __name__ == "__main__":
+    frame, markers = create_frame()
+
+    print(
+        f">> Time to detect the colors of {len(MARKERS)} markers in a 640x480 frame "
+        f"({NUM_ITERATIONS} iterations)"
+    )
+    for name, function in (
+        ("contours in crops", detect_in_crops),
+        ("detect_colors", detect_each),
+        ("detect_ar_marker_colors", detect_batched),
+        ("at half resolution", detect_batched_half),
+    ):
+        rc_utils.clear_frame_caches()
+        report(name, measure(function, frame, markers), function(frame, markers))
+
+    print(
+        ">> Confidence: "
+        + ", ".join(f"{marker.get_color_confidence():.2f}" for marker in markers)
+    )
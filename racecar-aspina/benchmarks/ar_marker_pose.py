@@ -0,0 +1,219 @@
+"""
+Copyright Harvey Mudd College
+MIT License
+Spring 2020
+
+Benchmark - Estimating the poses of AR markers
+
+Projects 10 cm markers at known distances, bearings, and yaws through a camera with
+the nominal intrinsics of rc.camera plus some lens distortion, and rounds the corners
+to whole pixels as the detector does.  The poses are estimated first one marker at a
+time with cv.solvePnP on the distorted corners, and then with a single call to
+estimate_ar_marker_poses, and the error of each is measured against the true poses.
+Finally, the markers are followed over frames with a pixel of noise on each corner,
+with and without an ARMarkerPoseFilter.  Runs on any machine.
+
+Usage: python3 ar_marker_pose.py [iterations]
+"""
+
+########################################################################################
+# Imports
+########################################################################################
+
+import math
+import sys
+import time
+
+import cv2 as cv
+import numpy as np
+
+sys.path.insert(1, "../library")
+import racecar_utils as rc_utils
+
+########################################################################################
+# Global variables
+########################################################################################
+
+NUM_ITERATIONS = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+
+# The number of noisy frames over which the markers are followed
+NUM_FRAMES = 200
+
+MARKER_SIZE = 10
+
+# The nominal intrinsics of rc.camera, with a little barrel distortion
+FOCAL_LENGTH = 240 / math.tan(math.radians(42.5 / 2))
+CAMERA_MATRIX = np.array(
+    ((FOCAL_LENGTH, 0, 319.5), (0, FOCAL_LENGTH, 239.5), (0, 0, 1)), np.float64
+)
+DISTORTION = np.array((-0.05, 0.02, 0, 0, 0), np.float64)
+
+# The (distance, bearing, yaw) of each marker, in cm and degrees
+POSES = [
+    (40, -15, 0),
+    (60, 10, 30),
+    (90, -5, -45),
+    (120, 12, 15),
+    (160, -10, -20),
+    (220, 3, 60),
+]
+
+########################################################################################
+# Functions
+########################################################################################
+
+
+def project_markers(rng: np.random.Generator = None, noise: float = 0) -> list:
+    """
+    Returns a marker for each of POSES, with its corners projected into the image and
+    rounded to whole pixels.
+    """
+    half_size = MARKER_SIZE / 2
+    object_points = np.array(
+        (
+            (-half_size, half_size, 0),
+            (half_size, half_size, 0),
+            (half_size, -half_size, 0),
+            (-half_size, -half_size, 0),
+        ),
+        np.float64,
+    )
+
+    markers = []
+    for marker_id, (distance, bearing, yaw) in enumerate(POSES):
+        bearing, yaw = math.radians(bearing), math.radians(yaw)
+        translation = distance * np.array((math.sin(bearing), 0, math.cos(bearing)))
+        # Face the camera (marker y up, z out of its front), then turn by the yaw
+        facing = np.array(((1, 0, 0), (0, -1, 0), (0, 0, -1)), np.float64)
+        turn = cv.Rodrigues(np.array((0, -yaw, 0), np.float64))[0]
+        rotation = cv.Rodrigues(turn @ facing)[0]
+
+        points, _ = cv.projectPoints(
+            object_points, rotation, translation, CAMERA_MATRIX, DISTORTION
+        )
+        points = points.reshape(4, 2)
+        if noise > 0:
+            points = points + rng.uniform(-noise, noise, points.shape)
+        corners = points[:, ::-1].round().astype(np.int32)
+        markers.append(rc_utils.ARMarker(marker_id, corners))
+    return markers
+
+
+def estimate_each(markers: list) -> list:
+    """
+    Returns the (distance, bearing, yaw) of each marker, solving each one separately
+    with the distortion.
+    """
+    half_size = MARKER_SIZE / 2
+    object_points = np.array(
+        (
+            (-half_size, half_size, 0),
+            (half_size, half_size, 0),
+            (half_size, -half_size, 0),
+            (-half_size, -half_size, 0),
+        ),
+        np.float64,
+    )
+    poses = []
+    for marker in markers:
+        image_points = marker.get_corners()[:, ::-1].astype(np.float32)
+        _, rotation, translation = cv.solvePnP(
+            object_points, image_points, CAMERA_MATRIX, DISTORTION
+        )
+        x, _, z = translation.reshape(3)
+        normal = cv.Rodrigues(rotation)[0][:, 2]
+        poses.append(
+            (
+                np.linalg.norm(translation),
+                math.degrees(math.atan2(x, z)),
+                math.degrees(math.atan2(normal[0], -normal[2])),
+            )
+        )
+    return poses
+
+
+def estimate_batched(markers: list) -> list:
+    poses = rc_utils.estimate_ar_marker_poses(
+        markers, MARKER_SIZE, CAMERA_MATRIX, DISTORTION
+    )
+    return [(pose.distance, pose.bearing, pose.yaw) for pose in poses]
+
+
+def measure(function, markers: list) -> np.ndarray:
+    """
+    Returns the seconds taken by each of NUM_ITERATIONS calls of function.
+    """
+    times = np.empty(NUM_ITERATIONS)
+    for i in range(NUM_ITERATIONS):
+        start = time.perf_counter()
+        function(markers)
+        times[i] = time.perf_counter() - start
+    return times
+
+
+def pose_error(poses: list) -> str:
+    """
+    Returns the mean error of the distance, bearing, and yaw of poses.
+    """
+    errors = np.abs(np.subtract(poses, POSES)).mean(axis=0)
+    relative = np.mean(np.abs(np.subtract(poses, POSES))[:, 0] / np.array(POSES)[:, 0])
+    return (
+        f"distance {errors[0]:5.2f} cm ({relative * 100:4.1f}%) | "
+        f"bearing {errors[1]:5.2f} deg | yaw {errors[2]:5.2f} deg"
+    )
+
+
+def report(name: str, times: np.ndarray, accuracy: str) -> None:
+    times_ms = times * 1000
+    print(
+        f"{name:>24}: mean {times_ms.mean():6.3f} ms | "
+        f"p99 {np.percentile(times_ms, 99):6.3f} ms | {accuracy}"
+    )
+
+
+def follow(pose_filter) -> str:
+    """
+    Returns the mean standard deviation over noisy frames of the distance and yaw of
+    each marker, smoothed by pose_filter if it is not None.
+    """
+    rng = np.random.default_rng(0)
+    distances = np.empty((NUM_FRAMES, len(POSES)))
+    yaws = np.empty((NUM_FRAMES, len(POSES)))
+    for i in range(NUM_FRAMES):
+        markers = project_markers(rng, 1)
+        poses = rc_utils.estimate_ar_marker_poses(
+            markers, MARKER_SIZE, CAMERA_MATRIX, DISTORTION
+        )
+        if pose_filter is not None:
+            smoothed = pose_filter.update(markers)
+            poses = [smoothed[marker.get_id()] for marker in markers]
+        distances[i] = [pose.distance for pose in poses]
+        yaws[i] = [pose.yaw for pose in poses]
+    return (
+        f"distance std {distances.std(axis=0).mean():5.2f} cm | "
+        f"yaw std {yaws.std(axis=0).mean():5.2f} deg"
+    )
+
+
+########################################################################################
+# DO NOT MODIFY: Run the benchmark
+########################################################################################
+
+if __name__ == "__main__":
+    markers = project_markers()
+
+    print(
+        f">> Time to estimate the poses of {len(POSES)} markers "
+        f"({NUM_ITERATIONS} iterations) and mean error"
+    )
+    for name, function in (
+        ("solvePnP on each", estimate_each),
+        ("estimate_ar_marker_poses", estimate_batched),
+    ):
+        report(name, measure(function, markers), pose_error(function(markers)))
+
+    print(f">> Over {NUM_FRAMES} frames with 1 px of corner noise")
+    print(f"{'unfiltered':>24}: {follow(None)}")
+    print(
+        f"{'ARMarkerPoseFilter(0.3)':>24}: {follow(rc_utils.ARMarkerPoseFilter(0.3))}"
+    )
@@ -0,0 +1,153 @@
+"""
+Copyright Harvey Mudd College
+MIT License
+Spring 2020
+
+Benchmark - Detecting AR markers with a reused detector
+
+Finds the AR markers in a synthetic 640x480 camera frame containing markers of
+several sizes, first as get_ar_markers used to (creating the ArUco dictionary and
+parameters and converting the corners in Python for every call), then with an
+ARMarkerDetector on the color image, on a grayscale image, at half resolution, and
+with a subset of expected IDs.  The corner error of each is measured against where
+the markers were drawn.  Runs on any machine with the ArUco module of OpenCV.
+
+Usage: python3 ar_markers.py [iterations]
+"""
+
+########################################################################################
+# Imports
+########################################################################################
+
+import sys
+import time
+
+import cv2 as cv
+import numpy as np
+
+sys.path.insert(1, "../library")
+import racecar_utils as rc_utils
+
+########################################################################################
+# Global variables
+########################################################################################
+
+NUM_ITERATIONS = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+# The (id, top, left, size) of each marker drawn in the frame
+MARKERS = [(0, 40, 40, 60), (1, 60, 200, 90), (199, 200, 380, 120), (23, 300, 60, 160)]
+
+########################################################################################
+# Functions
+########################################################################################
+
+
+def create_frame() -> tuple:
+    """
+    Returns a noisy gray frame with white-bordered markers, and the (row, col)
+    corners of each marker in the order ArUco reports them.
+    """
+    dictionary = cv.aruco.Dictionary_get(cv.aruco.DICT_6X6_250)
+    rng = np.random.default_rng(0)
+    frame = rng.integers(80, 96, (480, 640, 3), np.uint8)
+
+    corners = {}
+    for marker_id, top, left, size in MARKERS:
+        border = size // 6
+        outer_top, outer_left = top - border, left - border
+        frame[outer_top : top + size + border, outer_left : left + size + border] = 255
+        marker = cv.aruco.drawMarker(dictionary, marker_id, size)
+        frame[top : top + size, left : left + size] = marker[:, :, np.newaxis]
+        bottom, right = top + size - 1, left + size - 1
+        corners[marker_id] = np.array(
+            ((top, left), (top, right), (bottom, right), (bottom, left))
+        )
+    return frame, corners
+
+
+def detect_uncached(color_image: np.ndarray) -> list:
+    """
+    Finds the markers as get_ar_markers did before ARMarkerDetector.
+    """
+    corners, ids, _ = cv.aruco.detectMarkers(
+        color_image,
+        cv.aruco.Dictionary_get(cv.aruco.DICT_6X6_250),
+        parameters=cv.aruco.DetectorParameters_create(),
+    )
+    markers = []
+    for i in range(len(corners)):
+        corners_formatted = corners[i][0].astype(np.int32)
+        for j in range(corners_formatted.shape[0]):
+            col = corners_formatted[j][0]
+            corners_formatted[j][0] = corners_formatted[j][1]
+            corners_formatted[j][1] = col
+        markers.append(rc_utils.ARMarker(ids[i][0], corners_formatted))
+    return markers
+
+
+def measure(function, image: np.ndarray) -> np.ndarray:
+    """
+    Returns the seconds taken by each of NUM_ITERATIONS calls of function on a new
+    frame.
+    """
+    times = np.empty(NUM_ITERATIONS)
+    for i in range(NUM_ITERATIONS):
+        rc_utils.clear_frame_caches()
+        start = time.perf_counter()
+        function(image)
+        times[i] = time.perf_counter() - start
+    return times
+
+
+def corner_error(markers: list, corners: dict) -> str:
+    """
+    Returns the number of markers found and their mean corner error in pixels.
+    """
+    errors = [
+        np.hypot(*(marker.get_corners() - corners[marker.get_id()]).T).mean()
+        for marker in markers
+    ]
+    return (
+        f"found {len(markers)}/{len(corners)} | corner error {np.mean(errors):4.2f} px"
+    )
+
+
+def report(name: str, times: np.ndarray, accuracy: str) -> None:
+    times_ms = times * 1000
+    print(
+        f"{name:>24}: mean {times_ms.mean():6.3f} ms | "
+        f"p99 {np.percentile(times_ms, 99):6.3f} ms | {accuracy}"
+    )
+
+
+########################################################################################
+# DO NOT MODIFY: Run the benchmark
+########################################################################################
+
+if __name__ == "__main__":
+    frame, corners = create_frame()
+    gray_frame = cv.cvtColor(frame, cv.COLOR_BGR2GRAY)
+
+    detector = rc_utils.ARMarkerDetector()
+    half_detector = rc_utils.ARMarkerDetector(scale=0.5)
+    subset_detector = rc_utils.ARMarkerDetector(marker_ids=[1, 199])
+
+    print(f">> Time to find {len(MARKERS)} AR markers in a 640x480 frame")
+    for name, function, image in (
+        ("uncached", detect_uncached, frame),
+        ("ARMarkerDetector", detector.detect, frame),
+        ("grayscale", detector.detect, gray_frame),
+        ("half resolution", half_detector.detect, frame),
+        ("IDs 1 and 199", subset_detector.detect, frame),
+    ):
+        rc_utils.clear_frame_caches()
+        report(name, measure(function, image), corner_error(function(image), corners))
+
+    start = time.perf_counter()
+    for _ in range(NUM_ITERATIONS):
+        cv.aruco.Dictionary_get(cv.aruco.DICT_6X6_250)
+        cv.aruco.DetectorParameters_create()
+    print(
+        ">> Creating the dictionary and parameters takes "
+        f"{(time.perf_counter() - start) / NUM_ITERATIONS * 1000:.3f} ms"
+    )
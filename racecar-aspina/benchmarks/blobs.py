@@ -0,0 +1,110 @@
+"""
+Copyright Harvey Mudd College
+MIT License
+Spring 2020
+
+Benchmark - Connected-component blobs against contours
+
+Finds the center and area of the largest region of a 640x480 mask, first with
+findContours, get_largest_contour, get_contour_center, and get_contour_area, then with
+Blobs.  Each is run on a clean mask with a few regions of tape, and on a mask with
+scattered specks of noise, as produced by a loose hsv range.  Runs on any machine.
+
+Usage: python3 blobs.py [iterations]
+"""
+
+########################################################################################
+# Imports
+########################################################################################
+
+import sys
+import time
+
+import cv2 as cv
+import numpy as np
+
+sys.path.insert(1, "../library")
+import racecar_utils as rc_utils
+
+########################################################################################
+# Global variables
+########################################################################################
+
+NUM_ITERATIONS = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+
+MIN_AREA = 30
+
+########################################################################################
+# Functions
+########################################################################################
+
+
+def create_mask(num_specks: int) -> np.ndarray:
+    """
+    Returns a mask with three lines of tape and num_specks single-pixel specks.
+    """
+    mask = np.zeros((480, 640), np.uint8)
+    cv.line(mask, (100, 479), (250, 240), 255, 30)
+    cv.line(mask, (320, 479), (320, 300), 255, 20)
+    cv.rectangle(mask, (500, 100), (560, 130), 255, -1)
+
+    rng = np.random.default_rng(0)
+    mask[rng.integers(0, 480, num_specks), rng.integers(0, 640, num_specks)] = 255
+    return mask
+
+
+def use_contours(mask: np.ndarray) -> tuple:
+    contours = cv.findContours(mask, cv.RETR_LIST, cv.CHAIN_APPROX_SIMPLE)[0]
+    contour = rc_utils.get_largest_contour(contours, MIN_AREA)
+    if contour is None:
+        return None, 0
+    return rc_utils.get_contour_center(contour), rc_utils.get_contour_area(contour)
+
+
+def use_blobs(mask: np.ndarray) -> tuple:
+    blobs = rc_utils.Blobs(mask, MIN_AREA)
+    largest = blobs.get_largest()
+    if largest is None:
+        return None, 0
+    return blobs.get_center(largest), blobs.get_areas()[largest]
+
+
+def measure(function, mask: np.ndarray) -> np.ndarray:
+    """
+    Returns the seconds taken by each of NUM_ITERATIONS calls of function.
+    """
+    times = np.empty(NUM_ITERATIONS)
+    for i in range(NUM_ITERATIONS):
+        start = time.perf_counter()
+        function(mask)
+        times[i] = time.perf_counter() - start
+    return times
+
+
+def report(name: str, times: np.ndarray) -> None:
+    times_ms = times * 1000
+    print(
+        f"{name:>20}: mean {times_ms.mean():6.3f} ms | "
+        f"std {times_ms.std():6.3f} ms | "
+        f"p99 {np.percentile(times_ms, 99):6.3f} ms | "
+        f"max {times_ms.max():6.3f} ms"
+    )
+
+
+########################################################################################
+# DO NOT MODIFY: Run the benchmark
+########################################################################################
+
+if __name__ == "__main__":
+    print(
+        ">> Time to find the largest region of a 640x480 mask "
+        f"({NUM_ITERATIONS} iterations)"
+    )
+    for num_specks in (0, 2000):
+        mask = create_mask(num_specks)
+        print(
+            f">> {num_specks} specks: contours {use_contours(mask)}, "
+            f"blobs {use_blobs(mask)}"
+        )
+        report("contours", measure(use_contours, mask))
+        report("blobs", measure(use_blobs, mask))
@@ -0,0 +1,124 @@
+"""
+Copyright Harvey Mudd College
+MIT License
+Spring 2020
+
+Benchmark - Cold start time of create_racecar
+
+Starts a fresh Python process for every run and measures the wall time until
+create_racecar returns, along with the part of it spent importing racecar_core.  The
+simulation and replay backends (on a small generated recording) are measured on any
+machine; the real backend is only measured where rclpy is installed.
+
+Usage: python3 cold_start.py [runs per backend]
+"""
+
+########################################################################################
+# Imports
+########################################################################################
+
+import importlib.util
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(1, "../library")
+from sensor_log import SensorLogWriter, Stream
+
+########################################################################################
+# Global variables
+########################################################################################
+
+NUM_RUNS = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+
+LIBRARY_PATH = os.path.abspath("../library")
+
+# The program run in every process; prints the seconds taken to import racecar_core
+# and to create the racecar
+PROGRAM = f"""
+import time
+start = time.perf_counter()
+import sys
+sys.path.insert(0, {LIBRARY_PATH!r})
+sys.argv = ["cold_start"] + sys.argv[1:]
+import racecar_core
+imported = time.perf_counter()
+rc = racecar_core.create_racecar()
+print("RESULT", imported - start, time.perf_counter() - start, file=sys.stderr)
+"""
+
+########################################################################################
+# Functions
+########################################################################################
+
+
+def create_recording(path: str) -> None:
+    """
+    Writes a one second recording for the replay backend to open.
+    """
+    writer = SensorLogWriter(path, 1024 * 1024)
+    for i in range(60):
+        timestamp = i / 60
+        writer.record(Stream.lidar_samples, timestamp, np.zeros(720, np.float32))
+        writer.record(Stream.linear_acceleration, timestamp, (0.0, 9.8, 0.0))
+        writer.record(Stream.angular_velocity, timestamp, (0.0, 0.0, 0.0))
+    writer.stop()
+
+
+def run(flags: list) -> tuple:
+    """
+    Runs the program in a new process and returns the seconds spent importing
+    racecar_core, in create_racecar, and in the whole process.
+    """
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-c", PROGRAM] + flags,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        timeout=60,
+    )
+    total = time.perf_counter() - start
+
+    lines = [line for line in result.stderr.splitlines() if line.startswith("RESULT")]
+    assert lines, f"create_racecar failed with flags {flags}:\n{result.stderr}"
+    imported, created = (float(value) for value in lines[-1].split()[1:])
+    return imported, created - imported, total
+
+
+def report(name: str, times: np.ndarray) -> None:
+    times_ms = times * 1000
+    median = np.median(times_ms, axis=0)
+    print(
+        f"{name:>12}: import racecar_core {median[0]:7.1f} ms | "
+        f"create_racecar {median[1]:7.1f} ms | "
+        f"process {median[2]:7.1f} ms | "
+        f"max process {times_ms[:, 2].max():7.1f} ms"
+    )
+
+
+########################################################################################
+# DO NOT MODIFY: Run the benchmark
+########################################################################################
+
+if __name__ == "__main__":
+    print(f">> Median cold start time over {NUM_RUNS} runs per backend")
+
+    with tempfile.TemporaryDirectory() as recording:
+        create_recording(recording)
+
+        backends = [
+            ("simulation", ["-s", "-h"]),
+            ("replay", ["-h", "-f", "-p", recording]),
+        ]
+        if importlib.util.find_spec("rclpy") is not None:
+            backends.append(("real", ["-h"]))
+        else:
+            print(">> rclpy is not installed, skipping the real backend")
+
+        for name, flags in backends:
+            report(name, np.array([run(flags) for _ in range(NUM_RUNS)]))
@@ -0,0 +1,131 @@
+"""
+Copyright Harvey Mudd College
+MIT License
+Spring 2020
+
+Benchmark - Lookup table color classification against hsv conversion
+
+Masks the colors of lab 2A in a synthetic 640x480 camera frame, first by converting to
+hsv and calling cv.inRange for each range, then with a ColorClassifier, and reports
+how often the two agree on random pixels for several table sizes.  Runs on any
+machine.
+
+Usage: python3 color_classifier.py [iterations]
+"""
+
+########################################################################################
+# Imports
+########################################################################################
+
+import sys
+import time
+
+import cv2 as cv
+import numpy as np
+
+sys.path.insert(1, "../library")
+import racecar_utils as rc_utils
+
+########################################################################################
+# Global variables
+########################################################################################
+
+NUM_ITERATIONS = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+
+# The colors of lab 2A, with red as a single range wrapping around hue 0
+COLORS = [
+    ((160, 50, 50), (10, 255, 255), "red"),
+    ((40, 50, 50), (80, 255, 255), "green"),
+    ((90, 50, 50), (120, 255, 255), "blue"),
+]
+
+########################################################################################
+# Functions
+########################################################################################
+
+
+def create_frame() -> np.ndarray:
+    """
+    Returns a noisy gray frame with a red, a green, and a blue line of tape.
+    """
+    rng = np.random.default_rng(0)
+    frame = rng.integers(80, 96, (480, 640, 3), np.uint8)
+    cv.line(frame, (100, 479), (250, 240), (0, 0, 200), 30)
+    cv.line(frame, (320, 479), (320, 240), (0, 180, 0), 30)
+    cv.line(frame, (540, 479), (390, 240), (200, 60, 0), 30)
+    return frame
+
+
+def mask_hsv(frame: np.ndarray) -> dict:
+    hsv_image = cv.cvtColor(frame, cv.COLOR_BGR2HSV)
+    return {
+        name: rc_utils._get_hsv_mask(hsv_image, hsv_lower, hsv_upper)
+        for hsv_lower, hsv_upper, name in COLORS
+    }
+
+
+def get_exact_labels(frame: np.ndarray) -> np.ndarray:
+    """
+    Returns the label of each pixel computed from its exact hsv value.
+    """
+    labels = np.zeros(frame.shape[:2], np.uint8)
+    for label, mask in reversed(list(enumerate(mask_hsv(frame).values()))):
+        labels[mask > 0] = label + 1
+    return labels
+
+
+def measure(function, frame: np.ndarray) -> np.ndarray:
+    """
+    Returns the seconds taken by each of NUM_ITERATIONS calls of function.
+    """
+    times = np.empty(NUM_ITERATIONS)
+    for i in range(NUM_ITERATIONS):
+        start = time.perf_counter()
+        function(frame)
+        times[i] = time.perf_counter() - start
+    return times
+
+
+def report(name: str, times: np.ndarray) -> None:
+    times_ms = times * 1000
+    print(
+        f"{name:>22}: mean {times_ms.mean():6.3f} ms | "
+        f"std {times_ms.std():6.3f} ms | "
+        f"p99 {np.percentile(times_ms, 99):6.3f} ms | "
+        f"max {times_ms.max():6.3f} ms"
+    )
+
+
+########################################################################################
+# DO NOT MODIFY: Run the benchmark
+########################################################################################
+
+if __name__ == "__main__":
+    frame = create_frame()
+
+    start = time.perf_counter()
+    classifier = rc_utils.ColorClassifier(COLORS)
+    build_time = time.perf_counter() - start
+
+    print(
+        f">> Time to mask {len(COLORS)} colors in a 640x480 frame "
+        f"({NUM_ITERATIONS} iterations, table built in {build_time * 1000:.1f} ms)"
+    )
+    report("cvtColor + inRange", measure(mask_hsv, frame))
+    report("ColorClassifier", measure(classifier.get_masks, frame))
+
+    print(">> Pixels labeled as by their exact hsv value")
+    random_frame = np.random.default_rng(1).integers(0, 256, (480, 640, 3), np.uint8)
+    for name, image in (("tape frame", frame), ("random pixels", random_frame)):
+        exact_labels = get_exact_labels(image)
+        agreement = [
+            (rc_utils.ColorClassifier(COLORS, bits).classify(image) == exact_labels)
+            for bits in (4, 5, 6, 7)
+        ]
+        print(
+            f"{name:>22}: "
+            + " | ".join(
+                f"{1 << bits}^3 cells {matches.mean() * 100:6.2f}%"
+                for bits, matches in zip((4, 5, 6, 7), agreement)
+            )
+        )
@@ -0,0 +1,112 @@
+"""
+Copyright Harvey Mudd College
+MIT License
+Spring 2020
+
+Benchmark - Contouring several color ranges with one hsv conversion
+
+Compares calling find_contours once per range (as lab 2A did for red, green, and blue,
+where red needs two ranges) with a single call to find_contours_multi, on a synthetic
+640x480 camera frame containing tape lines of each color.  Runs on any machine.
+
+Usage: python3 contour_ranges.py [iterations]
+"""
+
+########################################################################################
+# Imports
+########################################################################################
+
+import sys
+import time
+
+import cv2 as cv
+import numpy as np
+
+sys.path.insert(1, "../library")
+import racecar_utils as rc_utils
+
+########################################################################################
+# Global variables
+########################################################################################
+
+NUM_ITERATIONS = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+
+# The hsv ranges of lab 2A
+RANGES = {
+    "red": [((0, 50, 50), (10, 255, 255)), ((160, 50, 50), (179, 255, 255))],
+    "green": [((40, 50, 50), (80, 255, 255))],
+    "blue": [((90, 50, 50), (120, 255, 255))],
+}
+
+########################################################################################
+# Functions
+########################################################################################
+
+
+def create_frame() -> np.ndarray:
+    """
+    Returns a noisy gray frame with a red, a green, and a blue line of tape.
+    """
+    rng = np.random.default_rng(0)
+    frame = rng.integers(80, 96, (480, 640, 3), np.uint8)
+    cv.line(frame, (100, 479), (250, 240), (0, 0, 200), 30)
+    cv.line(frame, (320, 479), (320, 240), (0, 180, 0), 30)
+    cv.line(frame, (540, 479), (390, 240), (200, 60, 0), 30)
+    return frame
+
+
+def find_per_range(frame: np.ndarray) -> dict:
+    contours = {}
+    for label, label_ranges in RANGES.items():
+        contours[label] = []
+        for hsv_lower, hsv_upper in label_ranges:
+            contours[label].extend(rc_utils.find_contours(frame, hsv_lower, hsv_upper))
+    return contours
+
+
+def find_multi(frame: np.ndarray) -> dict:
+    return rc_utils.find_contours_multi(frame, RANGES)
+
+
+def measure(function, frame: np.ndarray) -> np.ndarray:
+    """
+    Returns the seconds taken by each of NUM_ITERATIONS calls of function.
+    """
+    times = np.empty(NUM_ITERATIONS)
+    for i in range(NUM_ITERATIONS):
+        start = time.perf_counter()
+        function(frame)
+        times[i] = time.perf_counter() - start
+    return times
+
+
+def report(name: str, times: np.ndarray) -> None:
+    times_ms = times * 1000
+    print(
+        f"{name:>20}: mean {times_ms.mean():6.3f} ms | "
+        f"std {times_ms.std():6.3f} ms | "
+        f"p99 {np.percentile(times_ms, 99):6.3f} ms | "
+        f"max {times_ms.max():6.3f} ms"
+    )
+
+
+########################################################################################
+# DO NOT MODIFY: Run the benchmark
+########################################################################################
+
+if __name__ == "__main__":
+    frame = create_frame()
+
+    # Both approaches must find the same colors
+    per_range = find_per_range(frame)
+    multi = find_multi(frame)
+    for label in RANGES:
+        assert (len(per_range[label]) > 0) == (len(multi[label]) > 0), label
+
+    num_ranges = sum(len(label_ranges) for label_ranges in RANGES.values())
+    print(
+        f">> Time to contour {num_ranges} hsv ranges in a 640x480 frame "
+        f"({NUM_ITERATIONS} iterations)"
+    )
+    report("find_contours", measure(find_per_range, frame))
+    report("find_contours_multi", measure(find_multi, frame))
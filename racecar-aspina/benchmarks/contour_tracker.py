@@ -0,0 +1,126 @@
+"""
+Copyright Harvey Mudd College
+MIT License
+Spring 2020
+
+Benchmark - Tracking a contour against searching every frame
+
+Follows an orange cone moving around a loop of synthetic 640x480 frames (with a blue
+line of tape and a few frames where the cone is hidden), first by searching the whole
+frame with find_contours and get_largest_contour, then with a ContourTracker.  The
+frame caches are cleared before each frame, as the camera does.  Runs on any machine.
+
+Usage: python3 contour_tracker.py [iterations]
+"""
+
+########################################################################################
+# Imports
+########################################################################################
+
+import sys
+import time
+
+import cv2 as cv
+import numpy as np
+
+sys.path.insert(1, "../library")
+import racecar_utils as rc_utils
+
+########################################################################################
+# Global variables
+########################################################################################
+
+NUM_ITERATIONS = int(sys.argv[1]) if len(sys.argv) > 1 else 600
+
+# The number of frames in one loop of the cone, and the frames in which it is hidden
+NUM_FRAMES = 60
+HIDDEN_FRAMES = (20, 21, 22)
+
+ORANGE = ((10, 100, 100), (25, 255, 255))
+
+MIN_AREA = 30
+
+########################################################################################
+# Functions
+########################################################################################
+
+
+def create_frames() -> list:
+    """
+    Returns a loop of noisy gray frames with a line of tape and a moving cone.
+    """
+    rng = np.random.default_rng(0)
+    frames = []
+    for i in range(NUM_FRAMES):
+        frame = rng.integers(80, 96, (480, 640, 3), np.uint8)
+        cv.line(frame, (100, 479), (250, 240), (200, 60, 0), 30)
+        if i not in HIDDEN_FRAMES:
+            angle = 2 * np.pi * i / NUM_FRAMES
+            center = (int(320 + 220 * np.sin(angle)), int(260 + 120 * np.cos(angle)))
+            cv.circle(frame, center, 35, (0, 128, 255), -1)
+        frames.append(frame)
+    return frames
+
+
+def search_frame(frame: np.ndarray):
+    contours = rc_utils.find_contours(frame, ORANGE[0], ORANGE[1])
+    return rc_utils.get_largest_contour(contours, MIN_AREA)
+
+
+def measure(function, frames: list) -> tuple:
+    """
+    Returns the seconds taken by function on each of NUM_ITERATIONS frames, and the
+    contour center it found in each.
+    """
+    times = np.empty(NUM_ITERATIONS)
+    centers = []
+    for i in range(NUM_ITERATIONS):
+        rc_utils.clear_frame_caches()
+        start = time.perf_counter()
+        contour = function(frames[i % NUM_FRAMES])
+        times[i] = time.perf_counter() - start
+        centers.append(
+            None if contour is None else rc_utils.get_contour_center(contour)
+        )
+    return times, centers
+
+
+def report(name: str, times: np.ndarray) -> None:
+    times_ms = times * 1000
+    print(
+        f"{name:>16}: mean {times_ms.mean():6.3f} ms | "
+        f"std {times_ms.std():6.3f} ms | "
+        f"p99 {np.percentile(times_ms, 99):6.3f} ms | "
+        f"max {times_ms.max():6.3f} ms"
+    )
+
+
+########################################################################################
+# DO NOT MODIFY: Run the benchmark
+########################################################################################
+
+if __name__ == "__main__":
+    frames = create_frames()
+    tracker = rc_utils.ContourTracker([ORANGE], MIN_AREA)
+
+    print(f">> Time to find a moving cone in a 640x480 frame ({NUM_ITERATIONS} frames)")
+    full_times, full_centers = measure(search_frame, frames)
+    tracker_times, tracker_centers = measure(tracker.update, frames)
+    report("find_contours", full_times)
+    report("ContourTracker", tracker_times)
+
+    both = [
+        np.hypot(*np.subtract(full, tracked))
+        for full, tracked in zip(full_centers, tracker_centers)
+        if full is not None and tracked is not None
+    ]
+    agree = sum(
+        (full is None) == (tracked is None)
+        for full, tracked in zip(full_centers, tracker_centers)
+    )
+    print(
+        f">> Window hit rate {tracker.get_hit_rate() * 100:.1f}% | "
+        f"average update {tracker.get_average_time() * 1000:.3f} ms | "
+        f"found in the same frames {agree}/{NUM_ITERATIONS} | "
+        f"mean center difference {np.mean(both):.2f} px"
+    )
@@ -0,0 +1,208 @@
+"""
+Copyright Harvey Mudd College
+MIT License
+Spring 2020
+
+Benchmark - Searching images at pyramid levels
+
+Times find_contours, find_blobs, and get_closest_pixel on synthetic 640x480 frames at
+scales 1, 1/2, 1/4, and 1/8, with the frame caches cleared before every call so that
+each time includes building the pyramid level (and its hsv conversion), as it would
+for the first search of a new camera frame.  The accuracy of each scale is measured
+on randomly placed cones and boxes.  Runs on
+any machine.
+
+Usage: python3 pyramid.py [iterations]
+"""
+
+########################################################################################
+# Imports
+########################################################################################
+
+import sys
+import time
+
+import cv2 as cv
+import numpy as np
+
+sys.path.insert(1, "../library")
+import racecar_utils as rc_utils
+
+########################################################################################
+# Global variables
+########################################################################################
+
+NUM_ITERATIONS = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+
+# The number of random scenes on which accuracy is measured
+NUM_SCENES = 50
+
+SCALES = (1.0, 0.5, 0.25, 0.125)
+
+ORANGE_HSV_MIN = (10, 100, 100)
+ORANGE_HSV_MAX = (25, 255, 255)
+
+MIN_AREA = 30
+
+########################################################################################
+# Functions
+########################################################################################
+
+
+def create_color_frame(rng: np.random.Generator) -> tuple:
+    """
+    Returns a noisy gray frame with an orange cone of random size and position, along
+    with the cone's (row, column) center and area in pixels.
+    """
+    frame = rng.integers(80, 96, (480, 640, 3), np.uint8)
+    cv.line(frame, (100, 479), (250, 240), (200, 60, 0), 30)
+    radius = int(rng.integers(6, 60))
+    center = (int(rng.integers(60, 420)), int(rng.integers(60, 580)))
+    cv.circle(frame, center[::-1], radius, (0, 128, 255), -1)
+    return frame, center, np.pi * radius * radius
+
+
+def create_depth_frame(rng: np.random.Generator) -> tuple:
+    """
+    Returns a depth image of a floor and a back wall with a box of random size and
+    distance, a little noise, and scattered pixels without data, along with the
+    box's (top, left, bottom, right) and distance.
+    """
+    rows = np.arange(480, dtype=np.float32)[:, np.newaxis]
+    depth = 24000 / np.maximum(rows - 200, 40)
+    depth = np.broadcast_to(depth, (480, 640)).astype(np.float32)
+
+    height, width = rng.integers(10, 80, 2)
+    top, left = int(rng.integers(60, 300 - height)), int(rng.integers(0, 640 - width))
+    distance = rng.uniform(40, 150)
+    depth[top : top + height, left : left + width] = distance
+
+    depth += rng.normal(0, 1, depth.shape).astype(np.float32)
+    depth[rng.random(depth.shape) < 0.02] = 0
+    return depth, (top, left, top + height, left + width), distance
+
+
+def measure(function, image: np.ndarray, scale: float) -> np.ndarray:
+    """
+    Returns the seconds taken by each of NUM_ITERATIONS calls of function on a new
+    frame.
+    """
+    times = np.empty(NUM_ITERATIONS)
+    for i in range(NUM_ITERATIONS):
+        rc_utils.clear_frame_caches()
+        start = time.perf_counter()
+        function(image, scale)
+        times[i] = time.perf_counter() - start
+    return times
+
+
+def use_contours(frame: np.ndarray, scale: float) -> tuple:
+    contours = rc_utils.find_contours(frame, ORANGE_HSV_MIN, ORANGE_HSV_MAX, scale)
+    contour = rc_utils.get_largest_contour(contours, MIN_AREA)
+    if contour is None:
+        return None, 0
+    return rc_utils.get_contour_center(contour), rc_utils.get_contour_area(contour)
+
+
+def use_blobs(frame: np.ndarray, scale: float) -> tuple:
+    blobs = rc_utils.find_blobs(frame, ORANGE_HSV_MIN, ORANGE_HSV_MAX, MIN_AREA, scale)
+    largest = blobs.get_largest()
+    if largest is None:
+        return None, 0
+    return blobs.get_center(largest), blobs.get_areas()[largest]
+
+
+def use_closest_pixel(depth_image: np.ndarray, scale: float) -> tuple:
+    # Ignore the floor directly in front of the car
+    upper = rc_utils.ROI(depth_image, (0, 0), (320, 640))
+    return rc_utils.get_closest_pixel(upper, 5, scale)
+
+
+def report(name: str, times: np.ndarray, accuracy: str) -> None:
+    times_ms = times * 1000
+    print(
+        f"{name:>20}: mean {times_ms.mean():6.3f} ms | "
+        f"p99 {np.percentile(times_ms, 99):6.3f} ms | {accuracy}"
+    )
+
+
+def region_accuracy(function, scale: float) -> str:
+    """
+    Returns the mean error of the center and area found by function at scale, and
+    the number of cones it missed.
+    """
+    rng = np.random.default_rng(1)
+    center_errors, area_errors, num_missed = [], [], 0
+    for _ in range(NUM_SCENES):
+        frame, center, area = create_color_frame(rng)
+        rc_utils.clear_frame_caches()
+        found_center, found_area = function(frame, scale)
+        if found_center is None or found_area < area / 2:
+            num_missed += 1
+            continue
+        center_errors.append(np.hypot(*np.subtract(found_center, center)))
+        area_errors.append(abs(found_area - area) / area)
+    return (
+        f"center error {np.mean(center_errors):5.2f} px | "
+        f"area error {np.mean(area_errors) * 100:5.1f}% | "
+        f"missed {num_missed}/{NUM_SCENES}"
+    )
+
+
+def depth_accuracy(scale: float) -> str:
+    """
+    Returns how often the closest pixel found at scale lies on the box, and the
+    mean error of the distance measured there.
+    """
+    rng = np.random.default_rng(2)
+    distance_errors, num_missed = [], 0
+    for _ in range(NUM_SCENES):
+        depth_image, (top, left, bottom, right), distance = create_depth_frame(rng)
+        rc_utils.clear_frame_caches()
+        row, col = use_closest_pixel(depth_image, scale)
+        if not (top <= row < bottom and left <= col < right):
+            num_missed += 1
+        distance_errors.append(
+            abs(rc_utils.get_pixel_average_distance(depth_image, (row, col)) - distance)
+        )
+    return (
+        f"distance error {np.mean(distance_errors):5.2f} cm | "
+        f"off the box {num_missed}/{NUM_SCENES}"
+    )
+
+
+########################################################################################
+# DO NOT MODIFY: Run the benchmark
+########################################################################################
+
+if __name__ == "__main__":
+    color_frame, _, _ = create_color_frame(np.random.default_rng(0))
+    depth_frame, _, _ = create_depth_frame(np.random.default_rng(0))
+
+    print(
+        f">> Time per new 640x480 frame ({NUM_ITERATIONS} iterations) and accuracy "
+        f"over {NUM_SCENES} scenes"
+    )
+    for scale in SCALES:
+        print(f">> scale {scale}")
+        for name, image in (("color", color_frame), ("depth", depth_frame)):
+            report(
+                f"build {name} level",
+                measure(rc_utils.get_pyramid_level, image, int(-np.log2(scale))),
+                "",
+            )
+        report(
+            "find_contours",
+            measure(use_contours, color_frame, scale),
+            region_accuracy(use_contours, scale),
+        )
+        report(
+            "find_blobs",
+            measure(use_blobs, color_frame, scale),
+            region_accuracy(use_blobs, scale),
+        )
+        report(
+            "get_closest_pixel",
+            measure(use_closest_pixel, depth_frame, scale),
+            depth_accuracy(scale),
+        )
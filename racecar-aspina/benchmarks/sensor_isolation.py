@@ -0,0 +1,176 @@
+"""
+Copyright Harvey Mudd College
+MIT License
+Spring 2020
+
+Benchmark - Control loop jitter with in-process and isolated sensor decoding
+
+A fake publisher decodes JPEG camera frames and converts lidar scans at the camera
+rate, either on a thread of the control process (as CameraReal does by default) or
+in a forked process writing into SharedFrameRings (as with the -i flag).  A 60 Hz
+control loop runs a Python-heavy update and records how late every frame starts.
+
+Usage: python3 sensor_isolation.py [seconds per mode]
+"""
+
+########################################################################################
+# Imports
+########################################################################################
+
+import multiprocessing as mp
+import sys
+import threading
+import time
+
+import cv2 as cv
+import numpy as np
+
+sys.path.insert(1, "../library/real")
+from sensor_history import SensorChannel
+from sensor_process import SharedFrameRing
+
+########################################################################################
+# Global variables
+########################################################################################
+
+# Rates (frames per second) of the control loop and the fake sensors
+FRAME_RATE = 60
+SENSOR_RATE = 30
+
+WIDTH, HEIGHT = 640, 480
+NUM_LIDAR_SAMPLES = 720
+
+# Seconds to run each mode for
+DURATION = float(sys.argv[1]) if len(sys.argv) > 1 else 10.0
+
+########################################################################################
+# Functions
+########################################################################################
+
+
+def make_messages():
+    """
+    Creates a JPEG-encoded color image and a lidar scan resembling real messages.
+    """
+    rng = np.random.default_rng(0)
+    image = cv.GaussianBlur(
+        rng.integers(0, 256, (HEIGHT, WIDTH, 3), np.uint8), (15, 15), 0
+    )
+    jpeg = cv.imencode(".jpg", image)[1].tobytes()
+    ranges = list(rng.uniform(0.1, 10, NUM_LIDAR_SAMPLES))
+    return jpeg, ranges
+
+
+def publish_fake_sensors(color_channel, lidar_channel, stop_event) -> None:
+    """
+    Decodes and publishes fake camera and lidar messages until stop_event is set.
+    """
+    jpeg, ranges = make_messages()
+    period = 1 / SENSOR_RATE
+    next_time = time.perf_counter()
+    while not stop_event.is_set():
+        image = cv.imdecode(np.frombuffer(jpeg, np.uint8), cv.IMREAD_COLOR)
+        samples = np.flip(np.multiply(np.array(ranges), 100))
+        stamp = time.time()
+        color_channel.publish(stamp, image)
+        lidar_channel.publish(stamp, samples)
+
+        next_time += period
+        time.sleep(max(0.0, next_time - time.perf_counter()))
+
+
+def update(color_image, samples) -> float:
+    """
+    A stand-in for a student update function, mixing numpy and plain Python.
+    """
+    total = 0.0
+    if color_image is not None:
+        total += float(color_image[::8, ::8, 1].mean())
+    if samples is not None:
+        for sample in samples[::4].tolist():
+            if sample > 0:
+                total += 1 / sample
+    for i in range(3000):
+        total += i % 7
+    return total
+
+
+def run_control_loop(color_channel, lidar_channel) -> np.ndarray:
+    """
+    Runs the control loop for DURATION seconds and returns how late (in seconds)
+    each frame started.
+    """
+    period = 1 / FRAME_RATE
+    num_frames = int(DURATION * FRAME_RATE)
+    lateness = np.empty(num_frames)
+    next_time = time.perf_counter() + period
+    for i in range(num_frames):
+        _, _, color_image = color_channel.read()
+        _, _, samples = lidar_channel.read()
+        update(color_image, samples)
+
+        time.sleep(max(0.0, next_time - time.perf_counter()))
+        lateness[i] = time.perf_counter() - next_time
+        next_time += period
+    return lateness
+
+
+def report(name: str, lateness: np.ndarray) -> None:
+    lateness_ms = lateness * 1000
+    print(
+        f"{name:>12}: mean {lateness_ms.mean():6.3f} ms | "
+        f"std {lateness_ms.std():6.3f} ms | "
+        f"p99 {np.percentile(lateness_ms, 99):6.3f} ms | "
+        f"max {lateness_ms.max():6.3f} ms"
+    )
+
+
+def benchmark_in_process() -> np.ndarray:
+    color_channel = SensorChannel(8)
+    lidar_channel = SensorChannel(8)
+    stop_event = threading.Event()
+    publisher = threading.Thread(
+        target=publish_fake_sensors,
+        args=(color_channel, lidar_channel, stop_event),
+        daemon=True,
+    )
+    publisher.start()
+    try:
+        return run_control_loop(color_channel, lidar_channel)
+    finally:
+        stop_event.set()
+        publisher.join()
+
+
+def benchmark_isolated() -> np.ndarray:
+    context = mp.get_context("fork")
+    lock = context.Lock()
+    color_ring = SharedFrameRing((HEIGHT, WIDTH, 3), np.uint8, 4, lock)
+    lidar_ring = SharedFrameRing((2048,), np.float32, 4, lock)
+    stop_event = context.Event()
+    publisher = context.Process(
+        target=publish_fake_sensors,
+        args=(color_ring, lidar_ring, stop_event),
+        daemon=True,
+    )
+    publisher.start()
+    try:
+        return run_control_loop(color_ring, lidar_ring)
+    finally:
+        stop_event.set()
+        publisher.join()
+        color_ring.close(unlink=True)
+        lidar_ring.close(unlink=True)
+
+
+########################################################################################
+# DO NOT MODIFY: Run the benchmark
+########################################################################################
+
+if __name__ == "__main__":
+    print(
+        f">> Frame lateness over {DURATION:.0f} s at {FRAME_RATE} Hz "
+        f"with {SENSOR_RATE} Hz fake sensors"
+    )
+    report("in-process", benchmark_in_process())
+    report("isolated", benchmark_isolated())
@@ -0,0 +1,122 @@
+"""
+Copyright Harvey Mudd College
+MIT License
+Spring 2020
+
+Benchmark - Update loop jitter with CPU affinity and SCHED_FIFO priority
+
+Runs a 60 Hz loop on a thread while busy background processes load every core, first
+with the default configuration, then pinned to one core, then pinned with SCHED_FIFO
+priority (which is skipped with a warning without root or CAP_SYS_NICE).  Runs on
+any Linux machine.
+
+Usage: python3 thread_jitter.py [seconds per mode]
+"""
+
+########################################################################################
+# Imports
+########################################################################################
+
+import multiprocessing as mp
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(1, "../library")
+sys.path.insert(1, "../library/real")
+from thread_config import ThreadConfig, apply_thread_config
+
+########################################################################################
+# Global variables
+########################################################################################
+
+FRAME_RATE = 60
+
+# Seconds to run each mode for
+DURATION = float(sys.argv[1]) if len(sys.argv) > 1 else 10.0
+
+# The core on which the loop is pinned
+CPU = max(os.sched_getaffinity(0))
+
+MODES = (
+    ("default", ThreadConfig()),
+    ("pinned", ThreadConfig(frozenset([CPU]))),
+    ("pinned+fifo", ThreadConfig(frozenset([CPU]), 80)),
+)
+
+########################################################################################
+# Functions
+########################################################################################
+
+
+def load(stop_event) -> None:
+    """
+    Keeps a core busy until stop_event is set.
+    """
+    total = 0
+    while not stop_event.is_set():
+        for i in range(10000):
+            total += i * i
+
+
+def run_loop(config: ThreadConfig, results: list) -> None:
+    """
+    Runs the loop for DURATION seconds and stores how late each frame started.
+    """
+    apply_thread_config("loop", config)
+
+    period = 1 / FRAME_RATE
+    num_frames = int(DURATION * FRAME_RATE)
+    lateness = np.empty(num_frames)
+    next_time = time.perf_counter() + period
+    for i in range(num_frames):
+        # A small amount of work standing in for an update function
+        sum(j % 7 for j in range(2000))
+
+        time.sleep(max(0.0, next_time - time.perf_counter()))
+        lateness[i] = time.perf_counter() - next_time
+        next_time += period
+    results.append(lateness)
+
+
+def report(name: str, lateness: np.ndarray) -> None:
+    lateness_ms = lateness * 1000
+    print(
+        f"{name:>12}: mean {lateness_ms.mean():6.3f} ms | "
+        f"std {lateness_ms.std():6.3f} ms | "
+        f"p99 {np.percentile(lateness_ms, 99):6.3f} ms | "
+        f"max {lateness_ms.max():6.3f} ms"
+    )
+
+
+########################################################################################
+# DO NOT MODIFY: Run the benchmark
+########################################################################################
+
+if __name__ == "__main__":
+    num_loads = len(os.sched_getaffinity(0))
+    print(
+        f">> Frame lateness over {DURATION:.0f} s at {FRAME_RATE} Hz "
+        f"with {num_loads} busy background processes"
+    )
+
+    stop_event = mp.Event()
+    loads = [mp.Process(target=load, args=(stop_event,)) for _ in range(num_loads)]
+    for process in loads:
+        process.start()
+
+    try:
+        for name, config in MODES:
+            # Use a new thread for every mode, so earlier settings are not inherited
+            results = []
+            thread = threading.Thread(target=run_loop, args=(config, results))
+            thread.start()
+            thread.join()
+            report(name, results[0])
+    finally:
+        stop_event.set()
+        for process in loads:
+            process.join()
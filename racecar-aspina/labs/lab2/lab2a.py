@@ -112,13 +112,17 @@ def update_contour():
         # Rationale: we prioritize contour colors based on the current mode.
         # If at least one contour is found of the given color (of sufficiently large size), we use it and stop
         # searching for other contours.
-        for color, hsv_options in get_hsv_ranges_and_colors():
-            contours: list[NDArray] = []
-            for hsv in hsv_options:
-                contours.extend(rc_utils.find_contours(image, hsv[0], hsv[1]))
+        # Contour every color with a single HSV conversion of the image
+        hsv_ranges_and_colors = list(get_hsv_ranges_and_colors())
+        color_contours = rc_utils.find_contours_multi(
+            image, dict(hsv_ranges_and_colors)
+        )
 
+        for color, _ in hsv_ranges_and_colors:
             # Filter contours by size to reduce noise
-            contour: NDArray = rc_utils.get_largest_contour(contours, MIN_CONTOUR_AREA)
+            contour: NDArray = rc_utils.get_largest_contour(
+                color_contours[color], MIN_CONTOUR_AREA
+            )
 
             if contour is not None:
                 # Calculate contour information
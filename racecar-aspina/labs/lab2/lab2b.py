@@ -38,6 +38,8 @@ speed = 0.0  # The current speed of the car
 angle = 0.0  # The current angle of the car's wheels
 contour_center = None  # The (pixel row, pixel column) of contour
 contour_area = 0  # The area of contour
+# Follows the cone between frames, so most frames only search around the cone
+cone_tracker = rc_utils.ContourTracker([ORANGE], MIN_CONTOUR_AREA)
 
 TARGET_DEPTH = 30
 angle_controller = PID(Kp=1, Ki=0.0, Kd=0.0, setpoint=0, output_limits=(-1, 1))
@@ -62,11 +64,9 @@ def update_contour():
         contour_center = None
         contour_area = 0
     else:
-        # Find all of the orange contours
-        contours = rc_utils.find_contours(image, ORANGE[0], ORANGE[1])
-
-        # Select the largest contour
-        contour = rc_utils.get_largest_contour(contours, MIN_CONTOUR_AREA)
+        # Find the largest orange contour, near the cone of the last frame if it
+        # is still there
+        contour = cone_tracker.update(image)
 
         if contour is not None:
             # Calculate contour information
@@ -95,6 +95,7 @@ def start():
     # Initialize variables
     speed = 0
     angle = 0
+    cone_tracker.reset()
 
     # Set initial driving speed and angle
     rc.drive.set_speed_angle(speed, angle)
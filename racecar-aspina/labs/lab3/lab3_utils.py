@@ -18,25 +18,31 @@ def get_closest_depth_coordinates_at_position(
     Returns the coordinates of the closest depth pixel in the vicinity of the position.
 
     :param depth_image: The depth image to search in.
-    :param position: The position to search around (passed as (Y, X).
+    :param position: The position to search around (passed as (Y, X), which must be
+        inside the image.
     :param pixel_range_x: The range in the x-axis to search around.
     :param pixel_range_y: The range in the y-axis to search around.
     :return: The coordinates of the closest depth pixel.
     """
     (mid_y, mid_x) = position
-    top_left: tuple[int, int] = (mid_y - pixel_range_y, mid_x - pixel_range_x)
-    bottom_right: tuple[int, int] = (mid_y + pixel_range_y, mid_x + pixel_range_x)
 
-    # IMPORTANT: We crop as otherwise the ground is closest!
-    cropped_depth_image = rc_utils.crop(
+    # The search area always holds at least the position itself, so a closest pixel
+    # is always found
+    assert (
+        0 <= mid_y < depth_image.shape[0] and 0 <= mid_x < depth_image.shape[1]
+    ), f"position {position} must be inside the depth image."
+    assert (
+        pixel_range_x > 0 and pixel_range_y > 0
+    ), f"pixel ranges ({pixel_range_x}, {pixel_range_y}) must be positive."
+
+    # IMPORTANT: We only search around the position as otherwise the ground is closest!
+    # The ROI is clamped to the image and gives back global coordinates
+    region = rc_utils.ROI(
         depth_image,
-        top_left_inclusive=top_left,
-        bottom_right_exclusive=bottom_right,
+        top_left_inclusive=(mid_y - pixel_range_y, mid_x - pixel_range_x),
+        bottom_right_exclusive=(mid_y + pixel_range_y, mid_x + pixel_range_x),
     )
-    closest_point: tuple[int, int] = rc_utils.get_closest_pixel(cropped_depth_image)
-
-    # We offset to give global coordinates!
-    return closest_point[0] + top_left[0], closest_point[1] + top_left[1]
+    return rc_utils.get_closest_pixel(region)
 
 
 def get_closest_depth_at_position(
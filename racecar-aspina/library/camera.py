@@ -6,8 +6,15 @@ Summer 2020
 Defines the interface of the Camera module of the racecar_core library.
 """
 
+from __future__ import annotations
+
 import abc
 import copy
+import math
+import os
+import time
+from typing import Any, Optional, Tuple
+
 import numpy as np
 from nptyping import NDArray
 
@@ -24,6 +31,18 @@ class Camera(abc.ABC):
     # Maximum range of the depth camera (in cm)
     _MAX_RANGE = 1200
 
+    # Vertical field of view of the color camera (in degrees), which is that of the
+    # RealSense D435i color stream cropped to 640x480
+    _VERTICAL_FIELD_OF_VIEW = 42.5
+
+    # Environment variable naming a calibration of the color camera, saved with
+    # np.savez(path, camera_matrix=camera_matrix, distortion=distortion)
+    _INTRINSICS_VARIABLE = "RACECAR_CAMERA_INTRINSICS"
+
+    # The calibrated or reported camera matrix and distortion coefficients, kept
+    # once known
+    __intrinsics: Optional[Tuple[NDArray, NDArray]] = None
+
     def get_color_image(self) -> NDArray[(480, 640, 3), np.uint8]:
         """
         Returns a deep copy of the current color image captured by the camera.
@@ -163,6 +182,99 @@ class Camera(abc.ABC):
         """
         pass
 
+    @abc.abstractmethod
+    def get_color_image_sequence(self) -> int:
+        """
+        Returns the sequence number of the current color image.
+
+        Returns:
+            A number which increases every time a new color image is captured, so the
+            same image is returned by get_color_image() while it does not change.
+
+        Note:
+            The camera may capture images more slowly than the update loop runs, so
+            the sequence number can stay the same across several frames.
+
+        Example::
+
+            last_sequence = -1
+
+            def update():
+                global last_sequence
+
+                # Only process the color image when the camera captured a new one
+                sequence = rc.camera.get_color_image_sequence()
+                if sequence != last_sequence:
+                    last_sequence = sequence
+                    image = rc.camera.get_color_image()
+        """
+        pass
+
+    @abc.abstractmethod
+    def get_color_image_timestamp(self) -> float:
+        """
+        Returns the time at which the current color image was captured.
+
+        Returns:
+            The capture time in seconds since the epoch, or 0.0 if no image has been
+            captured yet.
+        """
+        pass
+
+    def get_color_image_age(self) -> float:
+        """
+        Returns how long ago the current color image was captured.
+
+        Returns:
+            The number of seconds elapsed since the current color image was captured.
+
+        Example::
+
+            # Slow down if the color image is more than 100 ms old
+            if rc.camera.get_color_image_age() > 0.1:
+                rc.drive.set_max_speed(0.1)
+        """
+        return time.time() - self.get_color_image_timestamp()
+
+    @abc.abstractmethod
+    def get_depth_image_sequence(self) -> int:
+        """
+        Returns the sequence number of the current depth image.
+
+        Returns:
+            A number which increases every time a new depth image is captured, so the
+            same image is returned by get_depth_image() while it does not change.
+
+        Example::
+
+            # Only search for the closest pixel when a new depth image arrived
+            sequence = rc.camera.get_depth_image_sequence()
+            if sequence != last_sequence:
+                last_sequence = sequence
+                closest_pixel = rc_utils.get_closest_pixel(rc.camera.get_depth_image())
+        """
+        pass
+
+    @abc.abstractmethod
+    def get_depth_image_timestamp(self) -> float:
+        """
+        Returns the time at which the current depth image was captured.
+
+        Returns:
+            The capture time in seconds since the epoch, or 0.0 if no image has been
+            captured yet.
+        """
+        pass
+
+    def get_depth_image_age(self) -> float:
+        """
+        Returns how long ago the current depth image was captured.
+
+        Returns:
+            The number of seconds elapsed since the current depth image was captured.
+        """
+        return time.time() - self.get_depth_image_timestamp()
+
     def get_width(self) -> int:
         """
         Returns the pixel width of the color and depth images.
@@ -212,3 +324,100 @@ class Camera(abc.ABC):
                 center_distance = rc.camera.get_max_range()
         """
         return self._MAX_RANGE
+
+    def get_intrinsics(
+        self,
+    ) -> Tuple[NDArray[(3, 3), np.float64], NDArray[Any, np.float64]]:
+        """
+        Returns the intrinsic parameters of the color camera.
+
+        Returns:
+            The 3x3 camera matrix (with the focal lengths and principal point in
+            pixels) and the distortion coefficients of the color camera, in the
+            format used by cv.solvePnP and cv.undistortPoints.
+
+        Note:
+            If the RACECAR_CAMERA_INTRINSICS environment variable names a calibration
+            file, it is loaded; otherwise the intrinsics reported by the camera are
+            used (the RealSense camera_info topic on the car, the recording during
+            replay, and the ideal camera of RacecarSim in simulation).  Until the
+            camera reports them, those of an undistorted camera with the nominal
+            field of view are returned, which are accurate to a few percent.
+
+        Example::
+
+            # Estimate the distance of each 10 cm AR marker in the current image
+            camera_matrix, distortion = rc.camera.get_intrinsics()
+            markers = rc_utils.get_ar_markers(rc.camera.get_color_image())
+            poses = rc_utils.estimate_ar_marker_poses(
+                markers, 10, camera_matrix, distortion
+            )
+        """
+        if self.__intrinsics is None:
+            path = os.environ.get(self._INTRINSICS_VARIABLE)
+            if path:
+                with np.load(path) as calibration:
+                    self.__intrinsics = (
+                        np.array(calibration["camera_matrix"], np.float64),
+                        np.array(calibration["distortion"], np.float64).reshape(-1),
+                    )
+            else:
+                intrinsics = self._get_camera_intrinsics()
+                if intrinsics is None:
+                    # Not kept, so the camera's intrinsics are used once reported
+                    return self._get_nominal_intrinsics()
+                self.__intrinsics = intrinsics
+        return self.__intrinsics
+
+    def set_intrinsics(
+        self,
+        camera_matrix: NDArray[(3, 3), np.float64],
+        distortion: Optional[NDArray[Any, np.float64]] = None,
+    ) -> None:
+        """
+        Replaces the intrinsic parameters of the color camera, such as with the
+        result of cv.calibrateCamera.
+
+        Args:
+            camera_matrix: The 3x3 camera matrix.
+            distortion: The distortion coefficients, or None if there is no
+                distortion.
+        """
+        camera_matrix = np.array(camera_matrix, np.float64)
+        assert camera_matrix.shape == (
+            3,
+            3,
+        ), f"camera_matrix must be 3x3, but had shape {camera_matrix.shape}."
+        self.__intrinsics = (
+            camera_matrix,
+            np.zeros(5) if distortion is None else np.array(distortion, np.float64),
+        )
+
+    def _get_camera_intrinsics(
+        self,
+    ) -> Optional[Tuple[NDArray[(3, 3), np.float64], NDArray[Any, np.float64]]]:
+        """
+        Returns the camera matrix and distortion coefficients reported by the
+        camera, or None if they are not known (yet).
+        """
+        return None
+
+    def _get_nominal_intrinsics(
+        self,
+    ) -> Tuple[NDArray[(3, 3), np.float64], NDArray[Any, np.float64]]:
+        """
+        Returns the intrinsics of an undistorted camera with square pixels, centered
+        on the image, with the nominal field of view.
+        """
+        focal_length = (self._HEIGHT / 2) / math.tan(
+            math.radians(self._VERTICAL_FIELD_OF_VIEW / 2)
+        )
+        camera_matrix = np.array(
+            (
+                (focal_length, 0, (self._WIDTH - 1) / 2),
+                (0, focal_length, (self._HEIGHT - 1) / 2),
+                (0, 0, 1),
+            ),
+            np.float64,
+        )
+        return camera_matrix, np.zeros(5)
@@ -6,6 +6,8 @@ Summer 2020
 Defines the interface of the Display module of the racecar_core library.
 """
 
+from __future__ import annotations
+
 import abc
 import numpy as np
 import math
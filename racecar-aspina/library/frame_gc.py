@@ -0,0 +1,178 @@
+"""
+Copyright Harvey Mudd College
+MIT License
+Spring 2020
+
+Contains the garbage collection policy used by the racecar update loop
+"""
+
+# General
+import gc
+import time
+from typing import NamedTuple
+
+
+class GcStats(NamedTuple):
+    """
+    Statistics about the garbage collections which ran since the last reset.
+    """
+
+    # Number of collections, and how many of them interrupted an update function
+    num_collections: int
+    num_in_update: int
+    # Average and largest seconds spent in a single collection
+    mean_pause: float
+    max_pause: float
+    # Largest seconds spent in a collection which interrupted an update function
+    max_update_pause: float
+
+
+class FrameGc:
+    """
+    Schedules Python's cyclic garbage collector around the frames of the update loop.
+
+    While managed, objects which survive the start function are frozen with
+    gc.freeze(), so later collections do not need to scan them, and automatic
+    collection is disabled.  Instead, collect() is called in the slack time at the
+    end of every frame: the youngest generation is always collected, while older
+    generations are only collected once they are due and their last measured pause
+    fits in the remaining time of the frame.
+
+    Pauses of all collections are measured with gc.callbacks, whether or not the
+    collector is managed, so the effect of the policy can be compared.
+    """
+
+    # Number of frames an older generation may be postponed before it is collected
+    # regardless of the time remaining in the frame
+    __MAX_POSTPONED_FRAMES = 60
+
+    def __init__(self) -> None:
+        self.__is_managed = False
+        self.__is_in_update = False
+
+        # Last measured pause (in seconds) of collecting each generation
+        self.__pause_estimates = [0.0, 0.0, 0.0]
+        self.__num_postponed_frames = 0
+
+        self.__pause_start = 0.0
+        self.reset_stats()
+        gc.callbacks.append(self.__on_gc)
+
+    def set_managed(self, is_managed: bool) -> None:
+        """
+        Enables or disables the policy, restoring automatic collection if disabled.
+        """
+        self.__is_managed = is_managed
+        if is_managed:
+            gc.disable()
+        else:
+            gc.unfreeze()
+            gc.enable()
+
+    def is_managed(self) -> bool:
+        """
+        Returns whether the collector is scheduled by this policy.
+        """
+        return self.__is_managed
+
+    def start(self) -> None:
+        """
+        Freezes the objects created up to and including the start function.
+
+        Note:
+            Must be called after the user's start function returns.  Objects frozen
+            by an earlier start are unfrozen first, so garbage left from a previous
+            run of the program (such as after BACK then START) is still collected.
+        """
+        if self.__is_managed:
+            gc.unfreeze()
+            gc.collect()
+            gc.freeze()
+
+    def begin_update(self) -> None:
+        """
+        Marks the start of an update function.
+        """
+        self.__is_in_update = True
+        if self.__is_managed:
+            gc.disable()
+
+    def end_update(self) -> None:
+        """
+        Marks the end of an update function.
+        """
+        self.__is_in_update = False
+
+    def collect(self, slack: float) -> None:
+        """
+        Runs the collections which are due and fit in the rest of the frame.
+
+        Args:
+            slack: The number of seconds remaining until the next frame starts.
+        """
+        if not self.__is_managed:
+            return
+
+        counts = gc.get_count()
+        thresholds = gc.get_threshold()
+
+        # Find the oldest generation which is due, as collecting a generation also
+        # collects every younger one
+        generation = 0
+        for older in (2, 1):
+            if counts[older] >= thresholds[older]:
+                generation = older
+                break
+
+        if generation > 0 and self.__pause_estimates[generation] > slack:
+            self.__num_postponed_frames += 1
+            if self.__num_postponed_frames < self.__MAX_POSTPONED_FRAMES:
+                generation = 0
+
+        if generation > 0:
+            self.__num_postponed_frames = 0
+        gc.collect(generation)
+
+    def get_stats(self) -> GcStats:
+        """
+        Returns statistics about the collections which ran since the last reset.
+        """
+        mean_pause = (
+            self.__total_pause / self.__num_collections
+            if self.__num_collections
+            else 0.0
+        )
+        return GcStats(
+            self.__num_collections,
+            self.__num_in_update,
+            mean_pause,
+            self.__max_pause,
+            self.__max_update_pause,
+        )
+
+    def reset_stats(self) -> None:
+        """
+        Resets the statistics returned by get_stats.
+        """
+        self.__num_collections = 0
+        self.__num_in_update = 0
+        self.__total_pause = 0.0
+        self.__max_pause = 0.0
+        self.__max_update_pause = 0.0
+
+    def __on_gc(self, phase: str, info: dict) -> None:
+        """
+        Measures the pause of every collection (registered with gc.callbacks).
+        """
+        if phase == "start":
+            self.__pause_start = time.perf_counter()
+            return
+
+        pause = time.perf_counter() - self.__pause_start
+        self.__pause_estimates[info["generation"]] = pause
+        self.__num_collections += 1
+        self.__total_pause += pause
+        self.__max_pause = max(self.__max_pause, pause)
+        if self.__is_in_update:
+            self.__num_in_update += 1
+            self.__max_update_pause = max(self.__max_update_pause, pause)
@@ -0,0 +1,107 @@
+"""
+Copyright Harvey Mudd College
+MIT License
+Spring 2020
+
+Contains the import timer used to report where the startup time of a program goes
+"""
+
+# General
+import builtins
+import sys
+import time
+from typing import Dict, List, Tuple
+
+
+class ImportTimer:
+    """
+    Measures the time spent importing each module, in the style of python -X importtime.
+
+    While running, the timer replaces builtins.__import__, so every import statement
+    which loads a new module is timed.  The self time of a module excludes the
+    modules it imports in turn, while its cumulative time includes them.
+
+    Note:
+        Modules imported before the timer was started are already loaded and do
+        not appear in the report.
+    """
+
+    def __init__(self) -> None:
+        # The (self, cumulative) seconds spent importing each module
+        self.__times: Dict[str, Tuple[float, float]] = {}
+        # The cumulative seconds of the imports nested in each import in progress
+        self.__child_times: List[float] = []
+        self.__original_import = None
+        self.__start_time = 0.0
+        self.__stop_time = 0.0
+
+    def start(self) -> None:
+        """
+        Starts timing imports.
+        """
+        if self.__original_import is None:
+            self.__original_import = builtins.__import__
+            builtins.__import__ = self.__import
+            self.__start_time = time.perf_counter()
+
+    def stop(self) -> None:
+        """
+        Stops timing imports.
+        """
+        if self.__original_import is not None:
+            builtins.__import__ = self.__original_import
+            self.__original_import = None
+            self.__stop_time = time.perf_counter()
+
+    def is_running(self) -> bool:
+        """
+        Returns whether imports are currently being timed.
+        """
+        return self.__original_import is not None
+
+    def get_times(self) -> Dict[str, Tuple[float, float]]:
+        """
+        Returns the (self, cumulative) seconds spent importing each module.
+        """
+        return dict(self.__times)
+
+    def print_report(self, num_modules: int = 15) -> None:
+        """
+        Prints the modules which took the longest to import.
+
+        Args:
+            num_modules: The number of modules to list.
+        """
+        end_time = self.__stop_time if self.__original_import is None else None
+        elapsed = (end_time or time.perf_counter()) - self.__start_time
+        total = sum(self_time for self_time, _ in self.__times.values())
+
+        print(
+            f">> Imported {len(self.__times)} modules in {total:.3f} s "
+            f"of {elapsed:.3f} s since the racecar library was imported"
+        )
+        print(f"{'self [ms]':>12} | {'cumulative [ms]':>15} | module")
+        slowest = sorted(self.__times.items(), key=lambda item: -item[1][0])
+        for name, (self_time, cumulative_time) in slowest[:num_modules]:
+            print(f"{self_time * 1000:12.1f} | {cumulative_time * 1000:15.1f} | {name}")
+
+    def __import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        """
+        Times a call to the original __import__ if it loads a new module.
+        """
+        # Imports of loaded modules are frequent and fast, so do not time them
+        if level == 0 and name in sys.modules:
+            return self.__original_import(name, globals, locals, fromlist, level)
+
+        num_modules = len(sys.modules)
+        self.__child_times.append(0.0)
+        start = time.perf_counter()
+        try:
+            return self.__original_import(name, globals, locals, fromlist, level)
+        finally:
+            cumulative_time = time.perf_counter() - start
+            self_time = cumulative_time - self.__child_times.pop()
+            if self.__child_times:
+                self.__child_times[-1] += cumulative_time
+            if len(sys.modules) > num_modules:
+                self.__times[name] = (self_time, cumulative_time)
@@ -6,7 +6,10 @@ Summer 2020
 Defines the interface for the Lidar module of the racecar_core library.
 """
 
+from __future__ import annotations
+
 import abc
+import time
 import numpy as np
 from nptyping import NDArray
 
@@ -67,6 +70,55 @@ class Lidar(abc.ABC):
         """
         pass
 
+    @abc.abstractmethod
+    def get_samples_sequence(self) -> int:
+        """
+        Returns the sequence number of the current LIDAR scan.
+
+        Returns:
+            A number which increases every time a new scan is received, so the same
+            scan is returned by get_samples() while it does not change.
+
+        Note:
+            The LIDAR spins more slowly than the update loop runs, so the sequence
+            number can stay the same across several frames.
+
+        Example::
+
+            # Only search the scan for obstacles when it changed
+            sequence = rc.lidar.get_samples_sequence()
+            if sequence != last_sequence:
+                last_sequence = sequence
+                _, distance = rc_utils.get_lidar_closest_point(rc.lidar.get_samples())
+        """
+        pass
+
+    @abc.abstractmethod
+    def get_samples_timestamp(self) -> float:
+        """
+        Returns the time at which the current LIDAR scan was captured.
+
+        Returns:
+            The capture time in seconds since the epoch, or 0.0 if no scan has been
+            received yet.
+        """
+        pass
+
+    def get_samples_age(self) -> float:
+        """
+        Returns how long ago the current LIDAR scan was captured.
+
+        Returns:
+            The number of seconds elapsed since the current scan was captured.
+
+        Example::
+
+            # Stop if the LIDAR has not produced a scan in the last half second
+            if rc.lidar.get_samples_age() > 0.5:
+                rc.drive.stop()
+        """
+        return time.time() - self.get_samples_timestamp()
+
     def get_num_samples(self) -> int:
         """
         Returns the number of samples in a full LIDAR scan.
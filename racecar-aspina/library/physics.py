@@ -6,7 +6,10 @@ Summer 2020
 Defines the interface of the Physics module of the racecar_core library
 """
 
+from __future__ import annotations
+
 import abc
+import time
 import numpy as np
 from nptyping import NDArray
 
@@ -68,3 +71,43 @@ class Physics(abc.ABC):
             yaw = ang_vel[1]
         """
         pass
+
+    @abc.abstractmethod
+    def get_imu_sequence(self) -> int:
+        """
+        Returns the sequence number of the current IMU measurements.
+
+        Returns:
+            A number which increases every time new IMU measurements are received, so
+            the values returned by get_linear_acceleration() and
+            get_angular_velocity() do not change while it stays the same.
+
+        Example::
+
+            # Only update the heading estimate when new IMU measurements arrived
+            sequence = rc.physics.get_imu_sequence()
+            if sequence != last_sequence:
+                last_sequence = sequence
+                heading += rc.physics.get_angular_velocity()[1] * rc.get_delta_time()
+        """
+        pass
+
+    @abc.abstractmethod
+    def get_imu_timestamp(self) -> float:
+        """
+        Returns the time at which the most recent IMU measurement was captured.
+
+        Returns:
+            The capture time in seconds since the epoch, or 0.0 if no measurement has
+            been received yet.
+        """
+        pass
+
+    def get_imu_age(self) -> float:
+        """
+        Returns how long ago the most recent IMU measurement was captured.
+
+        Returns:
+            The number of seconds elapsed since the most recent IMU measurement.
+        """
+        return time.time() - self.get_imu_timestamp()
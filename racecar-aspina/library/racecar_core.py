@@ -10,6 +10,14 @@ import abc
 import sys
 from typing import Callable, Optional
 
+from import_timer import ImportTimer
+
+# With the -t flag, time the imports of the library and the program until the racecar
+# is created (see create_racecar)
+_import_timer = ImportTimer()
+if "-t" in sys.argv:
+    _import_timer.start()
+
 import camera
 import controller
 import display
@@ -17,6 +25,7 @@ import drive
 import lidar
 import physics
 
+from frame_gc import GcStats
 import racecar_utils as rc_utils
 
 
@@ -119,18 +128,61 @@ class Racecar(abc.ABC):
         """
         pass
 
+    @abc.abstractmethod
+    def set_gc_managed(self, is_managed: bool = True) -> None:
+        """
+        Schedules Python's garbage collector around the update loop.
+
+        Args:
+            is_managed: If True, objects created up to the end of the start function
+                are frozen, automatic collection is disabled, and collection runs in
+                the time left at the end of each frame instead.  If False, Python's
+                automatic collection is restored.
+
+        Note:
+            Automatic collection can pause the program for several milliseconds at
+            arbitrary points of an update function.  The pauses are measured in
+            either mode and reported by get_gc_stats.
+
+        Example::
+
+            # Keep garbage collection out of the update function
+            rc.set_gc_managed(True)
+        """
+        pass
+
+    @abc.abstractmethod
+    def get_gc_stats(self) -> GcStats:
+        """
+        Returns statistics about the garbage collections which ran since the previous
+        call to get_gc_stats.
 
-def create_racecar(isSimulation: Optional[bool] = None) -> Racecar:
+        Example::
+
+            # Print the longest garbage collection pause during an update function
+            def update_slow():
+                stats = rc.get_gc_stats()
+                print(f"Max GC pause in update: {stats.max_update_pause * 1000:.2f} ms")
+        """
+        pass
+
+
+def create_racecar(
+    isSimulation: Optional[bool] = None, replayPath: Optional[str] = None
+) -> Racecar:
     """
     Generates a racecar object based on the isSimulation argument or execution flags.
 
     Args:
         isSimulation: If True, create a RacecarSim, if False, create a RacecarReal,
             if None, decide based on the command line arguments
+        replayPath: If provided, create a RacecarReplay of the recording in this
+            directory instead, if None, decide based on the command line arguments
 
     Returns:
-        A RacecarSim object (for use with the Unity simulation) or a RacecarReal object
-        (for use on the physical car).
+        A RacecarSim object (for use with the Unity simulation), a RacecarReal object
+        (for use on the physical car), or a RacecarReplay object (for running on a
+        recording of the physical car).
 
     Note:
         If isSimulation is None, this function will return a RacecarSim if the program
@@ -140,10 +192,38 @@ def create_racecar(isSimulation: Optional[bool] = None) -> Racecar:
 
         If the program was executed with the "-h" flag, it is run in headless mode,
         which disables the display module.
+
+        If the program was executed with the "-i" flag, the camera and lidar data of
+        a RacecarReal are received in a separate process, isolating the update
+        function from image decoding.
+
+        If the program was executed with the "-r" flag, a RacecarReal records its
+        sensor data and drive commands (see RacecarReal.start_recording).
+
+        If the program was executed with the "-p" flag followed by the directory of a
+        recording, a RacecarReplay of that recording is returned, which is paced to
+        the recorded time unless the "-f" flag is also provided.
+
+        If the program was executed with the "-g" flag, garbage collection is
+        scheduled around the update loop (see Racecar.set_gc_managed).
+
+        If the program was executed with the "-t" flag, the modules which took the
+        longest to import since racecar_core was imported are listed once the racecar
+        is created.  The sensor modules of a RacecarReal are only created when first
+        used, so their imports are only listed if the program used them at import time.
     """
     library_path: str = __file__.replace("racecar_core.py", "")
     isHeadless: bool = "-h" in sys.argv
+    isIsolated: bool = "-i" in sys.argv
+    isGcManaged: bool = "-g" in sys.argv
+    isRecording: bool = "-r" in sys.argv
     initializeDisplay: bool = "-d" in sys.argv
+    isFastReplay: bool = "-f" in sys.argv
+    isImportTimed: bool = "-t" in sys.argv
+
+    # If replayPath was not specified, use the argument after the -p flag, if any
+    if replayPath is None and "-p" in sys.argv[:-1]:
+        replayPath = sys.argv[sys.argv.index("-p") + 1]
 
     # If isSimulation was not specified, set it to True if the user ran the program with
     # the -s flag and false otherwise
@@ -151,7 +231,12 @@ def create_racecar(isSimulation: Optional[bool] = None) -> Racecar:
         isSimulation = "-s" in sys.argv
 
     racecar: Racecar
-    if isSimulation:
+    if replayPath is not None:
+        sys.path.insert(1, library_path + "replay")
+        from racecar_core_replay import RacecarReplay
+
+        racecar = RacecarReplay(replayPath, isHeadless, not isFastReplay)
+    elif isSimulation:
         sys.path.insert(1, library_path + "simulation")
         from racecar_core_sim import RacecarSim
 
@@ -160,17 +245,30 @@ def create_racecar(isSimulation: Optional[bool] = None) -> Racecar:
         sys.path.insert(1, library_path + "real")
         from racecar_core_real import RacecarReal
 
-        racecar = RacecarReal(isHeadless)
+        racecar = RacecarReal(isHeadless, isIsolated, isRecording)
 
     if initializeDisplay:
         racecar.display.create_window()
 
+    if isGcManaged:
+        racecar.set_gc_managed(True)
+
     rc_utils.print_colored(
         ">> Racecar created with the following options:"
         + f"\n    Simulation (-s): [{isSimulation}]"
         + f"\n    Headless (-h): [{isHeadless}]"
-        + f"\n    Initialize with display (-d): [{initializeDisplay}]",
+        + f"\n    Initialize with display (-d): [{initializeDisplay}]"
+        + f"\n    Isolated sensors (-i): [{isIsolated}]"
+        + f"\n    Recording (-r): [{isRecording}]"
+        + f"\n    Managed garbage collection (-g): [{isGcManaged}]"
+        + f"\n    Replay (-p): [{replayPath}]"
+        + f"\n    Fast replay (-f): [{isFastReplay}]"
+        + f"\n    Import times (-t): [{isImportTimed}]",
         rc_utils.TerminalColor.pink,
     )
 
+    if _import_timer.is_running():
+        _import_timer.stop()
+        _import_timer.print_report()
+
     return racecar
@@ -6,6 +6,13 @@ Summer 2020
 Contains helper functions to support common operations.
 """
 
+from __future__ import annotations
+
+import math
+import os
+import threading
+import time
+
 import cv2 as cv
 import numpy as np
 from typing import *
@@ -240,6 +247,347 @@ def crop(
     return image[r_min:r_max, c_min:c_max]
 
 
+class ROI:
+    """
+    A rectangular region of interest of an image, which remembers where it came from.
+
+    The region is a view of the image, or of one of its cached pyramid levels if it is
+    downscaled by a power of two, so creating an ROI rarely copies any pixels.
+    find_contours, find_contours_multi, find_blobs, get_closest_pixel, and
+    get_ar_markers accept an ROI in place of an image, search only the region, and
+    return their results in the coordinates of the full image, so a program can
+    shrink the area it processes without converting coordinates by hand.
+
+    Example::
+
+        image = rc.camera.get_color_image()
+
+        # Only search the floor directly in front of the car
+        floor = rc_utils.ROI(image, (360, 0), (480, 640))
+        contours = rc_utils.find_contours(floor, BLUE_HSV_MIN, BLUE_HSV_MAX)
+
+        # The contour center is a (row, column) of image, not of the floor region
+        largest_contour = rc_utils.get_largest_contour(contours)
+        if largest_contour is not None:
+            center = rc_utils.get_contour_center(largest_contour)
+    """
+
+    def __init__(
+        self,
+        image: NDArray[(Any, ...), Any],
+        top_left_inclusive: Tuple[int, int] = (0, 0),
+        bottom_right_exclusive: Optional[Tuple[int, int]] = None,
+        scale: float = 1.0,
+        interpolation: Optional[int] = None,
+    ) -> None:
+        """
+        Creates a region of interest of an image.
+
+        Args:
+            image: The full color or depth image.
+            top_left_inclusive: The (row, column) of the top left pixel of the region.
+            bottom_right_exclusive: The (row, column) of the pixel one past the bottom
+                right corner of the region, or None to extend to the bottom right
+                corner of the image.
+            scale: The factor by which the region is resized, such as 0.5 to search
+                it at half resolution.
+            interpolation: The cv.resize interpolation used if scale is not 1, or
+                None to take the region from the pyramid of the image (see
+                get_pyramid_level) when scale is 1/2, 1/4, 1/8, and so on, and to
+                use cv.INTER_AREA otherwise.
+
+        Note:
+            Unlike crop, the region is clamped to the image, so it may extend past
+            the edges of the image.  A region taken from a pyramid level is widened
+            to the nearest pixels of that level, which get_top_left and
+            get_bottom_right reflect.  A region lying entirely outside of the image
+            (such as one made by ROI.around with a center off the image) is empty,
+            and the search functions find nothing in it: find_contours returns [],
+            find_blobs returns no blobs, get_closest_pixel returns None, and
+            ARMarkerDetector.detect returns [].
+        """
+        assert scale > 0, f"scale ({scale}) must be positive."
+
+        if bottom_right_exclusive is None:
+            bottom_right_exclusive = image.shape[:2]
+
+        top = int(clamp(top_left_inclusive[0], 0, image.shape[0]))
+        left = int(clamp(top_left_inclusive[1], 0, image.shape[1]))
+        bottom = int(clamp(bottom_right_exclusive[0], top, image.shape[0]))
+        right = int(clamp(bottom_right_exclusive[1], left, image.shape[1]))
+
+        self.__frame = image
+        self.__scale = scale
+
+        level = _get_pyramid_level_index(scale) if interpolation is None else None
+        if level is not None and level > 0:
+            # Each pixel of the level covers a factor x factor block of the image
+            factor = 1 << level
+            level_image = get_pyramid_level(image, level)
+            top, left = top // factor, left // factor
+            bottom = min(-(-bottom // factor), level_image.shape[0])
+            right = min(-(-right // factor), level_image.shape[1])
+            self.__image = level_image[top:bottom, left:right]
+            self.__top_left = (top * factor, left * factor)
+            self.__bottom_right = (bottom * factor, right * factor)
+            return
+
+        self.__top_left = (top, left)
+        self.__bottom_right = (bottom, right)
+        self.__image = image[top:bottom, left:right]
+        if scale != 1.0 and self.__image.size > 0:
+            self.__image = cv.resize(
+                self.__image,
+                None,
+                fx=scale,
+                fy=scale,
+                interpolation=cv.INTER_AREA if interpolation is None else interpolation,
+            )
+
+    @classmethod
+    def around(
+        cls,
+        image: NDArray[(Any, ...), Any],
+        center: Tuple[int, int],
+        half_height: int,
+        half_width: int,
+        scale: float = 1.0,
+    ) -> ROI:
+        """
+        Creates a region of interest centered on a pixel of an image.
+
+        Args:
+            image: The full color or depth image.
+            center: The (row, column) of the pixel at the center of the region.
+            half_height: The number of rows above and below the center to include.
+            half_width: The number of columns left and right of the center to include.
+            scale: The factor by which the region is resized.
+
+        Example::
+
+            # Find the closest pixel within 20 pixels of a contour's center
+            depth_image = rc.camera.get_depth_image()
+            near_center = rc_utils.ROI.around(depth_image, center, 20, 20)
+            closest_pixel = rc_utils.get_closest_pixel(near_center)
+        """
+        return cls(
+            image,
+            (center[0] - half_height, center[1] - half_width),
+            (center[0] + half_height + 1, center[1] + half_width + 1),
+            scale,
+        )
+
+    def get_image(self) -> NDArray[(Any, ...), Any]:
+        """
+        Returns the pixels of the region (resized by the scale of the ROI).
+        """
+        return self.__image
+
+    def get_frame(self) -> NDArray[(Any, ...), Any]:
+        """
+        Returns the full image of which this is a region.
+        """
+        return self.__frame
+
+    def get_top_left(self) -> Tuple[int, int]:
+        """
+        Returns the (row, column) of the top left pixel of the region in the frame.
+        """
+        return self.__top_left
+
+    def get_bottom_right(self) -> Tuple[int, int]:
+        """
+        Returns the (row, column) one past the bottom right pixel of the region in
+        the frame.
+        """
+        return self.__bottom_right
+
+    def get_scale(self) -> float:
+        """
+        Returns the factor by which the region was resized.
+        """
+        return self.__scale
+
+    def to_frame_point(self, point: Tuple[float, float]) -> Tuple[int, int]:
+        """
+        Converts a (row, column) of the region into the (row, column) of the frame.
+        """
+        row, col = self.to_frame_points(np.array(point, np.float64))
+        return (round(row), round(col))
+
+    def to_frame_points(
+        self, points: NDArray[(Any, 2), Any]
+    ) -> NDArray[(Any, 2), np.float64]:
+        """
+        Converts an array of (row, column) points of the region into the frame.
+        """
+        if self.__scale == 1.0:
+            return np.asarray(points, np.float64) + self.__top_left
+
+        # Map the center of each resized pixel to the center of the pixels it covers
+        return (np.asarray(points) + 0.5) / self.__scale - 0.5 + self.__top_left
+
+    def to_frame_contour(self, contour: NDArray) -> NDArray:
+        """
+        Converts a contour found in the region into the frame.
+        """
+        # Contour points are (column, row)
+        offset = np.array(self.__top_left[::-1], np.int32)
+        if self.__scale == 1.0:
+            return contour + offset
+        frame_contour = ((contour + 0.5) / self.__scale - 0.5).round().astype(np.int32)
+        return frame_contour + offset
+
+    def to_frame_area(self, area: float) -> float:
+        """
+        Converts a number of pixels of the region into a number of pixels of the
+        frame.
+        """
+        if self.__scale == 1.0:
+            return area
+        return area / (self.__scale * self.__scale)
+
+
+class _PyramidCache:
+    """
+    Holds the pyramid levels of the images downscaled since the camera's last frame.
+
+    The cache is shared by every thread: the camera module clears it from the run
+    thread while the user program may read it from others, so both go through a lock.
+    """
+
+    # The color and depth frames, with room for a couple of crops
+    __MAX_IMAGES = 4
+
+    def __init__(self) -> None:
+        # For each image, the image itself followed by its levels built so far, the
+        # most recently added image first
+        self.__pyramids: List[List[NDArray]] = []
+        self.__lock = threading.Lock()
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__pyramids = []
+
+    def get(self, image: NDArray[(Any, ...), Any], level: int) -> NDArray:
+        with self.__lock:
+            for pyramid in self.__pyramids:
+                if pyramid[0] is image:
+                    break
+            else:
+                pyramid = [image]
+                self.__pyramids.insert(0, pyramid)
+                del self.__pyramids[self.__MAX_IMAGES :]
+
+            while len(pyramid) <= level:
+                pyramid.append(_halve_image(pyramid[-1]))
+            return pyramid[level]
+
+
+_pyramid_cache = _PyramidCache()
+
+
+def _halve_image(image: NDArray[(Any, ...), Any]) -> NDArray[(Any, ...), Any]:
+    """
+    Returns an image at half resolution, with each pixel the average of a 2x2 block.
+
+    Depth images (which have a single floating point channel) are averaged over their
+    nonzero pixels only, so a block with missing data is not pulled toward 0 cm.
+    """
+    rows, cols = image.shape[0] // 2, image.shape[1] // 2
+    assert rows > 0 and cols > 0, "The image is too small to downscale further."
+
+    # Drop an odd last row or column so that each block covers exactly 2x2 pixels
+    image = image[: 2 * rows, : 2 * cols]
+    if image.ndim == 3 or image.dtype.kind != "f":
+        return cv.resize(image, (cols, rows), interpolation=cv.INTER_AREA)
+
+    total = cv.resize(image, (cols, rows), interpolation=cv.INTER_AREA)
+    valid = cv.resize(
+        (image > 0).astype(np.float32), (cols, rows), interpolation=cv.INTER_AREA
+    )
+    return np.divide(total, valid, out=np.zeros_like(total), where=valid > 0)
+
+
+def _get_pyramid_level_index(scale: float) -> Optional[int]:
+    """
+    Returns the pyramid level of an image downscaled by scale, or None if scale is
+    not 1, 1/2, 1/4, 1/8, and so on.
+    """
+    if scale > 1:
+        return None
+    level = round(-math.log2(scale))
+    return level if scale * (1 << level) == 1.0 else None
+
+
+def get_pyramid_level(
+    image: NDArray[(Any, ...), Any], level: int
+) -> NDArray[(Any, ...), Any]:
+    """
+    Downscales an image by a power of two, reusing the levels already built from the
+    same camera frame.
+
+    Args:
+        image: The color or depth image to downscale.
+        level: The number of times to halve the resolution, so level 0 is image
+            itself, level 1 has half as many rows and columns, and level 2 a quarter.
+
+    Returns:
+        The image at 1 / 2^level of its resolution, where each pixel is the average
+        of the block of pixels it covers.
+
+    Note:
+        Each level is built from the one above it, and the levels of the color and
+        depth images are cached until the camera receives a new frame, so a program
+        which searches several images at the same scale pays for the downscale once.
+        Pixels of a depth image without data (0 cm) are left out of the averages.
+
+    Warning:
+        The returned image is shared with later calls, so it must not be modified.
+
+    Example::
+
+        depth_image = rc.camera.get_depth_image()
+
+        # A 160x120 version of the depth image
+        small_depth_image = rc_utils.get_pyramid_level(depth_image, 2)
+    """
+    assert level >= 0, f"level ({level}) must be nonnegative."
+    return _pyramid_cache.get(image, level)
+
+
+def clear_frame_caches() -> None:
+    """
+    Discards the pyramid levels and hsv conversions cached for the current frame.
+
+    Note:
+        The camera module calls this function whenever it receives a new color or
+        depth image.  Call it after modifying an image in place (for example, by
+        drawing on it) before processing it again.
+    """
+    _pyramid_cache.clear()
+    _hsv_cache.clear()
+
+
+def _scale_image(
+    image: Union[NDArray[(Any, ...), Any], ROI], scale: float
+) -> Union[NDArray[(Any, ...), Any], ROI]:
+    """
+    Returns image if scale is 1, and otherwise an ROI of it resized by scale.
+    """
+    assert scale > 0, f"scale ({scale}) must be positive."
+    if scale == 1.0:
+        return image
+    if isinstance(image, ROI):
+        return ROI(
+            image.get_frame(),
+            image.get_top_left(),
+            image.get_bottom_right(),
+            image.get_scale() * scale,
+        )
+    return ROI(image, scale=scale)
+
+
 def stack_images_horizontal(
     image_0: NDArray[(Any, ...), Any], image_1: NDArray[(Any, ...), Any]
 ) -> NDArray[(Any, ...), Any]:
@@ -334,28 +682,219 @@ class ColorBGR(Enum):
     brown = (0, 63, 127)
 
 
+class _HsvFrame:
+    """
+    The hsv conversion of a single color frame.
+
+    Rows of the frame are converted the first time an image covering them is
+    requested, so crops of the same frame share a single conversion of each row,
+    and rows which are never used are never converted.
+    """
+
+    def __init__(self, frame: NDArray[(Any, Any, 3), np.uint8]) -> None:
+        self.__frame = frame
+        self.__hsv_frame = np.empty(frame.shape, np.uint8)
+        self.__is_row_converted = np.zeros(frame.shape[0], np.bool_)
+
+    def get(
+        self, location: Tuple[int, int], shape: Tuple[int, int]
+    ) -> NDArray[(Any, Any, 3), np.uint8]:
+        """
+        Returns the hsv conversion of the (rows, cols) shaped crop whose top left
+        pixel is at location.
+        """
+        row, col = location
+        rows, cols = shape
+        self.__convert_rows(row, row + rows)
+        return self.__hsv_frame[row : row + rows, col : col + cols]
+
+    def locate(self, color_image: NDArray) -> Optional[Tuple[int, int]]:
+        """
+        Returns the (row, col) of color_image in the frame, or None if it is not a
+        crop of the frame.
+        """
+        frame = self.__frame
+        if color_image is frame:
+            return (0, 0)
+        if (
+            color_image.ndim != 3
+            or color_image.dtype != frame.dtype
+            or color_image.shape[2] != frame.shape[2]
+            or color_image.strides != frame.strides
+            or color_image.size == 0
+        ):
+            return None
+
+        offset = (
+            color_image.__array_interface__["data"][0]
+            - frame.__array_interface__["data"][0]
+        )
+        row_stride, col_stride = frame.strides[:2]
+        row, remainder = divmod(offset, row_stride)
+        col, channel_offset = divmod(remainder, col_stride)
+        if (
+            offset < 0
+            or channel_offset != 0
+            or row + color_image.shape[0] > frame.shape[0]
+            or col + color_image.shape[1] > frame.shape[1]
+        ):
+            return None
+        return (row, col)
+
+    def __convert_rows(self, first_row: int, end_row: int) -> None:
+        """
+        Converts the rows in [first_row, end_row) which were not converted yet.
+        """
+        missing = np.flatnonzero(~self.__is_row_converted[first_row:end_row])
+        if len(missing) == 0:
+            return
+
+        start = first_row + missing[0]
+        end = first_row + missing[-1] + 1
+        cv.cvtColor(
+            self.__frame[start:end], cv.COLOR_BGR2HSV, dst=self.__hsv_frame[start:end]
+        )
+        self.__is_row_converted[start:end] = True
+
+
+class _HsvCache:
+    """
+    Holds the hsv conversions of the color frames used since the camera's last frame.
+
+    Like _PyramidCache, the cache is shared by every thread, so lookups, row
+    conversions, and clearing are serialized by a lock.
+    """
+
+    # A camera frame and a few of its pyramid levels
+    __MAX_FRAMES = 4
+
+    def __init__(self) -> None:
+        # The most recently added frame first
+        self.__frames: List[_HsvFrame] = []
+        self.__lock = threading.Lock()
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__frames = []
+
+    def get(self, color_image: NDArray[(Any, Any, 3), np.uint8]) -> NDArray:
+        """
+        Returns the hsv conversion of color_image, which is a view into a cached
+        frame if color_image is one of the frames or a crop of it.
+        """
+        with self.__lock:
+            return self.__get(color_image)
+
+    def __get(self, color_image: NDArray[(Any, Any, 3), np.uint8]) -> NDArray:
+        for hsv_frame in self.__frames:
+            location = hsv_frame.locate(color_image)
+            if location is not None:
+                return hsv_frame.get(location, color_image.shape[:2])
+
+        # Cache the whole frame when color_image is a crop, so that other crops of
+        # the same frame are served from it as well
+        base = color_image.base
+        is_crop = isinstance(base, np.ndarray) and base.ndim == 3
+        hsv_frame = self.__add(base if is_crop else color_image)
+        location = hsv_frame.locate(color_image)
+        if location is None:
+            # The image is not laid out as a crop (for example, it skips rows)
+            hsv_frame = self.__add(color_image)
+            location = (0, 0)
+        return hsv_frame.get(location, color_image.shape[:2])
+
+    def __add(self, frame: NDArray[(Any, Any, 3), np.uint8]) -> _HsvFrame:
+        hsv_frame = _HsvFrame(frame)
+        self.__frames.insert(0, hsv_frame)
+        del self.__frames[self.__MAX_FRAMES :]
+        return hsv_frame
+
+
+_hsv_cache = _HsvCache()
+
+
+def get_hsv_image(
+    color_image: NDArray[(Any, Any, 3), np.uint8]
+) -> NDArray[(Any, Any, 3), np.uint8]:
+    """
+    Converts a color image to the hue-saturation-value format, reusing the work of
+    earlier calls on the same camera frame.
+
+    Args:
+        color_image: A color image (or a crop of one) in the bgr format.
+
+    Returns:
+        The image in the hsv format, with hues from 0 to 179.
+
+    Note:
+        The conversions of the most recent frame and its pyramid levels are cached
+        until the camera receives a new frame, so find_contours,
+        find_contours_multi, and ARMarker.detect_colors convert each pixel row of a
+        frame at most once, and crops of the frame are returned as views of the
+        cached conversion.
+
+    Warning:
+        The returned image is shared with later calls, so it must not be modified.
+        If color_image itself is modified (for example, by drawing on it) after it
+        was converted, call clear_hsv_cache() before converting it again.
+
+    Example::
+
+        image = rc.camera.get_color_image()
+
+        # Both calls share a single hsv conversion of the bottom half of the image
+        hsv_bottom = rc_utils.get_hsv_image(rc_utils.crop(image, (240, 0), (480, 640)))
+        hsv_bottom_left = rc_utils.get_hsv_image(
+            rc_utils.crop(image, (240, 0), (480, 320))
+        )
+    """
+    return _hsv_cache.get(color_image)
+
+
+def clear_hsv_cache() -> None:
+    """
+    Discards the cached hsv conversions used by get_hsv_image.
+
+    Note:
+        The camera module discards them (along with the cached pyramid levels) with
+        clear_frame_caches whenever it receives a new frame.
+    """
+    _hsv_cache.clear()
+
+
 def find_contours(
-    color_image: NDArray[(Any, Any, 3), np.uint8],
+    color_image: Union[NDArray[(Any, Any, 3), np.uint8], ROI],
     hsv_lower: Tuple[int, int, int],
     hsv_upper: Tuple[int, int, int],
+    scale: float = 1.0,
 ) -> List[NDArray]:
     """
     Finds all contours of the specified color range in the provided image.
 
     Args:
-        color_image: The color image in which to find contours,
+        color_image: The color image (or ROI of one) in which to find contours,
             with pixels represented in the bgr (blue-green-red) format.
         hsv_lower: The lower bound for the hue, saturation, and value of colors
             to contour.
         hsv_upper: The upper bound for the hue, saturation, and value of the colors
             to contour.
+        scale: The resolution at which to search, such as 0.5 or 0.25 to search a
+            cached pyramid level of the image (see get_pyramid_level).
 
     Returns:
-        A list of contours around the specified color ranges found in color_image.
+        A list of contours around the specified color ranges found in color_image,
+        in the coordinates of the full image if color_image is an ROI or scale is
+        not 1.
 
     Note:
         Each channel in hsv_lower and hsv_upper ranges from 0 to 255.
 
+    Warning:
+        The hsv conversion and pyramid levels of color_image are cached by the
+        identity and address of its buffer (see get_hsv_image).  If color_image is
+        modified in place (for example, by drawing on it) or its buffer is reused for
+        another image, call clear_frame_caches() before searching it again.
+
     Example::
 
         # Define the lower and upper hsv ranges for the color blue
@@ -367,6 +906,108 @@ def find_contours(
             rc.camera.get_color_image(), BLUE_HSV_MIN, BLUE_HSV_MAX
         )
     """
+    color_image = _scale_image(color_image, scale)
+    if isinstance(color_image, ROI):
+        return [
+            color_image.to_frame_contour(contour)
+            for contour in find_contours(color_image.get_image(), hsv_lower, hsv_upper)
+        ]
+
+    _check_hsv_range(hsv_lower, hsv_upper)
+
+    # OpenCV cannot process an empty image, such as an ROI outside of the image
+    if color_image.size == 0:
+        return []
+
+    # Convert the image from a blue-green-red pixel representation to a
+    # hue-saturation-value representation (at most once per frame)
+    hsv_image = get_hsv_image(color_image)
+
+    # Create a mask containing the pixels in the image with hsv values between
+    # hsv_lower and hsv_upper.
+    mask = _get_hsv_mask(hsv_image, hsv_lower, hsv_upper)
+
+    # Find and return a list of all contours of this mask
+    return cv.findContours(mask, cv.RETR_LIST, cv.CHAIN_APPROX_SIMPLE)[0]
+
+
+def find_contours_multi(
+    color_image: Union[NDArray[(Any, Any, 3), np.uint8], ROI],
+    ranges: Dict[Any, Sequence[Tuple[Tuple[int, int, int], Tuple[int, int, int]]]],
+    scale: float = 1.0,
+) -> Dict[Any, List[NDArray]]:
+    """
+    Finds all contours of several labeled color ranges in the provided image.
+
+    Args:
+        color_image: The color image (or ROI of one) in which to find contours,
+            with pixels represented in the bgr (blue-green-red) format.
+        ranges: For each label, a list of (hsv_lower, hsv_upper) pairs whose
+            pixels are contoured together.
+        scale: The resolution at which to search, as in find_contours.
+
+    Returns:
+        The list of contours found in color_image for each label of ranges.
+
+    Note:
+        The image is converted to hsv once (see get_hsv_image) and every mask is
+        created from the converted image, which is much faster than calling
+        find_contours once per range.  As with find_contours, a range whose lower
+        hue is greater than its upper hue wraps around from 179 to 0.
+
+    Example::
+
+        # Red needs two ranges, one on each side of hue 0
+        RED = [((0, 50, 50), (10, 255, 255)), ((160, 50, 50), (179, 255, 255))]
+        BLUE = [((90, 50, 50), (120, 255, 255))]
+
+        # Find the red and the blue contours with a single hsv conversion
+        contours = rc_utils.find_contours_multi(
+            rc.camera.get_color_image(), {"red": RED, "blue": BLUE}
+        )
+        largest_red_contour = rc_utils.get_largest_contour(contours["red"])
+    """
+    color_image = _scale_image(color_image, scale)
+    if isinstance(color_image, ROI):
+        return {
+            label: [color_image.to_frame_contour(contour) for contour in contours]
+            for label, contours in find_contours_multi(
+                color_image.get_image(), ranges
+            ).items()
+        }
+
+    for label_ranges in ranges.values():
+        for hsv_lower, hsv_upper in label_ranges:
+            _check_hsv_range(hsv_lower, hsv_upper)
+
+    if color_image.size == 0:
+        return {label: [] for label in ranges}
+
+    hsv_image = get_hsv_image(color_image)
+
+    contours = {}
+    for label, label_ranges in ranges.items():
+        # Merge the masks of all ranges with the same label before contouring, so
+        # a region spanning two ranges becomes one contour
+        mask: Optional[NDArray] = None
+        for hsv_lower, hsv_upper in label_ranges:
+            range_mask = _get_hsv_mask(hsv_image, hsv_lower, hsv_upper)
+            mask = range_mask if mask is None else cv.bitwise_or(mask, range_mask)
+
+        contours[label] = (
+            []
+            if mask is None
+            else list(cv.findContours(mask, cv.RETR_LIST, cv.CHAIN_APPROX_SIMPLE)[0])
+        )
+    return contours
+
+
+def _check_hsv_range(
+    hsv_lower: Tuple[int, int, int], hsv_upper: Tuple[int, int, int]
+) -> None:
+    """
+    Asserts that hsv_lower and hsv_upper are a valid hsv range.
+    """
     assert (
         0 <= hsv_lower[0] <= 179 and 0 <= hsv_upper[0] <= 179
     ), f"The hue of hsv_lower ({hsv_lower}) and hsv_upper ({hsv_upper}) must be in the range 0 to 179 inclusive."
@@ -387,25 +1028,254 @@ def find_contours(
         hsv_lower[2] <= hsv_upper[2]
     ), f"The value channel of hsv_lower ({hsv_lower}) must be less than that of of hsv_upper ({hsv_upper})."
 
-    # Convert the image from a blue-green-red pixel representation to a
-    # hue-saturation-value representation
-    hsv_image = cv.cvtColor(color_image, cv.COLOR_BGR2HSV)
 
-    # Create a mask containing the pixels in the image with hsv values between
-    # hsv_lower and hsv_upper.
-    mask: NDArray
+def _get_hsv_mask(
+    hsv_image: NDArray[(Any, Any, 3), np.uint8],
+    hsv_lower: Tuple[int, int, int],
+    hsv_upper: Tuple[int, int, int],
+) -> NDArray[(Any, Any), np.uint8]:
+    """
+    Returns a mask of the pixels of an hsv image within an hsv range, wrapping the
+    hue around if hsv_lower has a greater hue than hsv_upper.
+    """
     if hsv_lower[0] <= hsv_upper[0]:
-        mask = cv.inRange(hsv_image, hsv_lower, hsv_upper)
+        return cv.inRange(hsv_image, hsv_lower, hsv_upper)
 
     # If the color range passes the 255-0 boundary, we must create two masks
     # and merge them
     else:
         mask1 = cv.inRange(hsv_image, hsv_lower, (255, hsv_upper[1], hsv_upper[2]))
         mask2 = cv.inRange(hsv_image, (0, hsv_lower[1], hsv_lower[2]), hsv_upper)
-        mask = cv.bitwise_or(mask1, mask2)
+        return cv.bitwise_or(mask1, mask2)
 
-    # Find and return a list of all contours of this mask
-    return cv.findContours(mask, cv.RETR_LIST, cv.CHAIN_APPROX_SIMPLE)[0]
+
+class ColorClassifier:
+    """
+    Labels every pixel of a color image with one of several named colors using a
+    precomputed lookup table.
+
+    The bgr color space is quantized into cells (32x32x32 by default), and each cell
+    is labeled once, when the classifier is built, by converting its center to hsv
+    and testing it against the hsv ranges.  Classifying an image is then a single
+    table lookup per pixel, whose cost does not depend on the number of colors, so
+    it is faster than converting to hsv and calling cv.inRange for each color once
+    there are more than a few ranges.
+
+    Note:
+        Pixels are classified by the cell they fall in, so colors within a cell width
+        (8 levels per channel by default) of the edge of a range may be labeled as if
+        they were on the other side of it.
+
+    Example::
+
+        # The same (hsv_lower, hsv_upper, color_name) tuples as ARMarker.detect_colors
+        RED = ((170, 50, 50), (10, 255, 255), "red")
+        BLUE = ((90, 50, 50), (120, 255, 255), "blue")
+
+        # Build the table once, then reuse it across runs of the program
+        classifier = rc_utils.ColorClassifier.load_or_build("colors.npz", [RED, BLUE])
+
+        labels = classifier.classify(rc.camera.get_color_image())
+        blue_mask = classifier.get_mask(labels, "blue")
+    """
+
+    # The label of pixels which match none of the colors
+    NO_COLOR = 0
+
+    def __init__(
+        self,
+        colors: List[Tuple[Tuple[int, int, int], Tuple[int, int, int], str]],
+        bits: int = 5,
+    ) -> None:
+        """
+        Builds the lookup table of a list of colors.
+
+        Args:
+            colors: The colors to detect, each formatted as
+                (hsv_lower, hsv_upper, color_name).  A pixel in the range of several
+                colors is labeled with the one which appears first.
+            bits: The number of bits of each bgr channel used to index the table,
+                which has (2 ** bits) ** 3 cells.
+        """
+        assert 1 <= bits <= 7, f"bits ({bits}) must be between 1 and 7 inclusive."
+        assert len(colors) < 255, "At most 254 colors can be classified."
+
+        self.__colors = [
+            (tuple(hsv_lower), tuple(hsv_upper), name)
+            for hsv_lower, hsv_upper, name in colors
+        ]
+        self.__bits = bits
+
+        # The hsv value of the center of every cell, as an image whose rows are
+        # indexed by the blue cell and whose columns by the green and red cells
+        size = 1 << bits
+        levels = (np.arange(size) << (8 - bits)) + ((1 << (8 - bits)) >> 1)
+        blue, green, red = np.meshgrid(levels, levels, levels, indexing="ij")
+        cells = np.stack((blue, green, red), axis=-1).astype(np.uint8)
+        hsv_cells = cv.cvtColor(cells.reshape(size, size * size, 3), cv.COLOR_BGR2HSV)
+
+        # Label the cells of later colors first, so earlier colors take precedence
+        table = np.full((size, size * size), self.NO_COLOR, np.uint8)
+        for label in reversed(range(len(self.__colors))):
+            hsv_lower, hsv_upper, _ = self.__colors[label]
+            _check_hsv_range(hsv_lower, hsv_upper)
+            table[_get_hsv_mask(hsv_cells, hsv_lower, hsv_upper) > 0] = label + 1
+        self.__set_table(table)
+
+    @classmethod
+    def load(cls, path: str) -> ColorClassifier:
+        """
+        Loads a classifier saved with save() without rebuilding its lookup table.
+
+        Args:
+            path: The .npz file written by save().
+        """
+        with np.load(path, allow_pickle=False) as data:
+            classifier = cls.__new__(cls)
+            classifier.__colors = [
+                (tuple(hsv_lower.tolist()), tuple(hsv_upper.tolist()), str(name))
+                for hsv_lower, hsv_upper, name in zip(
+                    data["hsv_lower"], data["hsv_upper"], data["names"]
+                )
+            ]
+            classifier.__bits = int(data["bits"])
+            classifier.__set_table(data["table"])
+        return classifier
+
+    @classmethod
+    def load_or_build(
+        cls,
+        path: str,
+        colors: List[Tuple[Tuple[int, int, int], Tuple[int, int, int], str]],
+        bits: int = 5,
+    ) -> ColorClassifier:
+        """
+        Loads the classifier saved at path if it was built from the same colors, or
+        otherwise builds it and saves it to path.
+
+        Args:
+            path: The .npz file in which the classifier is stored, to which ".npz"
+                is appended if it does not already end in it (as np.savez does).
+            colors: The colors to detect, as in the constructor.
+            bits: The number of bits of each channel, as in the constructor.
+        """
+        if not path.endswith(".npz"):
+            path += ".npz"
+
+        if os.path.exists(path):
+            classifier = cls.load(path)
+            if classifier.__bits == bits and classifier.get_colors() == [
+                (tuple(hsv_lower), tuple(hsv_upper), name)
+                for hsv_lower, hsv_upper, name in colors
+            ]:
+                return classifier
+
+        classifier = cls(colors, bits)
+        classifier.save(path)
+        return classifier
+
+    def save(self, path: str) -> None:
+        """
+        Saves the colors and the lookup table to a .npz file.
+
+        Args:
+            path: The file to write, which should end in ".npz" (otherwise numpy
+                appends it).
+        """
+        np.savez(
+            path,
+            table=self.__table,
+            bits=self.__bits,
+            hsv_lower=np.array([color[0] for color in self.__colors], np.int32),
+            hsv_upper=np.array([color[1] for color in self.__colors], np.int32),
+            names=np.array([color[2] for color in self.__colors], np.str_),
+        )
+
+    def get_colors(
+        self,
+    ) -> List[Tuple[Tuple[int, int, int], Tuple[int, int, int], str]]:
+        """
+        Returns the (hsv_lower, hsv_upper, color_name) of each color, in label order.
+        """
+        return list(self.__colors)
+
+    def get_label(self, name: str) -> int:
+        """
+        Returns the value with which pixels of the color called name are labeled.
+        """
+        for label, (_, _, color_name) in enumerate(self.__colors):
+            if color_name == name:
+                return label + 1
+        raise ValueError(f"[{name}] is not a color of this classifier.")
+
+    def classify(
+        self, color_image: NDArray[(Any, Any, 3), np.uint8]
+    ) -> NDArray[(Any, Any), np.uint8]:
+        """
+        Labels every pixel of a color image.
+
+        Args:
+            color_image: The bgr image (or crop of an image) to classify.
+
+        Returns:
+            An image of the same size holding the label of each pixel: NO_COLOR, or
+            the value get_label returns for the pixel's color.
+        """
+        # Map each channel to its part of the (column, row) of the pixel's cell in
+        # the table, then look every cell up at once with an integer cv.remap (the
+        # coordinates are allocated per call, so a classifier may be shared by threads)
+        parts = cv.LUT(color_image, self.__channel_table)
+        rows, cols = color_image.shape[:2]
+        coordinates = np.empty((rows, cols, 2), np.int16)
+        np.add(parts[..., 1], parts[..., 2], out=coordinates[..., 0])
+        np.copyto(coordinates[..., 1], parts[..., 0])
+        return cv.remap(self.__table, coordinates, None, cv.INTER_NEAREST)
+
+    def get_mask(
+        self, labels: NDArray[(Any, Any), np.uint8], name: str
+    ) -> NDArray[(Any, Any), np.uint8]:
+        """
+        Returns a mask (255 inside, 0 outside) of the pixels of a label image
+        returned by classify which have the color called name.
+        """
+        return cv.compare(labels, self.get_label(name), cv.CMP_EQ)
+
+    def get_masks(
+        self, color_image: NDArray[(Any, Any, 3), np.uint8]
+    ) -> Dict[str, NDArray[(Any, Any), np.uint8]]:
+        """
+        Classifies a color image and returns the mask of each color by name.
+        """
+        labels = self.classify(color_image)
+        return {name: self.get_mask(labels, name) for _, _, name in self.__colors}
+
+    def find_contours(
+        self, color_image: NDArray[(Any, Any, 3), np.uint8]
+    ) -> Dict[str, List[NDArray]]:
+        """
+        Finds all contours of each color in a color image.
+
+        Returns:
+            The list of contours of each color by name, as find_contours_multi
+            returns for the same ranges.
+        """
+        return {
+            name: list(cv.findContours(mask, cv.RETR_LIST, cv.CHAIN_APPROX_SIMPLE)[0])
+            for name, mask in self.get_masks(color_image).items()
+        }
+
+    def __set_table(self, table: NDArray[(Any, Any), np.uint8]) -> None:
+        """
+        Stores a lookup table and the per-channel tables which index it.
+        """
+        self.__table = np.ascontiguousarray(table, np.uint8)
+
+        # A pixel's cell is at row (blue >> shift) and column
+        # ((green >> shift) << bits) + (red >> shift) of the table
+        cell = (np.arange(256) >> (8 - self.__bits)).astype(np.int16)
+        self.__channel_table = np.dstack((cell, cell << self.__bits, cell)).reshape(
+            1, 256, 3
+        )
 
 
 def get_largest_contour(
@@ -594,6 +1464,461 @@ def get_contour_area(contour: NDArray) -> float:
     return cv.contourArea(contour)
 
 
+class Blobs:
+    """
+    The connected regions (blobs) of a mask, with their areas, bounding boxes, and
+    centers stored as arrays.
+
+    All statistics come from a single labeling pass over the mask, whose cost does
+    not depend on the number of regions.  Finding contours and measuring each of
+    them with cv.contourArea and cv.moments is faster on a clean mask with a few
+    regions, but becomes several times slower once noise leaves hundreds of specks
+    in the mask.  The contour of a blob is only traced if it is requested with
+    get_contour.
+
+    Note:
+        The area of a blob is its number of pixels, which is slightly larger than
+        the area enclosed by its contour (as returned by get_contour_area).
+
+    Example::
+
+        # Find the blue blobs with at least 30 pixels in the current image
+        BLUE_HSV_MIN = (90, 50, 50)
+        BLUE_HSV_MAX = (110, 255, 255)
+        blobs = rc_utils.find_blobs(
+            rc.camera.get_color_image(), BLUE_HSV_MIN, BLUE_HSV_MAX, 30
+        )
+
+        # Find the center and area of the largest blob, if there is one
+        largest = blobs.get_largest()
+        if largest is not None:
+            center = blobs.get_center(largest)
+            area = blobs.get_areas()[largest]
+    """
+
+    def __init__(
+        self,
+        mask: NDArray[(Any, Any), np.uint8],
+        min_area: int = 30,
+        connectivity: int = 8,
+        roi: Optional[ROI] = None,
+    ) -> None:
+        """
+        Finds the blobs of a mask.
+
+        Args:
+            mask: A single channel image in which every nonzero pixel belongs to a
+                blob, such as one returned by cv.inRange.
+            min_area: The smallest blob to keep (in number of pixels).
+            connectivity: 8 if diagonally adjacent pixels belong to the same blob,
+                or 4 if only horizontally and vertically adjacent pixels do.
+            roi: The region of interest from which the mask was made, if any, in
+                which case areas (including min_area), bounding boxes, centers, and
+                contours are in the pixels of the full image.
+        """
+        if mask.size == 0:
+            # An empty mask has only the background, which OpenCV does not label
+            labels = np.zeros(mask.shape, np.int32)
+            stats = np.zeros((1, 5), np.int32)
+            centroids = np.zeros((1, 2))
+        else:
+            # The block-based algorithm was about twice as fast on camera-sized
+            # masks as the default one of OpenCV 4.8
+            _, labels, stats, centroids = cv.connectedComponentsWithStatsWithAlgorithm(
+                mask, connectivity, cv.CV_32S, cv.CCL_GRANA
+            )
+
+        # Component 0 is the background
+        areas = stats[1:, cv.CC_STAT_AREA]
+        if roi is not None:
+            areas = roi.to_frame_area(areas)
+        component_ids = np.flatnonzero(areas >= min_area) + 1
+        top = stats[component_ids, cv.CC_STAT_TOP]
+        left = stats[component_ids, cv.CC_STAT_LEFT]
+        bounding_boxes = np.stack(
+            (
+                top,
+                left,
+                top + stats[component_ids, cv.CC_STAT_HEIGHT],
+                left + stats[component_ids, cv.CC_STAT_WIDTH],
+            ),
+            axis=1,
+        )
+
+        self.__labels: NDArray[(Any, Any), np.int32] = labels
+        self.__component_ids: NDArray[Any, np.int32] = component_ids
+        self.__roi = roi
+        # Bounding boxes in the labels, which differ from the returned bounding
+        # boxes if the blobs are in an ROI
+        self.__label_boxes: NDArray[(Any, 4), np.int32] = bounding_boxes
+        self.__areas: NDArray[Any, Any] = areas[component_ids - 1]
+        self.__bounding_boxes: NDArray[(Any, 4), np.int32] = bounding_boxes
+        self.__centers: NDArray[(Any, 2), np.float64] = centroids[component_ids, ::-1]
+        self.__contours: Dict[int, NDArray] = {}
+
+        if roi is not None:
+            self.__centers = roi.to_frame_points(self.__centers)
+            # Box edges lie between pixels, so they are scaled without the
+            # pixel-center correction of to_frame_points
+            edges = bounding_boxes / roi.get_scale() + np.tile(roi.get_top_left(), 2)
+            self.__bounding_boxes = np.hstack(
+                (np.floor(edges[:, :2]), np.ceil(edges[:, 2:]))
+            ).astype(np.int32)
+
+    def __len__(self) -> int:
+        return len(self.__component_ids)
+
+    def get_areas(self) -> NDArray[Any, Any]:
+        """
+        Returns the number of pixels in each blob.
+        """
+        return self.__areas
+
+    def get_bounding_boxes(self) -> NDArray[(Any, 4), np.int32]:
+        """
+        Returns the (top, left, bottom, right) of the bounding box of each blob, with
+        the bottom row and right column excluded, as expected by crop.
+        """
+        return self.__bounding_boxes
+
+    def get_centers(self) -> NDArray[(Any, 2), np.float64]:
+        """
+        Returns the (row, column) of the center of mass of each blob.
+        """
+        return self.__centers
+
+    def get_center(self, index: int) -> Tuple[int, int]:
+        """
+        Returns the (row, column) of the pixel at the center of a blob.
+        """
+        center_row, center_column = self.__centers[index]
+        return (round(center_row), round(center_column))
+
+    def get_largest(self) -> Optional[int]:
+        """
+        Returns the index of the blob with the most pixels, or None if there are no
+        blobs.
+        """
+        if len(self.__areas) == 0:
+            return None
+        return int(np.argmax(self.__areas))
+
+    def get_contour(self, index: int) -> NDArray:
+        """
+        Returns the outer contour of a blob, in the format of find_contours.
+
+        Note:
+            The contour is traced within the blob's bounding box the first time it is
+            requested, and reused afterwards.
+        """
+        if index not in self.__contours:
+            top, left, bottom, right = self.__label_boxes[index]
+            blob_mask = cv.compare(
+                self.__labels[top:bottom, left:right],
+                int(self.__component_ids[index]),
+                cv.CMP_EQ,
+            )
+            contours = cv.findContours(
+                blob_mask,
+                cv.RETR_EXTERNAL,
+                cv.CHAIN_APPROX_SIMPLE,
+                offset=(int(left), int(top)),
+            )[0]
+            contour = max(contours, key=len)
+            if self.__roi is not None:
+                contour = self.__roi.to_frame_contour(contour)
+            self.__contours[index] = contour
+        return self.__contours[index]
+
+
+def find_blobs(
+    color_image: Union[NDArray[(Any, Any, 3), np.uint8], ROI],
+    hsv_lower: Tuple[int, int, int],
+    hsv_upper: Tuple[int, int, int],
+    min_area: int = 30,
+    scale: float = 1.0,
+) -> Blobs:
+    """
+    Finds the blobs of the specified color range in the provided image.
+
+    Args:
+        color_image: The color image (or ROI of one) in which to find blobs, with
+            pixels represented in the bgr (blue-green-red) format.
+        hsv_lower: The lower bound for the hue, saturation, and value of colors
+            to include.
+        hsv_upper: The upper bound for the hue, saturation, and value of colors
+            to include.
+        min_area: The smallest blob to keep (in number of pixels).
+        scale: The resolution at which to search, as in find_contours.  Areas,
+            including min_area, are still measured in full-resolution pixels.
+
+    Returns:
+        The blobs of the color range, which replace the contours returned by
+        find_contours when only their areas and centers are needed.
+
+    Example::
+
+        # Find the largest orange blob, as get_largest_contour would
+        blobs = rc_utils.find_blobs(image, (10, 50, 50), (20, 255, 255), 30)
+        largest = blobs.get_largest()
+        if largest is not None:
+            rc_utils.draw_contour(image, blobs.get_contour(largest))
+    """
+    _check_hsv_range(hsv_lower, hsv_upper)
+
+    color_image = _scale_image(color_image, scale)
+    roi = color_image if isinstance(color_image, ROI) else None
+    image = color_image if roi is None else roi.get_image()
+    if image.size == 0:
+        return Blobs(np.zeros(image.shape[:2], np.uint8), min_area, roi=roi)
+    mask = _get_hsv_mask(get_hsv_image(image), hsv_lower, hsv_upper)
+    return Blobs(mask, min_area, roi=roi)
+
+
+class ContourTracker:
+    """
+    Follows the largest contour of a color from frame to frame, searching only a
+    window around where it is predicted to be.
+
+    The center of the contour's bounding box is tracked with an alpha-beta filter,
+    which predicts where the contour will be in the next frame from its recent
+    motion.  Each call to update searches a window around the
+    prediction, padded by the contour's speed and a margin, and only searches the
+    whole image if the window does not contain a large enough contour.  Since the
+    window shares the cached hsv conversion of the frame (see get_hsv_image), a hit
+    only converts and contours the rows of the window.
+
+    Note:
+        The largest contour within the window may differ from the largest contour in
+        the whole image if a larger region of the same color appears elsewhere; the
+        tracker keeps following its current target until it is lost.  A contour cut
+        off by the edge of the window, such as a line of tape, widens the next window
+        until it fits.
+
+    Example::
+
+        ORANGE = ((10, 100, 100), (20, 255, 255))
+        cone_tracker = rc_utils.ContourTracker([ORANGE], 30)
+
+        # In update: find the cone, searching near where it was last frame
+        contour = cone_tracker.update(rc.camera.get_color_image())
+        if contour is not None:
+            center = cone_tracker.get_center()
+    """
+
+    def __init__(
+        self,
+        hsv_ranges: Sequence[Tuple[Tuple[int, int, int], Tuple[int, int, int]]],
+        min_area: float = 30,
+        margin: float = 0.5,
+        alpha: float = 0.85,
+        beta: float = 0.3,
+    ) -> None:
+        """
+        Creates a tracker which is not following any contour yet.
+
+        Args:
+            hsv_ranges: The (hsv_lower, hsv_upper) ranges of the color to follow,
+                which are contoured together as in find_contours_multi.
+            min_area: The smallest contour to follow (in number of pixels).
+            margin: The fraction of the contour's size added on each side of the
+                predicted bounding box to form the search window.
+            alpha: How much of the difference between each measured and predicted
+                position is applied to the position, from 0 to 1.
+            beta: How much of that difference is applied to the velocity, from 0 to
+                1.  Larger values react faster to turns but follow noise more.
+        """
+        assert len(hsv_ranges) > 0, "hsv_ranges must contain at least one range."
+        assert margin >= 0, f"margin ({margin}) must be nonnegative."
+        assert 0 < alpha <= 1, f"alpha ({alpha}) must be in the range (0, 1]."
+        assert 0 <= beta <= 1, f"beta ({beta}) must be in the range [0, 1]."
+        for hsv_lower, hsv_upper in hsv_ranges:
+            _check_hsv_range(hsv_lower, hsv_upper)
+
+        self.__ranges = {0: list(hsv_ranges)}
+        self.__min_area = min_area
+        self.__margin = margin
+        self.__alpha = alpha
+        self.__beta = beta
+
+        # Searches which used the window, and how many of them found the contour
+        self.__num_window_searches = 0
+        self.__num_window_hits = 0
+        self.__num_updates = 0
+        self.__total_time = 0.0
+
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Forgets the contour being followed, so the next update searches the whole
+        image.
+        """
+        self.__contour: Optional[NDArray] = None
+        # The filtered (row, col) center of the bounding box, its velocity in
+        # pixels per update, and its (height, width)
+        self.__position: Optional[NDArray[2, np.float64]] = None
+        self.__velocity: NDArray[2, np.float64] = np.zeros(2)
+        self.__size: NDArray[2, np.float64] = np.zeros(2)
+        self.__window: Optional[Tuple[int, int, int, int]] = None
+
+    def update(
+        self, color_image: Union[NDArray[(Any, Any, 3), np.uint8], ROI]
+    ) -> Optional[NDArray]:
+        """
+        Finds the contour in a new frame.
+
+        Args:
+            color_image: The color image (or ROI of one) to search, such as the
+                current image of the camera.
+
+        Returns:
+            The largest contour of the color near its predicted position (or
+            anywhere in color_image if it was not there), in the coordinates of the
+            full image, or None if there is no contour of at least min_area.
+        """
+        start = time.perf_counter()
+
+        if isinstance(color_image, ROI):
+            frame = color_image.get_frame()
+            top, left = color_image.get_top_left()
+            bottom, right = color_image.get_bottom_right()
+            scale = color_image.get_scale()
+        else:
+            frame = color_image
+            (top, left), (bottom, right) = (0, 0), color_image.shape[:2]
+            scale = 1.0
+
+        contour = None
+        self.__window = None
+        if self.__position is not None:
+            # Predict where the contour moved, and pad the window by how far the
+            # prediction could be off
+            predicted = self.__position + self.__velocity
+            half_size = self.__size / 2 * (1 + self.__margin) + np.abs(self.__velocity)
+            window_top, window_left = np.maximum(
+                np.floor(predicted - half_size).astype(int), (top, left)
+            )
+            window_bottom, window_right = np.minimum(
+                np.ceil(predicted + half_size).astype(int) + 1, (bottom, right)
+            )
+
+            if window_top < window_bottom and window_left < window_right:
+                self.__window = (
+                    int(window_top),
+                    int(window_left),
+                    int(window_bottom),
+                    int(window_right),
+                )
+                window = ROI(
+                    frame,
+                    (window_top, window_left),
+                    (window_bottom, window_right),
+                    scale,
+                )
+                contour = self.__search(window)
+            self.__num_window_searches += 1
+            self.__num_window_hits += contour is not None
+
+        if contour is None:
+            contour = self.__search(color_image)
+
+        self.__contour = contour
+        if contour is None:
+            # Lost: search the whole image until the contour reappears
+            self.__position = None
+            self.__velocity = np.zeros(2)
+        else:
+            self.__track(contour)
+
+        self.__num_updates += 1
+        self.__total_time += time.perf_counter() - start
+        return contour
+
+    def get_contour(self) -> Optional[NDArray]:
+        """
+        Returns the contour found by the last update, or None if it found none.
+        """
+        return self.__contour
+
+    def get_center(self) -> Optional[Tuple[int, int]]:
+        """
+        Returns the (row, column) of the center of the contour found by the last
+        update, or None if it found none.
+        """
+        if self.__contour is None:
+            return None
+        return get_contour_center(self.__contour)
+
+    def get_area(self) -> float:
+        """
+        Returns the area of the contour found by the last update, or 0 if it found
+        none.
+        """
+        if self.__contour is None:
+            return 0
+        return get_contour_area(self.__contour)
+
+    def get_velocity(self) -> Tuple[float, float]:
+        """
+        Returns the estimated (row, column) velocity of the contour in pixels per
+        update.
+        """
+        return (float(self.__velocity[0]), float(self.__velocity[1]))
+
+    def get_window(self) -> Optional[Tuple[int, int, int, int]]:
+        """
+        Returns the (top, left, bottom, right) of the window searched by the last
+        update, with the bottom row and right column excluded, or None if it
+        searched the whole image.
+        """
+        return self.__window
+
+    def get_hit_rate(self) -> float:
+        """
+        Returns the fraction of window searches which found the contour without
+        searching the whole image.
+        """
+        if self.__num_window_searches == 0:
+            return 0.0
+        return self.__num_window_hits / self.__num_window_searches
+
+    def get_average_time(self) -> float:
+        """
+        Returns the average number of seconds taken by update, including the whole
+        image searches after a miss.
+        """
+        if self.__num_updates == 0:
+            return 0.0
+        return self.__total_time / self.__num_updates
+
+    def __search(
+        self, color_image: Union[NDArray[(Any, Any, 3), np.uint8], ROI]
+    ) -> Optional[NDArray]:
+        contours = find_contours_multi(color_image, self.__ranges)[0]
+        return get_largest_contour(contours, self.__min_area)
+
+    def __track(self, contour: NDArray) -> None:
+        """
+        Updates the alpha-beta filter with the bounding box of a found contour.
+        """
+        left, top, width, height = cv.boundingRect(contour)
+        size = np.array((height, width), np.float64)
+        measured = np.array((top, left), np.float64) + (size - 1) / 2
+
+        if self.__position is None:
+            self.__position = measured
+            self.__velocity = np.zeros(2)
+            self.__size = size
+            return
+
+        predicted = self.__position + self.__velocity
+        residual = measured - predicted
+        self.__position = predicted + self.__alpha * residual
+        self.__velocity = self.__velocity + self.__beta * residual
+        self.__size = size
+
+
 ########################################################################################
 # Depth Images
 ########################################################################################
@@ -711,17 +2036,24 @@ def get_pixel_average_distance(
 
 
 def get_closest_pixel(
-    depth_image: NDArray[(Any, Any), np.float32], kernel_size: int = 5
-) -> Tuple[int, int]:
+    depth_image: Union[NDArray[(Any, Any), np.float32], ROI],
+    kernel_size: int = 5,
+    scale: float = 1.0,
+) -> Optional[Tuple[int, int]]:
     """
     Finds the closest pixel in a depth image.
 
     Args:
-        depth_image: The depth image to process.
-        kernel_size: The size of the area to average around each pixel.
+        depth_image: The depth image (or ROI of one) to process.
+        kernel_size: The size of the area to average around each pixel, in pixels
+            of the searched resolution.
+        scale: The resolution at which to search, such as 0.5 or 0.25 to search a
+            cached pyramid level of the image (see get_pyramid_level).
 
     Returns:
-        The (row, column) of the pixel which is closest to the car.
+        The (row, column) of the pixel which is closest to the car, in the full image
+        if depth_image is an ROI or scale is not 1, or None if depth_image is empty
+        (such as an ROI outside of the image).
 
     Warning:
         kernel_size be positive and odd.
@@ -749,10 +2081,21 @@ def get_closest_pixel(
         kernel_size > 0 and kernel_size % 2 == 1
     ), f"kernel_size ({kernel_size}) must positive and odd."
 
+    depth_image = _scale_image(depth_image, scale)
+    if isinstance(depth_image, ROI):
+        closest_pixel = get_closest_pixel(depth_image.get_image(), kernel_size)
+        if closest_pixel is None:
+            return None
+        return depth_image.to_frame_point(closest_pixel)
+
+    if depth_image.size == 0:
+        return None
+
     # Shift 0.0 values to 10,000 so they are not considered for the closest pixel
     depth_image = (depth_image - 0.01) % 10000
 
     # Apply a Gaussian blur to to reduce noise
+    blurred_image = depth_image
     if kernel_size > 1:
         blurred_image = cv.GaussianBlur(depth_image, (kernel_size, kernel_size), 0)
 
@@ -764,7 +2107,8 @@ def get_closest_pixel(
 
 
 def colormap_depth_image(
-    depth_image: NDArray[(Any, Any), np.float32], max_depth: int = 1000,
+    depth_image: NDArray[(Any, Any), np.float32],
+    max_depth: int = 1000,
 ) -> NDArray[(Any, Any, 3), np.uint8]:
     """
     Converts a depth image to a colored image representing depth.
@@ -961,6 +2305,26 @@ class Orientation(Enum):
     RIGHT = 3
 
 
+class ARMarkerPose(NamedTuple):
+    """
+    The position and rotation of an AR marker relative to the camera.
+    """
+
+    # The (x, y, z) of the marker's center in the units of the marker size, with x to
+    # the right, y down, and z forward from the camera
+    translation: Tuple[float, float, float]
+    # The rotation of the marker as a Rodrigues vector, as returned by cv.solvePnP
+    rotation: Tuple[float, float, float]
+    # The distance from the camera to the marker's center
+    distance: float
+    # The angle (in degrees) between the camera's forward direction and the marker,
+    # positive if the marker is to the right
+    bearing: float
+    # The angle (in degrees) by which the marker is turned away from facing the
+    # camera, positive if its front faces the right side of the image
+    yaw: float
+
+
 class ARMarker:
     """
     Encapsulates information about an AR marker detected in a color image.
@@ -992,6 +2356,8 @@ class ARMarker:
         self.__corners: NDArray[(4, 2), np.int32] = marker_corners
         self.__color: str = "not detected"
         self.__color_area: int = 0
+        self.__color_confidence: float = 0.0
+        self.__pose: Optional[ARMarkerPose] = None
 
         # Calculate orientation based on coners
         if self.__corners[0][1] > self.__corners[2][1]:
@@ -1018,6 +2384,10 @@ class ARMarker:
             potential_colors: A list of colors which the marker border may be. Each
                 candidate color is formated as (hsv_lower, hsv_upper, color_name).
 
+        Note:
+            To detect the colors of several markers, detect_ar_marker_colors is
+            faster than calling this function for each marker.
+
         Example::
 
             # Define color candidates in the (hsv_lower, hsv_upper, color_name) format
@@ -1033,34 +2403,7 @@ class ARMarker:
                 marker.detect_colors(image, [BLUE, RED])
         """
         assert potential_colors is not None, f"potential_colors cannot be null"
-
-        # Calculate the position and dimensions of the marker in the image
-        marker_top, marker_left = self.__corners[self.__orientation.value]
-        marker_bottom, marker_right = self.__corners[(self.__orientation.value + 2) % 4]
-        half_marker_height: int = (marker_bottom - marker_top) // 2
-        half_marker_width: int = (marker_right - marker_left) // 2
-
-        # Crop to an area twice as large as the marker, centered about the marker
-        crop_top_left = (
-            max(0, marker_top - half_marker_height),
-            max(0, marker_left - half_marker_width),
-        )
-        crop_bottom_right = (
-            min(color_image.shape[0], marker_bottom + half_marker_height) + 1,
-            min(color_image.shape[1], marker_right + half_marker_width) + 1,
-        )
-        cropped_image = crop(color_image, crop_top_left, crop_bottom_right)
-
-        # Attempt to find each color in the cropped area, and choose the color of which
-        # we see the most
-        for (hsv_lower, hsv_upper, color_name) in potential_colors:
-            contours = find_contours(cropped_image, hsv_lower, hsv_upper)
-            largest_contour = get_largest_contour(contours)
-            if largest_contour is not None:
-                contour_area = get_contour_area(largest_contour)
-                if contour_area > self.__color_area:
-                    self.__color_area = contour_area
-                    self.__color = color_name
+        detect_ar_marker_colors(color_image, [self], potential_colors)
 
     def get_id(self) -> int:
         """
@@ -1082,12 +2425,8 @@ class ARMarker:
         """
         Returns the corners of the AR marker formatted as needed by the ArUco library.
         """
-        output = self.__corners.astype(np.float32).reshape(1, 4, 2)
-        for i in range(4):
-            row = output[0][i][0]
-            output[0][i][0] = output[0][i][1]
-            output[0][i][1] = row
-        return output
+        # ArUco stores each corner as (x, y), which is (col, row)
+        return self.__corners[:, ::-1].astype(np.float32).reshape(1, 4, 2)
 
     def get_orientation(self) -> Orientation:
         """
@@ -1101,6 +2440,28 @@ class ARMarker:
         """
         return self.__color
 
+    def get_color_confidence(self) -> float:
+        """
+        Returns the fraction of the border around the marker which matched its color,
+        from 0 (not detected) to 1.
+        """
+        return self.__color_confidence
+
+    def get_pose(self) -> Optional[ARMarkerPose]:
+        """
+        Returns the pose of the marker relative to the camera, or None if it was not
+        estimated (see estimate_ar_marker_poses).
+        """
+        return self.__pose
+
+    def __set_pose(self, pose: ARMarkerPose) -> None:
+        self.__pose = pose
+
+    def __set_color(self, color: str, area: int, confidence: float) -> None:
+        self.__color = color
+        self.__color_area = area
+        self.__color_confidence = confidence
+
     def __str__(self) -> str:
         """
         Returns a printable message summarizing the key information of the marker.
@@ -1112,8 +2473,454 @@ class ARMarker:
         return output + self.__color
 
 
-def get_ar_markers(
+def detect_ar_marker_colors(
     color_image: NDArray[(Any, Any, 3), np.uint8],
+    markers: List[ARMarker],
+    potential_colors: List[Tuple[Tuple[int, int, int], Tuple[int, int, int], str]],
+    inner_scale: float = 1.1,
+    outer_scale: float = 2.0,
+    scale: float = 1.0,
+) -> List[Tuple[str, float]]:
+    """
+    Detects the border color of several AR markers at once.
+
+    The border of each marker is the ring between its corners scaled about its
+    center by inner_scale and by outer_scale.  Each color is masked within the
+    bounding box of each ring, using the cached hsv conversion of the image (see
+    get_hsv_image), and the pixels of the ring within the mask are counted, rather
+    than finding contours of each color around each marker.
+
+    Args:
+        color_image: The image in which the markers were detected.
+        markers: The markers whose colors to detect.
+        potential_colors: A list of colors which the marker borders may be. Each
+            candidate color is formated as (hsv_lower, hsv_upper, color_name).
+        inner_scale: The size of the inside of the border relative to the marker,
+            which is slightly more than 1 to skip the blurred edge of the marker.
+        outer_scale: The size of the outside of the border relative to the marker.
+        scale: The resolution at which to count, such as 0.5 to count the pixels of
+            a cached pyramid level of the image (see get_pyramid_level).
+
+    Returns:
+        The (color_name, confidence) of each marker, where confidence is the
+        fraction of its border of that color, or ("not detected", 0.0) if no pixel
+        of its border matched any color.  Each marker's get_color and
+        get_color_confidence return the same values.
+
+    Example::
+
+        BLUE = ((90, 100, 100), (120, 255, 255), "blue")
+        RED = ((170, 100, 100), (10, 255, 255), "red")
+
+        image = rc.camera.get_color_image()
+        markers = rc_utils.get_ar_markers(image)
+        colors = rc_utils.detect_ar_marker_colors(image, markers, [BLUE, RED])
+    """
+    assert (
+        1 <= inner_scale < outer_scale
+    ), f"inner_scale ({inner_scale}) must be at least 1 and less than outer_scale ({outer_scale})."
+    for hsv_lower, hsv_upper, _ in potential_colors:
+        _check_hsv_range(hsv_lower, hsv_upper)
+
+    colors = [("not detected", 0.0)] * len(markers)
+    if len(markers) == 0 or len(potential_colors) == 0:
+        for marker in markers:
+            marker._ARMarker__set_color("not detected", 0, 0.0)
+        return colors
+
+    # Work in the (row, col) pixels of the image being counted, so that every ring is
+    # a crop of the same image and of its cached hsv conversion
+    image = _scale_image(color_image, scale)
+    if isinstance(image, ROI):
+        image = image.get_image()
+    hsv_image = get_hsv_image(image)
+
+    corners = np.array([marker.get_corners() for marker in markers], np.float64)
+    corners = (corners + 0.5) * scale - 0.5
+    centers = corners.mean(axis=1, keepdims=True)
+    outer_corners = centers + (corners - centers) * outer_scale
+    inner_corners = centers + (corners - centers) * inner_scale
+
+    # fillConvexPoly takes (x, y) points
+    outer_polygons = outer_corners[:, :, ::-1].round().astype(np.int32)
+    inner_polygons = inner_corners[:, :, ::-1].round().astype(np.int32)
+    tops_lefts = np.maximum(outer_polygons.min(axis=1)[:, ::-1], 0)
+    bottoms_rights = np.minimum(
+        outer_polygons.max(axis=1)[:, ::-1] + 1, image.shape[:2]
+    )
+
+    for i, marker in enumerate(markers):
+        (top, left), (bottom, right) = tops_lefts[i], bottoms_rights[i]
+        if top >= bottom or left >= right:
+            marker._ARMarker__set_color("not detected", 0, 0.0)
+            continue
+
+        # Draw the ring, leaving out the inside of every marker in case they overlap
+        ring = np.zeros((bottom - top, right - left), np.uint8)
+        offset = np.array((left, top), np.int32)
+        cv.fillConvexPoly(ring, outer_polygons[i] - offset, 255)
+        for polygon in inner_polygons:
+            cv.fillConvexPoly(ring, polygon - offset, 0)
+        ring_size = cv.countNonZero(ring)
+
+        hsv_box = hsv_image[top:bottom, left:right]
+        color_area = 0
+        for hsv_lower, hsv_upper, color_name in potential_colors:
+            mask = _get_hsv_mask(hsv_box, hsv_lower, hsv_upper)
+            area = cv.countNonZero(cv.bitwise_and(mask, ring))
+            if area > color_area:
+                color_area = area
+                colors[i] = (color_name, area / ring_size)
+
+        color_name, confidence = colors[i]
+        marker._ARMarker__set_color(color_name, color_area, confidence)
+    return colors
+
+
+def estimate_ar_marker_poses(
+    markers: List[ARMarker],
+    marker_size: float,
+    camera_matrix: NDArray[(3, 3), np.float64],
+    distortion: Optional[NDArray[Any, np.float64]] = None,
+) -> List[ARMarkerPose]:
+    """
+    Estimates the position and rotation of AR markers relative to the camera.
+
+    Args:
+        markers: The markers detected in a color image.
+        marker_size: The side length of the black square of each marker, in the
+            units (such as cm) in which to measure the pose.
+        camera_matrix: The camera matrix of the color camera.
+        distortion: The distortion coefficients of the color camera, or None if
+            there is no distortion.
+
+    Returns:
+        The pose of each marker, which its get_pose method also returns.
+
+    Note:
+        The distortion of every corner is removed in a single call, and each marker
+        is then solved with the default (iterative) method of cv.solvePnP.  The
+        SOLVEPNP_IPPE_SQUARE method is several times faster, but often returns a
+        marker facing away from the camera when the marker is level with the
+        camera, which is common on the track.  Since the corners are whole pixels,
+        distance errors grow with the distance of the marker; see
+        ARMarkerPoseFilter to smooth the poses over time.
+
+    Example::
+
+        # Measure the distance and bearing of 10 cm markers
+        camera_matrix, distortion = rc.camera.get_intrinsics()
+        markers = rc_utils.get_ar_markers(rc.camera.get_color_image())
+        for pose in rc_utils.estimate_ar_marker_poses(
+            markers, 10, camera_matrix, distortion
+        ):
+            print(f"{pose.distance:.0f} cm at {pose.bearing:.0f} degrees")
+    """
+    assert marker_size > 0, f"marker_size ({marker_size}) must be positive."
+    if len(markers) == 0:
+        return []
+
+    # Each corner is (row, col), and OpenCV expects (x, y) points
+    corners = np.array([marker.get_corners() for marker in markers], np.float32)
+    image_points = corners[:, :, ::-1]
+    if distortion is not None and np.any(distortion):
+        image_points = cv.undistortPoints(
+            image_points.reshape(-1, 1, 2), camera_matrix, distortion, P=camera_matrix
+        )
+    image_points = np.ascontiguousarray(image_points.reshape(-1, 4, 2), np.float32)
+
+    # The corners of the marker in its own frame, in the order of get_corners
+    half_size = marker_size / 2
+    object_points = np.array(
+        (
+            (-half_size, half_size, 0),
+            (half_size, half_size, 0),
+            (half_size, -half_size, 0),
+            (-half_size, -half_size, 0),
+        ),
+        np.float32,
+    )
+
+    rotations = np.empty((len(markers), 3))
+    translations = np.empty((len(markers), 3))
+    normals = np.empty((len(markers), 3))
+    for i in range(len(markers)):
+        _, rotation, translation = cv.solvePnP(
+            object_points, image_points[i], camera_matrix, None
+        )
+        rotations[i] = rotation.reshape(3)
+        translations[i] = translation.reshape(3)
+        # The marker's z axis points out of its front
+        normals[i] = cv.Rodrigues(rotation)[0][:, 2]
+
+    distances = np.linalg.norm(translations, axis=1)
+    bearings = np.degrees(np.arctan2(translations[:, 0], translations[:, 2]))
+    yaws = np.degrees(np.arctan2(normals[:, 0], -normals[:, 2]))
+
+    poses = []
+    for i, marker in enumerate(markers):
+        pose = ARMarkerPose(
+            tuple(translations[i]),
+            tuple(rotations[i]),
+            float(distances[i]),
+            float(bearings[i]),
+            float(yaws[i]),
+        )
+        marker._ARMarker__set_pose(pose)
+        poses.append(pose)
+    return poses
+
+
+class ARMarkerPoseFilter:
+    """
+    Smooths the poses of AR markers over consecutive frames, separately for each
+    marker ID.
+
+    The translation and yaw of each marker are exponentially smoothed, and its
+    distance and bearing are recomputed from the smoothed translation.  A marker
+    which is briefly not detected keeps its last smoothed pose until it has been
+    missing for max_missed_updates updates.
+
+    Example::
+
+        pose_filter = rc_utils.ARMarkerPoseFilter(0.5)
+
+        # In update: smooth the poses of the markers detected in this frame
+        markers = detector.detect(rc.camera.get_color_image())
+        poses = pose_filter.update(markers)
+        if 3 in poses:
+            distance_to_marker_3 = poses[3].distance
+    """
+
+    def __init__(self, alpha: float = 0.5, max_missed_updates: int = 5) -> None:
+        """
+        Creates a filter which has not seen any markers.
+
+        Args:
+            alpha: How much of each new pose is applied to the smoothed pose, from 0
+                to 1, where 1 disables smoothing.
+            max_missed_updates: The number of updates in a row for which a marker may
+                be missing before its pose is forgotten.
+        """
+        assert 0 < alpha <= 1, f"alpha ({alpha}) must be in the range (0, 1]."
+        assert (
+            max_missed_updates >= 0
+        ), f"max_missed_updates ({max_missed_updates}) must be nonnegative."
+
+        self.__alpha = alpha
+        self.__max_missed_updates = max_missed_updates
+        # The smoothed pose of each marker ID, and the number of updates in a row in
+        # which it was not detected
+        self.__poses: Dict[int, ARMarkerPose] = {}
+        self.__num_missed: Dict[int, int] = {}
+
+    def update(self, markers: List[ARMarker]) -> Dict[int, ARMarkerPose]:
+        """
+        Adds the poses of the markers detected in a new frame.
+
+        Args:
+            markers: The markers detected in the frame, whose poses were estimated.
+
+        Returns:
+            The smoothed pose of each marker ID detected recently.
+        """
+        for marker_id in self.__num_missed:
+            self.__num_missed[marker_id] += 1
+
+        for marker in markers:
+            pose = marker.get_pose()
+            if pose is None:
+                continue
+            marker_id = marker.get_id()
+            previous = self.__poses.get(marker_id)
+            self.__poses[marker_id] = (
+                pose if previous is None else self.__smooth(previous, pose)
+            )
+            self.__num_missed[marker_id] = 0
+
+        for marker_id, num_missed in list(self.__num_missed.items()):
+            if num_missed > self.__max_missed_updates:
+                del self.__num_missed[marker_id]
+                del self.__poses[marker_id]
+
+        return dict(self.__poses)
+
+    def reset(self) -> None:
+        """
+        Forgets the poses of all markers.
+        """
+        self.__poses.clear()
+        self.__num_missed.clear()
+
+    def __smooth(self, previous: ARMarkerPose, pose: ARMarkerPose) -> ARMarkerPose:
+        translation = np.add(
+            previous.translation,
+            self.__alpha * np.subtract(pose.translation, previous.translation),
+        )
+
+        # Turn the short way around, in case the yaw crossed 180 degrees
+        yaw_change = (pose.yaw - previous.yaw + 180) % 360 - 180
+        yaw = (previous.yaw + self.__alpha * yaw_change + 180) % 360 - 180
+
+        return ARMarkerPose(
+            tuple(translation),
+            pose.rotation,
+            float(np.linalg.norm(translation)),
+            float(np.degrees(np.arctan2(translation[0], translation[2]))),
+            yaw,
+        )
+
+
+class ARMarkerDetector:
+    """
+    Finds AR markers with an ArUco dictionary and detector parameters which are
+    created once and reused for every image.
+
+    A detector can also ignore every marker ID except the ones a program expects,
+    which skips detecting colors for unexpected markers, and can search the image at
+    a reduced resolution (using the cached pyramid of the frame, see
+    get_pyramid_level) when the markers are large enough to be found there.  Given the
+    size of the markers and the intrinsics of the camera, it also estimates the pose
+    of every marker it finds (see estimate_ar_marker_poses).
+
+    Example::
+
+        # Create the detector once, outside of update
+        detector = rc_utils.ARMarkerDetector(marker_ids=[0, 1, 199])
+
+        # Or, to also estimate the pose of each 10 cm marker
+        detector = rc_utils.ARMarkerDetector(
+            marker_size=10, intrinsics=rc.camera.get_intrinsics()
+        )
+
+        # In update: find the expected markers in the current color image
+        markers = detector.detect(rc.camera.get_color_image())
+    """
+
+    def __init__(
+        self,
+        dictionary: Optional[int] = None,
+        marker_ids: Optional[Iterable[int]] = None,
+        scale: float = 1.0,
+        parameters: Optional[Dict[str, Any]] = None,
+        marker_size: Optional[float] = None,
+        intrinsics: Optional[Tuple[NDArray[(3, 3), np.float64], NDArray]] = None,
+    ) -> None:
+        """
+        Creates a detector.
+
+        Args:
+            dictionary: The predefined ArUco dictionary of the markers, or None for
+                cv.aruco.DICT_6X6_250, which get_ar_markers uses.
+            marker_ids: The IDs of the markers to report, or None to report all of
+                them.
+            scale: The resolution at which to search, such as 0.5 to search at half
+                resolution.  Corners are still returned in full-resolution pixels,
+                and marker colors are detected at the same resolution.
+            parameters: Values of cv.aruco.DetectorParameters to change from their
+                defaults, by name (for example, {"adaptiveThreshWinSizeStep": 20}).
+            marker_size: The side length of the markers, in the units in which to
+                estimate their poses, or None to not estimate poses.
+            intrinsics: The camera matrix and distortion coefficients of the camera,
+                as returned by rc.camera.get_intrinsics(), which are required to
+                estimate poses.
+        """
+        assert scale > 0, f"scale ({scale}) must be positive."
+        assert (
+            marker_size is None or intrinsics is not None
+        ), "Estimating marker poses requires the camera intrinsics."
+
+        self.__dictionary = cv.aruco.Dictionary_get(
+            cv.aruco.DICT_6X6_250 if dictionary is None else dictionary
+        )
+        self.__parameters = cv.aruco.DetectorParameters_create()
+        if parameters is not None:
+            for name, value in parameters.items():
+                assert hasattr(
+                    self.__parameters, name
+                ), f"{name} is not an ArUco detector parameter."
+                setattr(self.__parameters, name, value)
+
+        self.__marker_ids: Optional[NDArray[Any, np.int32]] = (
+            None if marker_ids is None else np.array(list(marker_ids), np.int32)
+        )
+        self.__scale = scale
+        self.__marker_size = marker_size
+        self.__intrinsics = intrinsics
+
+    def detect(
+        self,
+        image: Union[NDArray[(Any, ...), np.uint8], ROI],
+        potential_colors: List[
+            Tuple[Tuple[int, int, int], Tuple[int, int, int], str]
+        ] = None,
+    ) -> List[ARMarker]:
+        """
+        Finds AR markers in an image.
+
+        Args:
+            image: The color or grayscale image (or ROI of one) in which to search
+                for AR markers.  The corners of markers found in an ROI are in the
+                coordinates of the full image.
+            potential_colors: The potential colors of the AR marker, each represented
+                as (hsv_min, hsv_max, color_name), which require a color image.
+
+        Returns:
+            The markers found in the image whose IDs were requested.
+        """
+        image = _scale_image(image, self.__scale)
+        roi = image if isinstance(image, ROI) else None
+        frame = image if roi is None else roi.get_frame()
+        if (image if roi is None else roi.get_image()).size == 0:
+            return []
+
+        corners, ids, _ = cv.aruco.detectMarkers(
+            frame if roi is None else roi.get_image(),
+            self.__dictionary,
+            parameters=self.__parameters,
+        )
+        if ids is None or len(ids) == 0:
+            return []
+
+        ids = ids.reshape(-1)
+        # Each corner is (x, y), so flip it into (row, col)
+        marker_corners = np.reshape(corners, (-1, 4, 2))[:, :, ::-1]
+        if self.__marker_ids is not None:
+            is_expected = np.isin(ids, self.__marker_ids)
+            ids = ids[is_expected]
+            marker_corners = marker_corners[is_expected]
+
+        # Round the corners to the nearest pixel, whether or not they were found in
+        # an ROI
+        if roi is not None:
+            frame_corners = roi.to_frame_points(marker_corners.reshape(-1, 2))
+            marker_corners = frame_corners.reshape(-1, 4, 2)
+        marker_corners = marker_corners.round().astype(np.int32)
+
+        markers = [
+            ARMarker(int(marker_id), corners)
+            for marker_id, corners in zip(ids, marker_corners)
+        ]
+
+        # Detect potential colors, if provided
+        if potential_colors is not None and len(potential_colors) > 0:
+            assert frame.ndim == 3, "Marker colors require a color image."
+            detect_ar_marker_colors(
+                frame, markers, potential_colors, scale=self.__scale
+            )
+
+        if self.__marker_size is not None:
+            estimate_ar_marker_poses(markers, self.__marker_size, *self.__intrinsics)
+
+        return markers
+
+
+# The detector used by get_ar_markers, created the first time it is needed
+_default_ar_marker_detector: Optional[ARMarkerDetector] = None
+
+
+def get_ar_markers(
+    color_image: Union[NDArray[(Any, Any, 3), np.uint8], ROI],
     potential_colors: List[
         Tuple[Tuple[int, int, int], Tuple[int, int, int], str]
     ] = None,
@@ -1122,13 +2929,20 @@ def get_ar_markers(
     Finds AR markers in a image.
 
     Args:
-        color_image: The color image in which to search for AR markers.
+        color_image: The color image (or ROI of one) in which to search for AR
+            markers.  The corners of markers found in an ROI are in the coordinates
+            of the full image.
         potential_colors: The potential colors of the AR marker, each represented as
             (hsv_min, hsv_max, color_name)
 
     Returns:
         A list of each AR marker's four corners clockwise and an array of the AR marker ids.
 
+    Note:
+        This uses a shared ARMarkerDetector with the default settings.  Create an
+        ARMarkerDetector to only report certain IDs or to search at a lower
+        resolution.
+
     Example::
 
         # Detect the AR markers in the current color image
@@ -1139,31 +2953,10 @@ def get_ar_markers(
         if len(markers) >= 1:
             print(markers[0])
     """
-    # Use ArUco to find the raw corner and id information
-    corners, ids, _ = cv.aruco.detectMarkers(
-        color_image,
-        cv.aruco.Dictionary_get(cv.aruco.DICT_6X6_250),
-        parameters=cv.aruco.DetectorParameters_create(),
-    )
-
-    # Create an ARMarker object for each detected marker
-    markers: List[ARMarker] = []
-    for i in range(len(corners)):
-        # Rearrange each corner point into the (row, col) format
-        corners_formatted = corners[i][0].astype(np.int32)
-        for j in range(corners_formatted.shape[0]):
-            col = corners_formatted[j][0]
-            corners_formatted[j][0] = corners_formatted[j][1]
-            corners_formatted[j][1] = col
-
-        marker = ARMarker(ids[i][0], corners_formatted)
-
-        # Detect potential colors, if provided
-        if potential_colors is not None and len(potential_colors) > 0:
-            marker.detect_colors(color_image, potential_colors)
-
-        markers.append(marker)
-    return markers
+    global _default_ar_marker_detector
+    if _default_ar_marker_detector is None:
+        _default_ar_marker_detector = ARMarkerDetector()
+    return _default_ar_marker_detector.detect(color_image, potential_colors)
 
 
 def draw_ar_markers(
@@ -6,9 +6,12 @@ Spring 2020
 Contains the Camera module of the racecar_core library
 """
 
+from __future__ import annotations
+
 from camera import Camera
 
 # General
+from typing import Optional, Tuple
 import cv2 as cv
 import numpy as np
 from nptyping import NDArray
@@ -21,20 +24,71 @@ from rclpy.qos import (
     QoSReliabilityPolicy,
     QoSProfile,
 )
-from sensor_msgs.msg import Image
+from sensor_msgs.msg import CameraInfo, Image
 from cv_bridge import CvBridge, CvBridgeError
 
+from ros_time import stamp_to_seconds
+from sensor_log import Stream
+from sensor_history import SensorChannel
+import racecar_utils as rc_utils
+
 
 class CameraReal(Camera):
     # The ROS topic from which we read camera data
     __COLOR_TOPIC = "/camera/color"
     __DEPTH_TOPIC = "/camera/depth"
+    __CAMERA_INFO_TOPIC = "/camera/color/camera_info"
 
-    def __init__(self):
-        self.__bridge = CvBridge()
+    # Depth encodings which can be viewed directly as unsigned 16-bit millimetres
+    __DEPTH_ENCODINGS = ("16UC1", "mono16")
+
+    # Factor converting raw depth values (mm) into cm
+    __DEPTH_SCALE = 0.1
+
+    # Number of recent images kept for aligning the camera with other sensors
+    __HISTORY_SIZE = 8
+
+    def __init__(self, color_channel=None, depth_channel=None, is_subscribed=True):
+        """
+        Args:
+            color_channel: Hands color images from the callback to the run thread.
+            depth_channel: Hands raw depth images from the callback to the run thread.
+            is_subscribed: False if another process receives the images and
+                publishes them to the provided channels; the camera info is still
+                received by this node.
+
+        Note:
+            The channels may be SensorChannels or SharedFrameRings; a SensorChannel
+            is created for each channel which is not provided.
+        """
+        # (capture time, image) of the newest images, shared with the run thread
+        self.__color_channel = color_channel or SensorChannel(self.__HISTORY_SIZE)
+        self.__depth_channel = depth_channel or SensorChannel(self.__HISTORY_SIZE)
+
+        self.__color_image = None
+        self.__color_sequence = 0
+        self.__color_timestamp = 0.0
+
+        self.__depth_image_raw = None
+        self.__depth_sequence = 0
+        self.__depth_timestamp = 0.0
+
+        # Reused float32 buffer holding the current depth image in cm, which is only
+        # filled the first time get_depth_image is called in a frame
+        self.__depth_image = None
+        self.__is_depth_image_current = False
+
+        # The (camera matrix, distortion coefficients) reported by the camera
+        self.__camera_intrinsics = None
+
+        # SensorLogWriter to which received images are recorded, if any, and whether
+        # the camera info has been recorded to it yet
+        self.__logger = None
+        self.__is_camera_info_recorded = False
 
         # ROS node
-        self.node = ros2.create_node("image_sub")
+        node_name = "image_sub" if is_subscribed else "camera_info_sub"
+        self.node = ros2.create_node(node_name)
 
         qos_profile = QoSProfile(depth=1)
         qos_profile.history = QoSHistoryPolicy.RMW_QOS_POLICY_HISTORY_KEEP_LAST
@@ -43,21 +97,31 @@ class CameraReal(Camera):
         )
         qos_profile.durability = QoSDurabilityPolicy.RMW_QOS_POLICY_DURABILITY_VOLATILE
 
+        # subscribe to the camera info topic, which holds the intrinsics of the
+        # color camera
+        self.__camera_info_sub = self.node.create_subscription(
+            CameraInfo,
+            self.__CAMERA_INFO_TOPIC,
+            self.__camera_info_callback,
+            qos_profile,
+        )
+
+        if not is_subscribed:
+            return
+
+        self.__bridge = CvBridge()
+
         # subscribe to the color image topic, which will call
         # __color_callback every time the camera publishes data
         self.__color_image_sub = self.node.create_subscription(
             Image, self.__COLOR_TOPIC, self.__color_callback, qos_profile
         )
-        self.__color_image = None
-        self.__color_image_new = None
 
         # subscribe to the depth image topic, which will call
         # __depth_callback every time the camera publishes data
         self.__depth_image_sub = self.node.create_subscription(
             Image, self.__DEPTH_TOPIC, self.__depth_callback, qos_profile
         )
-        self.__depth_image = None
-        self.__depth_image_new = None
 
     def __color_callback(self, data):
         try:
@@ -66,28 +130,195 @@ class CameraReal(Camera):
         except CvBridgeError as e:
             print(e)
 
-        self.__color_image_new = cv_color_image
+        # Skip images which could not be decoded, such as truncated JPEGs
+        if cv_color_image is None:
+            return
+
+        stamp = stamp_to_seconds(data.header.stamp)
+        self.__color_channel.publish(stamp, cv_color_image)
+        logger = self.__logger
+        if logger is not None:
+            logger.record(Stream.color_image, stamp, np_arr)
+            self.__record_camera_info(logger, stamp)
+
+    def __camera_info_callback(self, data):
+        # The intrinsics do not change, so only the first calibrated message is used
+        if self.__camera_intrinsics is not None or data.k[0] <= 0:
+            return
+
+        camera_matrix = np.array(data.k, np.float64).reshape(3, 3)
+        distortion = np.array(data.d, np.float64) if len(data.d) > 0 else np.zeros(5)
+        self.__camera_intrinsics = (camera_matrix, distortion)
+
+    def _get_camera_intrinsics(
+        self,
+    ) -> Optional[Tuple[NDArray[(3, 3), np.float64], NDArray]]:
+        return self.__camera_intrinsics
+
+    def __record_camera_info(self, logger, stamp: float) -> None:
+        """
+        Records the camera info once per recording, with the first color image
+        received after it is known.
+        """
+        if self.__is_camera_info_recorded or self.__camera_intrinsics is None:
+            return
+        camera_matrix, distortion = self.__camera_intrinsics
+        logger.record(
+            Stream.camera_info,
+            stamp,
+            np.concatenate((camera_matrix.reshape(-1), distortion)),
+        )
+        self.__is_camera_info_recorded = True
 
     def __depth_callback(self, data):
-        try:
-            cv_depth_image = self.__bridge.imgmsg_to_cv2(data, desired_encoding="16UC1")
-        except CvBridgeError as e:
-            print(e)
+        if data.encoding in self.__DEPTH_ENCODINGS:
+            raw_depth_image = self.__view_depth_message(data)
+        else:
+            try:
+                raw_depth_image = self.__bridge.imgmsg_to_cv2(
+                    data, desired_encoding="16UC1"
+                )
+            except CvBridgeError as e:
+                print(e)
+                return
+
+        stamp = stamp_to_seconds(data.header.stamp)
+        self.__depth_channel.publish(stamp, raw_depth_image)
+        if self.__logger is not None:
+            self.__logger.record(Stream.depth_image, stamp, raw_depth_image)
+
+    def __set_logger(self, logger) -> None:
+        """
+        Starts recording received JPEG and raw depth images (and the camera info) to
+        logger, or stops if logger is None.
+        """
+        self.__is_camera_info_recorded = False
+        self.__logger = logger
 
-        self.__depth_image_new = cv_depth_image
+    @staticmethod
+    def __view_depth_message(data) -> NDArray[(480, 640), np.uint16]:
+        """
+        Returns a zero-copy view of the pixels of a 16-bit depth image message.
+
+        Args:
+            data: (ROS Image message) A depth image with one 16-bit channel.
+        """
+        dtype = np.dtype(">u2" if data.is_bigendian else "<u2")
+        buffer = np.frombuffer(data.data, np.uint8)
+
+        # Each row occupies step bytes, which may include padding past the last pixel
+        return np.ndarray(
+            (data.height, data.width), dtype, buffer, strides=(data.step, 2)
+        )
+
+    def __convert_depth_image(
+        self,
+        raw_depth_image: NDArray[(480, 640), np.uint16],
+        out: NDArray[(480, 640), np.float32] = None,
+    ) -> NDArray[(480, 640), np.float32]:
+        """
+        Converts a raw depth image in mm into a float32 depth image in cm.
+
+        Args:
+            raw_depth_image: The depth image received from the camera.
+            out: A buffer of the same shape in which to store the result.
+        """
+        if out is None or out.shape != raw_depth_image.shape:
+            out = np.empty(raw_depth_image.shape, np.float32)
+        np.multiply(raw_depth_image, self.__DEPTH_SCALE, out=out, casting="unsafe")
+        return out
 
     def __update(self):
-        self.__depth_image = self.__depth_image_new
-        self.__color_image = self.__color_image_new
+        # Only read images which have not been read yet, since reading from a
+        # SharedFrameRing copies the image
+        if self.__depth_channel.get_sequence() != self.__depth_sequence:
+            sequence, timestamp, raw_depth_image = self.__depth_channel.read()
+            self.__depth_sequence = sequence
+            self.__depth_timestamp = timestamp
+            self.__depth_image_raw = raw_depth_image
+            self.__is_depth_image_current = False
+            rc_utils.clear_frame_caches()
+
+        if self.__color_channel.get_sequence() != self.__color_sequence:
+            color_sequence, color_timestamp, color_image = self.__color_channel.read()
+            self.__color_sequence = color_sequence
+            self.__color_timestamp = color_timestamp
+            self.__color_image = color_image
+            rc_utils.clear_frame_caches()
+
+    def __get_nearest_color_image(
+        self, timestamp: float
+    ) -> Tuple[float, NDArray[(480, 640, 3), np.uint8]]:
+        """
+        Returns the (capture time, image) of the recent color image closest to
+        timestamp.
+        """
+        return self.__color_channel.get_nearest(timestamp)
+
+    def __get_nearest_depth_image(
+        self, timestamp: float
+    ) -> Tuple[float, NDArray[(480, 640), np.float32]]:
+        """
+        Returns the (capture time, image in cm) of the recent depth image closest to
+        timestamp.
+        """
+        stamp, raw_depth_image = self.__depth_channel.get_nearest(timestamp)
+        if raw_depth_image is None:
+            return stamp, None
+        return stamp, self.__convert_depth_image(raw_depth_image)
 
     def get_color_image_no_copy(self) -> NDArray[(480, 640, 3), np.uint8]:
         return self.__color_image
 
     def get_depth_image(self) -> NDArray[(480, 640), np.float32]:
+        if not self.__is_depth_image_current and self.__depth_image_raw is not None:
+            self.__depth_image = self.__convert_depth_image(
+                self.__depth_image_raw, self.__depth_image
+            )
+            self.__is_depth_image_current = True
         return self.__depth_image
 
+    def get_depth_image_raw(self) -> NDArray[(480, 640), np.uint16]:
+        """
+        Returns the current depth image exactly as received from the camera.
+
+        Returns:
+            A two dimensional array indexed from top left to the bottom right storing
+            the distance of each pixel from the car in mm as unsigned 16-bit integers.
+
+        Warning:
+            Do not modify the returned image. It is a view of the received message,
+            and may use the byte order of the camera rather than the native one.
+
+        Note:
+            Unlike get_depth_image(), this function does not convert the image to
+            float32 cm, so it is cheaper for code that can work on integers.
+
+        Example::
+
+            # Find all pixels closer than 50 cm without converting the image
+            depth_image_mm = rc.camera.get_depth_image_raw()
+            close_mask = (depth_image_mm > 0) & (depth_image_mm < 500)
+        """
+        return self.__depth_image_raw
+
+    def get_color_image_sequence(self) -> int:
+        return self.__color_sequence
+
+    def get_color_image_timestamp(self) -> float:
+        return self.__color_timestamp
+
+    def get_depth_image_sequence(self) -> int:
+        return self.__depth_sequence
+
+    def get_depth_image_timestamp(self) -> float:
+        return self.__depth_timestamp
+
     def get_color_image_async(self) -> NDArray[(480, 640, 3), np.uint8]:
-        return self.__color_image_new
+        return self.__color_channel.read()[2]
 
     def get_depth_image_async(self) -> NDArray[(480, 640), np.float32]:
-        return self.__depth_image_new
+        raw_depth_image = self.__depth_channel.read()[2]
+        if raw_depth_image is None:
+            return None
+        return self.__convert_depth_image(raw_depth_image)
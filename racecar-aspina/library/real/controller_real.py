@@ -9,13 +9,16 @@ Contains the Controller module of the racecar_core library
 from controller import Controller
 
 # General
-import copy
-from typing import Tuple
+import time
+from typing import List, Tuple
 
 # ROS2
 import rclpy as ros2
 from sensor_msgs.msg import Joy
 
+from double_buffer import DoubleBuffer
+from sensor_log import Stream
+
 
 class ControllerReal(Controller):
     # The ROS topic from which we read joystick information
@@ -61,18 +64,19 @@ class ControllerReal(Controller):
         # print(f"Length of __was_down: {len(self.__was_down)}")
         # Button state at the start of this frame
         self.__is_down = [False] * len(self.Button)
-        # Button state received since the start of this frame
-        self.__cur_down = [False] * len(self.Button)
 
         # Trigger state at the start of this frame
         self.__last_trigger = [0, 0]
-        # Trigger state received since the start of this frame
-        self.__cur_trigger = [0, 0]
 
         # Joystick state at the start of this frame
-        self.__last_joystick = [[0, 0], [0, 0]]
-        # Joystick state received since the start of this frame
-        self.__cur_joystick = [[0, 0], [0, 0]]
+        self.__last_joystick = [(0, 0), (0, 0)]
+
+        # (button, trigger, joystick) state received since the start of this frame,
+        # handed over from the callback through a double buffer
+        self.__cur_state = DoubleBuffer(self.__create_state(), self.__create_state())
+
+        # SensorLogWriter to which controller states are recorded, if any
+        self.__logger = None
 
         # Current start and back button state
         self.__cur_start = 0
@@ -110,20 +114,31 @@ class ControllerReal(Controller):
             message: (ROS controller message object) An object encoding the
                 physical state of the controller.
         """
+        cur_down, cur_trigger, cur_joystick = self.__cur_state.get_back()
+
         for i in range(0, len(self.__BUTTON_MAP)):
-            self.__cur_down[i] = bool(message.buttons[self.__BUTTON_MAP[i]])
+            cur_down[i] = bool(message.buttons[self.__BUTTON_MAP[i]])
 
         for i in range(0, len(self.__TRIGGER_MAP)):
-            self.__cur_trigger[i] = self.__convert_trigger_value(
+            cur_trigger[i] = self.__convert_trigger_value(
                 message.axes[self.__TRIGGER_MAP[i]]
             )
 
         for i in range(0, len(self.__JOYSTICK_MAP)):
-            self.__cur_joystick[i] = self.__convert_joystick_values(
+            cur_joystick[i] = self.__convert_joystick_values(
                 message.axes[self.__JOYSTICK_MAP[i][0]],
                 message.axes[self.__JOYSTICK_MAP[i][1]],
             )
 
+        self.__cur_state.publish_back()
+
+        if self.__logger is not None:
+            self.__logger.record(
+                Stream.controller,
+                time.time(),
+                cur_down + cur_trigger + [value for xy in cur_joystick for value in xy],
+            )
+
         start = message.buttons[self.__START_MAP]
         if start != self.__cur_start:
             self.__cur_start = start
@@ -142,14 +157,37 @@ class ControllerReal(Controller):
                 else:
                     self.__racecar._RacecarReal__handle_back()
 
+    def __set_logger(self, logger) -> None:
+        """
+        Starts recording controller states to logger, or stops if logger is None.
+        """
+        self.__logger = logger
+
     def __update(self):
         """
         Updates the input registers when the current frame ends.
         """
-        self.__was_down = copy.deepcopy(self.__is_down)
-        self.__is_down = copy.deepcopy(self.__cur_down)
-        self.__last_trigger = copy.deepcopy(self.__cur_trigger)
-        self.__last_joystick = copy.deepcopy(self.__cur_joystick)
+        # Reuse last frame's button list rather than allocating a new one
+        self.__was_down, self.__is_down = self.__is_down, self.__was_down
+        self.__cur_state.read_into(self.__copy_state)
+
+    def __copy_state(self, state: Tuple[List[bool], List[float], List[Tuple]]):
+        """
+        Copies the state received from the controller into this frame's registers.
+
+        Args:
+            state: The (button, trigger, joystick) state published by the callback.
+        """
+        cur_down, cur_trigger, cur_joystick = state
+        self.__is_down[:] = cur_down
+        self.__last_trigger[:] = cur_trigger
+        self.__last_joystick[:] = cur_joystick
+
+    def __create_state(self) -> Tuple[List[bool], List[float], List[Tuple]]:
+        """
+        Creates an empty (button, trigger, joystick) state register.
+        """
+        return ([False] * len(self.Button), [0, 0], [(0, 0), (0, 0)])
 
     def __convert_trigger_value(self, value: float) -> float:
         """
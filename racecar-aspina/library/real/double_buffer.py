@@ -0,0 +1,113 @@
+"""
+Copyright Harvey Mudd College
+MIT License
+Spring 2020
+
+Contains the DoubleBuffer used to hand data from ROS callbacks to the run thread
+"""
+
+# General
+from typing import Callable, Generic, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class DoubleBuffer(Generic[T]):
+    """
+    Shares the latest value produced by a single writer thread with a reader thread.
+
+    The writer fills the back slot and publishes it by swapping the slot index, so
+    the front slot seen by the reader is never partially written.  Every publish
+    increments a sequence number, which the reader uses to detect that the writer
+    lapped it while it was copying the front slot.
+
+    Note:
+        Values published by reference (such as freshly allocated images) may be
+        held by the reader indefinitely.  Values written in place into get_back()
+        are reused two publishes later, so the reader must copy them out with
+        read_into().
+    """
+
+    def __init__(self, front: T, back: Optional[T] = None) -> None:
+        """
+        Creates a double buffer.
+
+        Args:
+            front: The value returned to the reader before anything is published.
+            back: The slot filled in place by the writer, if the writer uses
+                get_back() and publish_back() instead of publishing new values.
+        """
+        self.__slots = [front, back]
+        self.__index: int = 0
+        self.__sequence: int = 0
+
+    def get_back(self) -> T:
+        """
+        Returns the slot which the writer may fill before calling publish_back().
+
+        Warning:
+            Only the writer thread may call this function.
+        """
+        return self.__slots[1 - self.__index]
+
+    def publish(self, value: T) -> None:
+        """
+        Stores a value in the back slot and makes it visible to the reader.
+
+        Args:
+            value: The new value, which the writer must not modify afterwards.
+
+        Warning:
+            Only the writer thread may call this function.
+        """
+        self.__slots[1 - self.__index] = value
+        self.publish_back()
+
+    def publish_back(self) -> None:
+        """
+        Makes the back slot, after it was filled in place, visible to the reader.
+
+        Warning:
+            Only the writer thread may call this function.
+        """
+        # The index swap is a single reference assignment, so the reader sees either
+        # the old or the new slot but never a mix of the two
+        self.__index = 1 - self.__index
+        self.__sequence += 1
+
+    def get_sequence(self) -> int:
+        """
+        Returns the number of values published so far.
+        """
+        return self.__sequence
+
+    def read(self) -> Tuple[int, T]:
+        """
+        Returns the sequence number and a reference to the latest published value.
+        """
+        while True:
+            sequence = self.__sequence
+            value = self.__slots[self.__index]
+            if sequence == self.__sequence:
+                return sequence, value
+
+    def read_into(self, copy: Callable[[T], None]) -> int:
+        """
+        Copies the latest published value out of the buffer.
+
+        Args:
+            copy: Called with the front slot; must copy everything the reader needs
+                into storage owned by the reader.
+
+        Returns:
+            The sequence number of the copied value.
+
+        Note:
+            If a publish happens while copy is running, the slot may have been reused
+            by the writer, so the copy is repeated with the newer value.
+        """
+        while True:
+            sequence = self.__sequence
+            copy(self.__slots[self.__index])
+            if sequence == self.__sequence:
+                return sequence
@@ -10,14 +10,32 @@ from drive import Drive
 
 import rclpy as ros2
 import numbers
+import time
+from typing import NamedTuple
 from ackermann_msgs.msg import AckermannDriveStamped
 
+from sensor_log import Stream
+
 import sys
 
 sys.path.insert(0, "..")
 import racecar_utils as rc_utils
 
 
+class PublishStats(NamedTuple):
+    """
+    Statistics about the drive messages published since the last reset.
+    """
+
+    # Number of frames in which the drive command changed
+    num_commands: int
+    # Number of messages published, including keep-alive messages
+    num_published: int
+    # Average and largest seconds between a command being set and published
+    mean_latency: float
+    max_latency: float
+
+
 class DriveReal(Drive):
     # The ROS topic to which we publish drive messages
     __TOPIC = "/drive"
@@ -28,17 +46,32 @@ class DriveReal(Drive):
     __PWM_SPEED_MIN = 3000
     __PWM_SPEED_MAX = 9000
 
+    # Default number of messages per second published while the command is unchanged
+    __DEFAULT_KEEP_ALIVE_RATE = 10
+
     def __init__(self):
         # ROS node
         self.__node = ros2.create_node("drive_pub")
         # publish to the drive topic, which will publish a message
-        # every time __update is called
+        # when __update is called and the command changed or is due to be repeated
         self.__publisher = self.__node.create_publisher(
             AckermannDriveStamped, self.__TOPIC, qos_profile=1
         )
         self.__message = AckermannDriveStamped()
         self.__max_speed = 0.25
 
+        # Publisher policy
+        self.__keep_alive_period = 1 / self.__DEFAULT_KEEP_ALIVE_RATE
+        self.__is_changed = False
+        self.__command_time = time.perf_counter()
+        self.__last_publish_time = float("-inf")
+
+        # Latency statistics
+        self.reset_publish_stats()
+
+        # SensorLogWriter to which published commands are recorded, if any
+        self.__logger = None
+
     def set_speed_angle(self, speed: float, angle: float) -> None:
         assert (
             -1.0 <= speed <= 1.0
@@ -47,10 +80,21 @@ class DriveReal(Drive):
             -1.0 <= angle <= 1.0
         ), f"angle [{angle}] must be between -1.0 and 1.0 inclusive."
 
-        self.__message.drive.speed = speed * self.__max_speed
+        speed = speed * self.__max_speed
+        angle = float(-angle)
+
+        if (
+            speed != self.__message.drive.speed
+            or angle != self.__message.drive.steering_angle
+        ):
+            self.__message.drive.speed = speed
+            self.__message.drive.steering_angle = angle
+            self.__message.header.stamp = self.__node.get_clock().now().to_msg()
 
-        angle = -angle
-        self.__message.drive.steering_angle = float(angle)
+            # Only the first change in a frame counts towards the latency
+            if not self.__is_changed:
+                self.__is_changed = True
+                self.__command_time = time.perf_counter()
 
     def set_max_speed(self, max_speed: float = 0.25) -> None:
         assert (
@@ -59,8 +103,83 @@ class DriveReal(Drive):
 
         self.__max_speed_scale_factor = max_speed
 
+    def set_keep_alive_rate(self, rate: float = __DEFAULT_KEEP_ALIVE_RATE) -> None:
+        """
+        Sets how often the drive message is repeated while the command is unchanged.
+
+        Args:
+            rate: The minimum number of messages published per second.
+
+        Note:
+            A changed command is always published at the end of the frame in which
+            it was set.  Repeating unchanged commands acts as a heartbeat, so the
+            motor controller can detect that the program stopped responding.
+
+        Example::
+
+            # Repeat the current command at least 20 times per second
+            rc.drive.set_keep_alive_rate(20)
+        """
+        assert rate > 0, f"rate [{rate}] must be positive."
+
+        self.__keep_alive_period = 1 / rate
+
+    def get_publish_stats(self) -> PublishStats:
+        """
+        Returns statistics about the drive messages published since the last reset.
+
+        Example::
+
+            # Print the average delay between setting and publishing a command
+            stats = rc.drive.get_publish_stats()
+            print(f"Mean command latency: {stats.mean_latency * 1000:.2f} ms")
+        """
+        mean_latency = (
+            self.__total_latency / self.__num_commands if self.__num_commands else 0.0
+        )
+        return PublishStats(
+            self.__num_commands, self.__num_published, mean_latency, self.__max_latency
+        )
+
+    def reset_publish_stats(self) -> None:
+        """
+        Resets the statistics returned by get_publish_stats.
+        """
+        self.__num_commands = 0
+        self.__num_published = 0
+        self.__total_latency = 0.0
+        self.__max_latency = 0.0
+
+    def __set_logger(self, logger) -> None:
+        """
+        Starts recording published drive commands to logger, or stops if logger is
+        None.
+        """
+        self.__logger = logger
+
     def __update(self):
         """
-        Publishes the current drive message.
+        Publishes the current drive message if it changed or is due to be repeated.
         """
+        now = time.perf_counter()
+        is_keep_alive_due = now - self.__last_publish_time >= self.__keep_alive_period
+        if not self.__is_changed and not is_keep_alive_due:
+            return
+
         self.__publisher.publish(self.__message)
+        self.__last_publish_time = now
+        self.__num_published += 1
+
+        if self.__logger is not None:
+            self.__logger.record(
+                Stream.drive,
+                time.time(),
+                (self.__message.drive.speed, self.__message.drive.steering_angle),
+            )
+
+        if self.__is_changed:
+            latency = now - self.__command_time
+            self.__num_commands += 1
+            self.__total_latency += latency
+            self.__max_latency = max(self.__max_latency, latency)
+            self.__is_changed = False
@@ -0,0 +1,227 @@
+"""
+Copyright Harvey Mudd College
+MIT License
+Spring 2020
+
+Contains the fixed-capacity sample buffer used by the Physics module
+"""
+
+from __future__ import annotations
+
+# General
+from typing import Any, Optional, Tuple
+
+import numpy as np
+from nptyping import NDArray
+
+from double_buffer import DoubleBuffer
+
+
+class ImuBuffer:
+    """
+    A fixed-capacity ring buffer of timestamped (x, y, z) IMU samples.
+
+    Samples are pushed from a ROS callback at the IMU rate and latched once per frame
+    with end_frame() on the run thread.  The writer keeps running totals of each axis
+    and of its time integral, which it hands to the reader through a DoubleBuffer, so
+    the per-frame mean is computed in O(1) and neither side allocates or locks.
+    """
+
+    # Layout of the running totals shared with the reader
+    __COUNT = 0
+    __SUM = slice(1, 4)
+    __INTEGRAL = slice(4, 7)
+    __TIMESTAMP = 7
+
+    def __init__(self, capacity: int) -> None:
+        assert capacity > 0, f"capacity ({capacity}) must be a positive integer."
+
+        self.__capacity: int = capacity
+        self.__samples = np.zeros((capacity, 3), np.float64)
+        self.__timestamps = np.zeros(capacity, np.float64)
+
+        # Running totals owned by the writer:
+        # (count, sum x3, integral x3, timestamp of the newest sample)
+        self.__totals = np.zeros(8, np.float64)
+        self.__shared_totals = DoubleBuffer(
+            np.zeros(8, np.float64), np.zeros(8, np.float64)
+        )
+
+        # Totals latched by the reader at the end of the current and previous frame
+        self.__latched = np.zeros(8, np.float64)
+        self.__previous = np.zeros(8, np.float64)
+
+        # Values derived from the latched totals
+        self.__mean = np.zeros(3, np.float64)
+        self.__integral = np.zeros(3, np.float64)
+        self.__integral_offset = np.zeros(3, np.float64)
+
+    def push(self, timestamp: float, x: float, y: float, z: float) -> None:
+        """
+        Adds a sample to the buffer, overwriting the oldest sample if it is full.
+
+        Args:
+            timestamp: The time at which the sample was measured in seconds.
+            x: The value of the sample along the x axis.
+            y: The value of the sample along the y axis.
+            z: The value of the sample along the z axis.
+
+        Warning:
+            Only the thread receiving IMU messages may call this function.
+        """
+        totals = self.__totals
+        count = int(totals[self.__COUNT])
+        index = count % self.__capacity
+
+        # Integrate with the trapezoidal rule between the previous and new sample
+        if count > 0:
+            previous = (count - 1) % self.__capacity
+            dt = timestamp - self.__timestamps[previous]
+            if dt > 0:
+                totals[4] += 0.5 * dt * (self.__samples[previous, 0] + x)
+                totals[5] += 0.5 * dt * (self.__samples[previous, 1] + y)
+                totals[6] += 0.5 * dt * (self.__samples[previous, 2] + z)
+
+        self.__timestamps[index] = timestamp
+        self.__samples[index, 0] = x
+        self.__samples[index, 1] = y
+        self.__samples[index, 2] = z
+
+        totals[self.__COUNT] = count + 1
+        totals[1] += x
+        totals[2] += y
+        totals[3] += z
+        totals[self.__TIMESTAMP] = timestamp
+
+        np.copyto(self.__shared_totals.get_back(), totals)
+        self.__shared_totals.publish_back()
+
+    def end_frame(self) -> None:
+        """
+        Latches the mean, integral, and sample range of the frame which just ended.
+
+        Note:
+            If no samples arrived during the frame, the previous mean is kept.
+
+        Warning:
+            Only the run thread may call this function.
+        """
+        self.__previous, self.__latched = self.__latched, self.__previous
+        self.__shared_totals.read_into(self.__copy_totals)
+
+        num_samples = self.__latched[self.__COUNT] - self.__previous[self.__COUNT]
+        if num_samples > 0:
+            np.subtract(
+                self.__latched[self.__SUM], self.__previous[self.__SUM], out=self.__mean
+            )
+            self.__mean /= num_samples
+
+        np.subtract(
+            self.__latched[self.__INTEGRAL],
+            self.__integral_offset,
+            out=self.__integral,
+        )
+
+    def __copy_totals(self, totals: NDArray[8, np.float64]) -> None:
+        np.copyto(self.__latched, totals)
+
+    def reset_integral(self) -> None:
+        """
+        Restarts the time integral of every axis from zero.
+        """
+        self.__integral_offset[:] = self.__latched[self.__INTEGRAL]
+        self.__integral.fill(0)
+
+    def get_mean(self) -> NDArray[3, np.float64]:
+        """
+        Returns a reference to the mean of the samples received in the previous frame.
+        """
+        return self.__mean
+
+    def get_integral(self) -> NDArray[3, np.float64]:
+        """
+        Returns a reference to the time integral of each axis at the end of the
+        previous frame.
+        """
+        return self.__integral
+
+    def get_count(self) -> int:
+        """
+        Returns the number of samples received up to the end of the previous frame.
+        """
+        return int(self.__latched[self.__COUNT])
+
+    def get_timestamp(self) -> float:
+        """
+        Returns the timestamp of the newest sample received up to the end of the
+        previous frame, or 0.0 if no sample has been received.
+        """
+        return float(self.__latched[self.__TIMESTAMP])
+
+    def get_frame_samples(
+        self,
+    ) -> Tuple[NDArray[Any, np.float64], NDArray[(Any, 3), np.float64]]:
+        """
+        Returns copies of the samples received during the previous frame.
+
+        Returns:
+            The timestamps of the samples in seconds, and the samples themselves with
+            one (x, y, z) row per sample, both ordered from oldest to newest.
+
+        Note:
+            If more samples arrived than the buffer can hold, only the most recent
+            samples are returned.
+        """
+        start = int(self.__previous[self.__COUNT])
+        end = int(self.__latched[self.__COUNT])
+        indices = np.arange(max(start, end - self.__capacity), end)
+        timestamps = self.__timestamps[indices % self.__capacity]
+        samples = self.__samples[indices % self.__capacity]
+
+        # Drop any samples which the writer overwrote while we were copying them
+        newest = self.__shared_totals.get_sequence()
+        valid = indices > newest - self.__capacity
+        if not valid.all():
+            return timestamps[valid], samples[valid]
+        return timestamps, samples
+
+    def interpolate(self, timestamp: float) -> Optional[NDArray[3, np.float64]]:
+        """
+        Estimates the sample at a point in time from the samples in the buffer.
+
+        Args:
+            timestamp: The time of interest in seconds.
+
+        Returns:
+            The linear interpolation of the two samples around timestamp, the
+            closest sample if timestamp is outside the buffered range, or None if
+            no sample has been received.
+
+        Note:
+            This runs a binary search over at most capacity samples.
+        """
+        while True:
+            count = self.__shared_totals.get_sequence()
+
+            # Skip the oldest slot, which is the next one the writer will overwrite
+            first = max(0, count - self.__capacity + 1)
+            if count == first:
+                return None
+
+            slots = np.arange(first, count) % self.__capacity
+            timestamps = self.__timestamps[slots]
+            after = int(np.searchsorted(timestamps, timestamp))
+
+            if after == 0:
+                result = self.__samples[slots[0]].copy()
+            elif after == len(slots):
+                result = self.__samples[slots[-1]].copy()
+            else:
+                t0, t1 = timestamps[after - 1], timestamps[after]
+                weight = (timestamp - t0) / (t1 - t0) if t1 > t0 else 0.0
+                result = (1 - weight) * self.__samples[slots[after - 1]]
+                result += weight * self.__samples[slots[after]]
+
+            # Retry if the writer overwrote any slot we read in the meantime
+            if self.__shared_totals.get_sequence() - first < self.__capacity:
+                return result
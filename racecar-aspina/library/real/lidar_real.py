@@ -6,9 +6,12 @@ Spring 2020
 Contains the Lidar module of the racecar_core library
 """
 
+from __future__ import annotations
+
 from lidar import Lidar
 
 # General
+from typing import Tuple
 import numpy as np
 from nptyping import NDArray
 
@@ -17,14 +20,43 @@ import rclpy as ros2
 from rclpy.qos import qos_profile_sensor_data
 from sensor_msgs.msg import LaserScan
 from cv_bridge import CvBridge, CvBridgeError
-import threading
+
+from ros_time import stamp_to_seconds
+from sensor_log import Stream
+from sensor_history import SensorChannel
 
 
 class LidarReal(Lidar):
     # The ROS topic from which we get Lidar data
     __SCAN_TOPIC = "/scan"
 
-    def __init__(self):
+    # Number of recent scans kept for aligning the lidar with other sensors
+    __HISTORY_SIZE = 8
+
+    def __init__(self, samples_channel=None, is_subscribed=True):
+        """
+        Args:
+            samples_channel: Hands scans from the callback to the run thread.
+            is_subscribed: False if another process receives the scans and
+                publishes them to the provided channel.
+
+        Note:
+            The channel may be a SensorChannel or a SharedFrameRing; a SensorChannel
+            is created if none is provided.
+        """
+        self.__samples = np.empty(0)
+        self.__samples_sequence = 0
+        self.__samples_timestamp = 0.0
+        # (capture time, samples) of the newest scans, shared with the run thread
+        self.__samples_channel = samples_channel or SensorChannel(self.__HISTORY_SIZE)
+
+        # SensorLogWriter to which received scans are recorded, if any
+        self.__logger = None
+
+        if not is_subscribed:
+            self.node = None
+            return
+
         # ROS node
         self.node = ros2.create_node("scan_sub")
 
@@ -34,19 +66,48 @@ class LidarReal(Lidar):
             LaserScan, self.__SCAN_TOPIC, self.__scan_callback, qos_profile_sensor_data
         )
 
-        self.__samples = np.empty(0)
-        self.__samples_new = np.empty(0)
-
     # LIDAR Scan returns value in meters, multiplying by 100 to be processed in cm
     # LIDAR Scan reversed, flipping order of data entry to correct for CW spin
     def __scan_callback(self, data):
-        self.__samples_new = np.flip(np.multiply(np.array(data.ranges), 100))
-        
+        samples = np.flip(np.multiply(np.array(data.ranges), 100))
+        stamp = stamp_to_seconds(data.header.stamp)
+        self.__samples_channel.publish(stamp, samples)
+        if self.__logger is not None:
+            self.__logger.record(Stream.lidar_samples, stamp, samples)
+
+    def __set_logger(self, logger) -> None:
+        """
+        Starts recording received scans to logger, or stops if logger is None.
+        """
+        self.__logger = logger
+
     def __update(self):
-        self.__samples = self.__samples_new
+        if self.__samples_channel.get_sequence() == self.__samples_sequence:
+            return
+
+        sequence, timestamp, samples = self.__samples_channel.read()
+        self.__samples_sequence = sequence
+        self.__samples_timestamp = timestamp
+        if samples is not None:
+            self.__samples = samples
+
+    def __get_nearest_samples(
+        self, timestamp: float
+    ) -> Tuple[float, NDArray[720, np.float32]]:
+        """
+        Returns the (capture time, samples) of the recent scan closest to timestamp.
+        """
+        return self.__samples_channel.get_nearest(timestamp)
 
     def get_samples(self) -> NDArray[720, np.float32]:
         return self.__samples
 
     def get_samples_async(self) -> NDArray[720, np.float32]:
-        return self.__samples_new
+        samples = self.__samples_channel.read()[2]
+        return samples if samples is not None else np.empty(0)
+
+    def get_samples_sequence(self) -> int:
+        return self.__samples_sequence
+
+    def get_samples_timestamp(self) -> float:
+        return self.__samples_timestamp
@@ -6,10 +6,12 @@ Spring 2020
 Contains the Physics module of the racecar_core library
 """
 
+from __future__ import annotations
+
 from physics import Physics
 
 # General
-from collections import deque
+from typing import Any, Optional, Tuple
 import numpy as np
 from nptyping import NDArray
 
@@ -23,14 +25,18 @@ from rclpy.qos import (
 )
 from sensor_msgs.msg import Imu
 
+from imu_buffer import ImuBuffer
+from ros_time import stamp_to_seconds
+from sensor_log import Stream
+
 
 class PhysicsReal(Physics):
     # The ROS topic from which we read imu data
     __ACCEL_TOPIC = "/camera/accel"
     __GYRO_TOPIC = "/camera/gyro"
 
-    # Limit on buffer size to prevent memory overflow
-    __BUFFER_CAP = 60
+    # Number of samples kept per sensor, enough for several frames at the IMU rate
+    __BUFFER_CAP = 256
 
     def __init__(self):
         self.node = ros2.create_node("imu_sub")
@@ -53,44 +59,154 @@ class PhysicsReal(Physics):
             Imu, self.__GYRO_TOPIC, self.__gyro_callback, qos_profile
         )
 
-        self.__acceleration = np.array([0, 0, 0])
-        self.__acceleration_buffer = deque()
-        self.__angular_velocity = np.array([0, 0, 0])
-        self.__angular_velocity_buffer = deque()
+        self.__acceleration_buffer = ImuBuffer(self.__BUFFER_CAP)
+        self.__angular_velocity_buffer = ImuBuffer(self.__BUFFER_CAP)
 
-    def __accel_callback(self, data):
-        new_acceleration = np.array(
-            [
-                data.linear_acceleration.x,
-                data.linear_acceleration.y,
-                data.linear_acceleration.z,
-            ]
-        )
+        # SensorLogWriter to which received samples are recorded, if any
+        self.__logger = None
 
-        self.__acceleration_buffer.append(new_acceleration)
-        if len(self.__acceleration_buffer) > self.__BUFFER_CAP:
-            self.__acceleration_buffer.popleft()
+    def __accel_callback(self, data):
+        stamp = stamp_to_seconds(data.header.stamp)
+        sample = data.linear_acceleration
+        self.__acceleration_buffer.push(stamp, sample.x, sample.y, sample.z)
+        if self.__logger is not None:
+            self.__logger.record(
+                Stream.linear_acceleration, stamp, (sample.x, sample.y, sample.z)
+            )
 
     def __gyro_callback(self, data):
-        new_angular_velocity = np.array(
-            [data.angular_velocity.x, data.angular_velocity.y, data.angular_velocity.z]
-        )
-
-        self.__angular_velocity_buffer.append(new_angular_velocity)
-        if len(self.__angular_velocity_buffer) > self.__BUFFER_CAP:
-            self.__angular_velocity_buffer.popleft()
+        stamp = stamp_to_seconds(data.header.stamp)
+        sample = data.angular_velocity
+        self.__angular_velocity_buffer.push(stamp, sample.x, sample.y, sample.z)
+        if self.__logger is not None:
+            self.__logger.record(
+                Stream.angular_velocity, stamp, (sample.x, sample.y, sample.z)
+            )
+
+    def __set_logger(self, logger) -> None:
+        """
+        Starts recording every IMU sample to logger, or stops if logger is None.
+        """
+        self.__logger = logger
 
     def __update(self):
-        if len(self.__acceleration_buffer) > 0:
-            self.__acceleration = np.mean(self.__acceleration_buffer, axis=0)
-            self.__acceleration_buffer.clear()
-
-        if len(self.__angular_velocity_buffer) > 0:
-            self.__angular_velocity = np.mean(self.__angular_velocity_buffer, axis=0)
-            self.__angular_velocity_buffer.clear()
+        self.__acceleration_buffer.end_frame()
+        self.__angular_velocity_buffer.end_frame()
 
     def get_linear_acceleration(self) -> NDArray[3, np.float32]:
-        return np.array(self.__acceleration)
+        return np.array(self.__acceleration_buffer.get_mean())
 
     def get_angular_velocity(self) -> NDArray[3, np.float32]:
-        return np.array(self.__angular_velocity)
+        return np.array(self.__angular_velocity_buffer.get_mean())
+
+    def __interpolate(
+        self, timestamp: float
+    ) -> Tuple[Optional[NDArray[3, np.float64]], Optional[NDArray[3, np.float64]]]:
+        """
+        Returns the (linear acceleration, angular velocity) interpolated at timestamp.
+        """
+        return (
+            self.__acceleration_buffer.interpolate(timestamp),
+            self.__angular_velocity_buffer.interpolate(timestamp),
+        )
+
+    def get_imu_sequence(self) -> int:
+        return (
+            self.__acceleration_buffer.get_count()
+            + self.__angular_velocity_buffer.get_count()
+        )
+
+    def get_imu_timestamp(self) -> float:
+        return max(
+            self.__acceleration_buffer.get_timestamp(),
+            self.__angular_velocity_buffer.get_timestamp(),
+        )
+
+    def get_linear_acceleration_samples(
+        self,
+    ) -> Tuple[NDArray[Any, np.float64], NDArray[(Any, 3), np.float64]]:
+        """
+        Returns every accelerometer sample received during the last frame.
+
+        Returns:
+            The timestamp of each sample in seconds and the (x, y, z) linear
+            acceleration of each sample in m/s^2, ordered from oldest to newest.
+
+        Example::
+
+            # Find the largest forward acceleration measured during the last frame
+            timestamps, samples = rc.physics.get_linear_acceleration_samples()
+            if len(samples) > 0:
+                peak_forward_accel = samples[:, 2].max()
+        """
+        return self.__acceleration_buffer.get_frame_samples()
+
+    def get_angular_velocity_samples(
+        self,
+    ) -> Tuple[NDArray[Any, np.float64], NDArray[(Any, 3), np.float64]]:
+        """
+        Returns every gyroscope sample received during the last frame.
+
+        Returns:
+            The timestamp of each sample in seconds and the (x, y, z) angular velocity
+            of each sample in rad/s, ordered from oldest to newest.
+
+        Example::
+
+            # Count the gyroscope samples measured during the last frame
+            timestamps, samples = rc.physics.get_angular_velocity_samples()
+            num_samples = len(timestamps)
+        """
+        return self.__angular_velocity_buffer.get_frame_samples()
+
+    def get_yaw(self) -> float:
+        """
+        Returns the angle the car has turned since the last call to reset_yaw.
+
+        Returns:
+            The integrated yaw rate in radians, positive when the car has turned left.
+
+        Warning:
+            Gyroscope bias accumulates over time, so the yaw drifts and should be reset
+            regularly.
+
+        Example::
+
+            # Stop once the car has turned 90 degrees in either direction
+            if abs(rc.physics.get_yaw()) > math.pi / 2:
+                rc.drive.stop()
+        """
+        return float(self.__angular_velocity_buffer.get_integral()[1])
+
+    def reset_yaw(self) -> None:
+        """
+        Resets the value returned by get_yaw to zero.
+        """
+        self.__angular_velocity_buffer.reset_integral()
+
+    def get_speed_estimate(self) -> float:
+        """
+        Returns the forward speed of the car estimated from its acceleration.
+
+        Returns:
+            The forward acceleration integrated since the last call to
+            reset_speed_estimate in m/s.
+
+        Warning:
+            Accelerometer bias (including any tilt of the camera relative to gravity)
+            accumulates over time, so the estimate drifts and should be reset whenever
+            the car is known to be stationary.
+
+        Example::
+
+            # Reset the estimate while the car is parked
+            rc.drive.stop()
+            rc.physics.reset_speed_estimate()
+        """
+        return float(self.__acceleration_buffer.get_integral()[2])
+
+    def reset_speed_estimate(self) -> None:
+        """
+        Resets the value returned by get_speed_estimate to zero.
+        """
+        self.__acceleration_buffer.reset_integral()
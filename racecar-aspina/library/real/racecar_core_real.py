@@ -6,10 +6,17 @@ Spring 2020
 Contains the Racecar class, the top level of the racecar_core library
 """
 
+from __future__ import annotations
+
 # General
 from datetime import datetime
+import os
 import threading
-from typing import Callable, Optional
+import time
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
+
+import numpy as np
+from nptyping import NDArray
 
 # ROS2
 import rclpy as ros2
@@ -21,40 +28,115 @@ import display_real
 import drive_real
 import lidar_real
 import physics_real
+from sensor_log import RecordingStats, SensorLogWriter
+from sensor_process import SensorProcess
+from thread_config import ThreadConfig, apply_thread_config, parse_thread_config
 
+from frame_gc import FrameGc, GcStats
 from racecar_core import Racecar
+import racecar_utils as rc_utils
+
+
+class SensorSnapshot(NamedTuple):
+    """
+    Camera, depth, lidar, and IMU data aligned to a common capture time.
+
+    Each field is None if no data of that sensor was captured close enough to
+    timestamp.  Images and scans use the same units as the camera and lidar modules.
+    """
+
+    # The capture time (in seconds since the epoch) to which the data is aligned
+    timestamp: float
+    color_image: Optional[NDArray[(480, 640, 3), np.uint8]]
+    color_image_timestamp: float
+    depth_image: Optional[NDArray[(480, 640), np.float32]]
+    depth_image_timestamp: float
+    lidar_samples: Optional[NDArray[720, np.float32]]
+    lidar_samples_timestamp: float
+    # Interpolated from the IMU samples around timestamp
+    linear_acceleration: Optional[NDArray[3, np.float64]]
+    angular_velocity: Optional[NDArray[3, np.float64]]
+    # The number of seconds spent aligning the data
+    alignment_time: float
 
 
 class RacecarReal(Racecar):
     # Default number of seconds to wait between calls to update_slow
     __DEFAULT_UPDATE_SLOW_TIME = 1
 
-    # Number of frames per second
-    __FRAME_RATE = 60
+    # Default largest difference in capture time (in seconds) accepted in a snapshot
+    __DEFAULT_MAX_SKEW = 0.1
+
+    # Default target and lowest adaptive number of frames per second
+    __DEFAULT_FRAME_RATE = 60
+    __DEFAULT_MIN_FRAME_RATE = 15
+
+    # Consecutive frames which must overrun (or leave headroom) before the adaptive
+    # frame rate is lowered (or raised)
+    __OVERRUN_FRAMES = 10
+    __HEADROOM_FRAMES = 120
+
+    # Fraction of the frame period below which a frame leaves headroom
+    __HEADROOM_FRACTION = 0.6
+
+    # Factor by which the adaptive frame rate is lowered or raised
+    __FRAME_RATE_STEP = 0.8
+
+    # Environment variable holding the initial thread configuration, for example
+    # RACECAR_THREADS="run=3:80,executor=2,sensors=0+1"
+    __THREAD_CONFIG_VARIABLE = "RACECAR_THREADS"
+
+    # Directory in which recordings are stored by default
+    __RECORDING_DIRECTORY = "recordings"
+
+    # Roles which can be assigned a thread configuration
+    __THREAD_ROLES = ("run", "executor", "sensors", "worker")
+
+    def __init__(
+        self,
+        isHeadless: bool = False,
+        isIsolated: bool = False,
+        isRecording: bool = False,
+    ):
+        # Receive camera and lidar data in a separate process, which must be forked
+        # before ROS 2 is initialized in this one
+        self.__sensor_process = None
+        if isIsolated:
+            self.__sensor_process = SensorProcess(
+                camera_real.CameraReal._WIDTH, camera_real.CameraReal._HEIGHT
+            )
+            self.__sensor_process.start()
 
-    def __init__(self, isHeadless: bool = False):
         # initialize ROS 2
         ros2.init()
         self.__executor = ros2.get_global_executor()
-        self.__rate_node = ros2.create_node("rate_node")
 
         # Modules
-        self.camera = camera_real.CameraReal()
+        if self.__sensor_process is None:
+            self.camera = camera_real.CameraReal()
+            self.lidar = lidar_real.LidarReal()
+        else:
+            self.camera = camera_real.CameraReal(
+                self.__sensor_process.get_color_ring(),
+                self.__sensor_process.get_depth_ring(),
+                is_subscribed=False,
+            )
+            self.lidar = lidar_real.LidarReal(
+                self.__sensor_process.get_lidar_ring(), is_subscribed=False
+            )
         self.controller = controller_real.ControllerReal(self)
         self.display = display_real.DisplayReal(isHeadless)
         self.drive = drive_real.DriveReal()
-        self.lidar = lidar_real.LidarReal()
         self.physics = physics_real.PhysicsReal()
 
-        # Add all nodes to the executor
-        rate_added = self.__executor.add_node(self.__rate_node)
+        # Add all nodes to the executor (the sensor process spins its own image and
+        # lidar nodes, while the camera node here still receives the camera info)
         camera_added = self.__executor.add_node(self.camera.node)
-        lidar_added = self.__executor.add_node(self.lidar.node)
+        lidar_added = isIsolated or self.__executor.add_node(self.lidar.node)
         controller_added = self.__executor.add_node(self.controller.node)
         physics_added = self.__executor.add_node(self.physics.node)
-        assert rate_added and lidar_added and camera_added and controller_added, (
+        assert lidar_added and camera_added and controller_added, (
             "Issues initializing Racecar nodes. Node status: \n"
-            f"Rate operational: {rate_added} | "
             f"Camera operational: {camera_added} | "
             f"Lidar operational: {lidar_added} | "
             f"Controller operational: {controller_added} | "
@@ -75,10 +157,37 @@ class RacecarReal(Racecar):
         self.__cur_update_slow = None
         self.__cur_frame_time = datetime.now()
         self.__last_frame_time = datetime.now()
-        self.__cur_update_counter = 0
-        self.__max_update_counter = 1
+        self.__update_slow_counter = 0.0
         self.set_update_slow_time(self.__DEFAULT_UPDATE_SLOW_TIME)
 
+        # Target and current frame rate, and the frames counted towards adapting it
+        self.__frame_rate = self.__DEFAULT_FRAME_RATE
+        self.__target_frame_rate = self.__DEFAULT_FRAME_RATE
+        self.__min_frame_rate = self.__DEFAULT_MIN_FRAME_RATE
+        self.__is_frame_rate_adaptive = False
+        self.__num_overrun_frames = 0
+        self.__num_headroom_frames = 0
+        self.__frame_gc = FrameGc()
+
+        # Native ids of the threads (or pid of the process) filling each role; go
+        # spins the executor on the thread which created the racecar
+        self.__thread_ids: Dict[str, List[int]] = {
+            role: [] for role in self.__THREAD_ROLES
+        }
+        self.__thread_ids["executor"].append(threading.get_native_id())
+        if self.__sensor_process is not None:
+            self.__thread_ids["sensors"].append(self.__sensor_process.get_pid())
+        self.__thread_configs: Dict[str, ThreadConfig] = {}
+        for role, config in parse_thread_config(
+            os.environ.get(self.__THREAD_CONFIG_VARIABLE, "")
+        ).items():
+            self.set_thread_config(role, config.cpus, config.priority)
+
+        # SensorLogWriter of the current recording, if any
+        self.__logger = None
+        if isRecording:
+            self.start_recording()
+
         # Start run_thread in default drive mode
         self.__handle_back()
         self.__run_thread = threading.Thread(target=self.__run)
@@ -104,6 +213,11 @@ class RacecarReal(Racecar):
                 break
         ros2.shutdown()
 
+        if self.__logger is not None:
+            self.stop_recording(wait=True)
+        if self.__sensor_process is not None:
+            self.__sensor_process.stop()
+
     def set_start_update(
         self,
         start: Callable[[], None],
@@ -118,7 +232,296 @@ class RacecarReal(Racecar):
         return (self.__cur_frame_time - self.__last_frame_time).total_seconds()
 
     def set_update_slow_time(self, time: float = 1.0) -> None:
-        self.__max_update_counter = max(1, round(time * self.__FRAME_RATE))
+        self.__update_slow_time = time
+
+    def set_frame_rate(
+        self,
+        frame_rate: float = __DEFAULT_FRAME_RATE,
+        is_adaptive: bool = False,
+        min_frame_rate: float = __DEFAULT_MIN_FRAME_RATE,
+    ) -> None:
+        """
+        Sets the number of frames per second in which update is called.
+
+        Args:
+            frame_rate: The target number of frames per second.
+            is_adaptive: If True, the frame rate is lowered when update consistently
+                takes longer than a frame, and raised back towards frame_rate once
+                it leaves enough headroom.
+            min_frame_rate: The lowest frame rate used in adaptive mode.
+
+        Note:
+            Frames which overrun are not made up for; the next frame starts right
+            away.  update_slow is called based on the elapsed time, so it keeps its
+            interval whatever the frame rate.
+
+        Example::
+
+            # Run at up to 30 frames per second, but no less than 10
+            rc.set_frame_rate(30, is_adaptive=True, min_frame_rate=10)
+        """
+        assert frame_rate > 0, f"frame_rate [{frame_rate}] must be positive."
+        assert (
+            0 < min_frame_rate <= frame_rate
+        ), f"min_frame_rate [{min_frame_rate}] must be between 0 and frame_rate."
+
+        self.__target_frame_rate = frame_rate
+        self.__min_frame_rate = min_frame_rate
+        self.__is_frame_rate_adaptive = is_adaptive
+        self.__frame_rate = frame_rate
+        self.__num_overrun_frames = 0
+        self.__num_headroom_frames = 0
+
+    def get_frame_rate(self) -> float:
+        """
+        Returns the current number of frames per second targeted by the run thread,
+        which is below the value passed to set_frame_rate while adaptive mode has
+        lowered it.
+        """
+        return self.__frame_rate
+
+    def set_gc_managed(self, is_managed: bool = True) -> None:
+        self.__frame_gc.set_managed(is_managed)
+
+    def get_gc_stats(self) -> GcStats:
+        stats = self.__frame_gc.get_stats()
+        self.__frame_gc.reset_stats()
+        return stats
+
+    def start_recording(self, path: Optional[str] = None) -> None:
+        """
+        Starts recording the data received from every sensor and the drive commands
+        sent to the motors.
+
+        Args:
+            path: The directory in which to store the recording. If None, a new
+                directory named after the current time is created in recordings.
+
+        Note:
+            Records are written by a background thread.  If the disk cannot keep
+            up, records are dropped rather than delaying the program, and counted in
+            get_recording_stats.  The recording can be read with SensorLogReader.
+            With the -i flag, the camera and lidar data are recorded by the sensor
+            process, which receives them, into chunks of its own in the same
+            directory.
+
+        Example::
+
+            # Record the car's view while the A button is held down
+            if rc.controller.was_pressed(rc.controller.Button.A):
+                rc.start_recording()
+            elif rc.controller.was_released(rc.controller.Button.A):
+                rc.stop_recording()
+        """
+        if self.__logger is not None:
+            self.stop_recording()
+
+        if path is None:
+            path = os.path.join(
+                self.__RECORDING_DIRECTORY, datetime.now().strftime("%Y%m%d_%H%M%S")
+            )
+        self.__logger = SensorLogWriter(path)
+        self.__set_module_loggers(self.__logger)
+        if self.__sensor_process is not None:
+            self.__sensor_process.start_recording(path)
+        rc_utils.print_colored(
+            f">> Recording sensor data to {path}", rc_utils.TerminalColor.green
+        )
+
+    def stop_recording(self, wait: bool = False) -> Optional[RecordingStats]:
+        """
+        Stops the current recording.
+
+        Args:
+            wait: If True, waits until the remaining records are written and the
+                recording is closed, which can take a noticeable fraction of a
+                second.  Otherwise, the recording is closed in the background, so
+                this may be called from update without delaying the frame.
+
+        Returns:
+            The number of records written and dropped if wait is True, or None if
+            wait is False or nothing was being recorded.  What was recorded is also
+            printed once the recording is closed.
+
+        Note:
+            With the -i flag, the camera and lidar records written by the sensor
+            process are not included in the statistics.
+        """
+        if self.__logger is None:
+            return None
+
+        self.__set_module_loggers(None)
+        if self.__sensor_process is not None:
+            self.__sensor_process.stop_recording()
+        stats = self.__logger.stop(wait, self.__print_recording_stats)
+        self.__logger = None
+        return stats
+
+    def __print_recording_stats(self, stats: RecordingStats) -> None:
+        """
+        Prints what was recorded (called by the writer thread once it is closed).
+        """
+        num_dropped = sum(stats.num_dropped.values())
+        message = (
+            f">> Recorded {sum(stats.num_written.values())} records "
+            f"({stats.num_bytes / 1e6:.1f} MB in {stats.num_chunks} chunks)"
+        )
+        if num_dropped > 0:
+            rc_utils.print_warning(f"{message}, dropped {num_dropped}")
+        else:
+            rc_utils.print_colored(message, rc_utils.TerminalColor.green)
+
+    def get_recording_stats(self) -> Optional[RecordingStats]:
+        """
+        Returns the number of records written and dropped so far in the current
+        recording, or None if nothing is being recorded.
+        """
+        return None if self.__logger is None else self.__logger.get_stats()
+
+    def __set_module_loggers(self, logger: Optional[SensorLogWriter]) -> None:
+        """
+        Sets the SensorLogWriter to which every module records its data.
+        """
+        self.camera._CameraReal__set_logger(logger)
+        self.controller._ControllerReal__set_logger(logger)
+        self.drive._DriveReal__set_logger(logger)
+        self.lidar._LidarReal__set_logger(logger)
+        self.physics._PhysicsReal__set_logger(logger)
+
+    def set_thread_config(
+        self,
+        role: str,
+        cpus: Optional[Iterable[int]] = None,
+        priority: Optional[int] = None,
+    ) -> None:
+        """
+        Assigns CPU cores and optionally a real-time priority to the threads of a role.
+
+        Args:
+            role: "run" (the thread calling update), "executor" (the thread receiving
+                ROS messages in go), "sensors" (the sensor process started with the
+                -i flag), or "worker" (threads registered with register_worker_thread).
+            cpus: The cores on which the role's threads may run, or None to leave
+                their affinity unchanged.
+            priority: The SCHED_FIFO priority (1 to 99) of the role's threads, or
+                None to use the default scheduler, which restores it for threads
+                given a priority earlier.
+
+        Note:
+            The initial configuration may also be provided with the RACECAR_THREADS
+            environment variable, such as RACECAR_THREADS="run=3:80,executor=0-2".
+            SCHED_FIFO requires root or the CAP_SYS_NICE capability.  What was
+            applied, or why it could not be, is printed to the terminal.
+
+        Example::
+
+            # Keep the update loop on its own core, ahead of background processes
+            rc.set_thread_config("run", [3], 80)
+            rc.set_thread_config("executor", [0, 1, 2])
+        """
+        assert (
+            role in self.__THREAD_ROLES
+        ), f"role [{role}] must be one of {self.__THREAD_ROLES}."
+        assert priority is None or (
+            1 <= priority <= 99
+        ), f"priority [{priority}] must be between 1 and 99 inclusive."
+
+        config = ThreadConfig(None if cpus is None else frozenset(cpus), priority)
+        self.__thread_configs[role] = config
+        for tid in self.__thread_ids[role]:
+            apply_thread_config(role, config, tid, is_process=role == "sensors")
+
+    def register_worker_thread(self) -> None:
+        """
+        Applies the "worker" thread configuration to the calling thread, and to any
+        configuration set for workers later on.
+
+        Example::
+
+            def process_images():
+                rc.register_worker_thread()
+                while True:
+                    ...
+
+            threading.Thread(target=process_images, daemon=True).start()
+        """
+        tid = threading.get_native_id()
+        self.__thread_ids["worker"].append(tid)
+        if "worker" in self.__thread_configs:
+            apply_thread_config("worker", self.__thread_configs["worker"], tid)
+
+    def get_sensor_snapshot(
+        self, timestamp: Optional[float] = None, max_skew: float = __DEFAULT_MAX_SKEW
+    ) -> SensorSnapshot:
+        """
+        Returns the data of every sensor captured closest to a common point in time.
+
+        Args:
+            timestamp: The capture time (in seconds since the epoch) to align to. If
+                None, the capture time of the current color image is used.
+            max_skew: The largest difference in seconds between timestamp and the
+                capture time of any sensor's data; data further away is left out.
+
+        Returns:
+            The color image, depth image, and lidar scan captured closest to timestamp
+            and the IMU measurements interpolated at timestamp.
+
+        Note:
+            Unlike the camera, lidar, and physics modules, which each return their
+            most recent data, the snapshot searches a short history kept for every
+            sensor, so its cost is bounded by the size of those histories.  The
+            time spent is reported in the alignment_time field.
+
+        Example::
+
+            # Fuse a depth image and lidar scan which were captured together
+            snapshot = rc.get_sensor_snapshot()
+            if snapshot.depth_image is not None and snapshot.lidar_samples is not None:
+                closest_pixel = rc_utils.get_closest_pixel(snapshot.depth_image)
+        """
+        start_time = time.perf_counter()
+
+        if timestamp is None:
+            timestamp = self.camera.get_color_image_timestamp()
+
+        color_time, color_image = self.camera._CameraReal__get_nearest_color_image(
+            timestamp
+        )
+        if abs(color_time - timestamp) > max_skew:
+            color_image = None
+
+        depth_time, depth_image = self.camera._CameraReal__get_nearest_depth_image(
+            timestamp
+        )
+        if abs(depth_time - timestamp) > max_skew:
+            depth_image = None
+
+        lidar_time, lidar_samples = self.lidar._LidarReal__get_nearest_samples(
+            timestamp
+        )
+        if abs(lidar_time - timestamp) > max_skew:
+            lidar_samples = None
+
+        acceleration, angular_velocity = self.physics._PhysicsReal__interpolate(
+            timestamp
+        )
+        # The IMU buffers cover far more than max_skew, so only data newer than the
+        # last IMU sample needs to be rejected
+        if timestamp - self.physics.get_imu_timestamp() > max_skew:
+            acceleration, angular_velocity = None, None
+
+        return SensorSnapshot(
+            timestamp,
+            color_image,
+            color_time,
+            depth_image,
+            depth_time,
+            lidar_samples,
+            lidar_time,
+            acceleration,
+            angular_velocity,
+            time.perf_counter() - start_time,
+        )
 
     def __handle_start(self):
         """
@@ -133,6 +536,7 @@ class RacecarReal(Racecar):
         else:
             print(">> Entering user program mode")
             self.__user_start()
+            self.__frame_gc.start()
             self.__cur_update = self.__user_update
             self.__cur_update_slow = self.__user_update_slow
 
@@ -156,21 +560,86 @@ class RacecarReal(Racecar):
         """
         Calls the current update and update_modules once per frame.
         """
-        rate = self.__rate_node.create_rate(self.__FRAME_RATE)
+        self.__thread_ids["run"].append(threading.get_native_id())
+        if "run" in self.__thread_configs:
+            apply_thread_config("run", self.__thread_configs["run"])
+
+        next_frame_start = time.perf_counter()
         while True:
+            frame_start = time.perf_counter()
+            period = 1 / self.__frame_rate
             self.__last_frame_time = self.__cur_frame_time
             self.__cur_frame_time = datetime.now()
+            self.__frame_gc.begin_update()
             self.__cur_update()
+            self.__frame_gc.end_update()
             self.__update_modules()
 
-            # Use a counter to decide when we need to call update_slow
+            # Count down the seconds until we need to call update_slow
             if self.__cur_update_slow is not None:
-                self.__cur_update_counter -= 1
-                if self.__cur_update_counter <= 0:
+                self.__update_slow_counter -= self.get_delta_time()
+                if self.__update_slow_counter <= 0:
                     self.__cur_update_slow()
-                    self.__cur_update_counter = self.__max_update_counter
+                    self.__update_slow_counter = self.__update_slow_time
 
-            rate.sleep()
+            if self.__is_frame_rate_adaptive:
+                self.__adapt_frame_rate(time.perf_counter() - frame_start, period)
+
+            # Collect garbage in the time left before the next frame
+            next_frame_start += period
+            self.__frame_gc.collect(next_frame_start - time.perf_counter())
+
+            # Start the next frame right away if this one overran, without trying
+            # to catch up on the frames which were missed
+            delay = next_frame_start - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_frame_start = time.perf_counter()
+
+    def __adapt_frame_rate(self, frame_time: float, period: float) -> None:
+        """
+        Lowers the frame rate after consistent overruns, and raises it back towards
+        the target after consistent headroom.
+
+        Args:
+            frame_time: The seconds spent in update, the modules, and update_slow.
+            period: The seconds per frame at the current frame rate.
+        """
+        if frame_time > period:
+            self.__num_overrun_frames += 1
+            self.__num_headroom_frames = 0
+        elif frame_time < period * self.__HEADROOM_FRACTION:
+            self.__num_headroom_frames += 1
+            self.__num_overrun_frames = 0
+        else:
+            self.__num_overrun_frames = 0
+            self.__num_headroom_frames = 0
+
+        if (
+            self.__num_overrun_frames >= self.__OVERRUN_FRAMES
+            and self.__frame_rate > self.__min_frame_rate
+        ):
+            self.__frame_rate = max(
+                self.__min_frame_rate, self.__frame_rate * self.__FRAME_RATE_STEP
+            )
+            self.__num_overrun_frames = 0
+            rc_utils.print_warning(
+                f">> update is overrunning its frames, lowering the frame rate to "
+                f"{self.__frame_rate:.1f} fps"
+            )
+        elif (
+            self.__num_headroom_frames >= self.__HEADROOM_FRAMES
+            and self.__frame_rate < self.__target_frame_rate
+        ):
+            self.__frame_rate = min(
+                self.__target_frame_rate, self.__frame_rate / self.__FRAME_RATE_STEP
+            )
+            self.__num_headroom_frames = 0
+            rc_utils.print_colored(
+                f">> Raising the frame rate to {self.__frame_rate:.1f} fps",
+                rc_utils.TerminalColor.green,
+            )
 
     def __update_modules(self):
         """
@@ -0,0 +1,17 @@
+"""
+Copyright Harvey Mudd College
+MIT License
+Spring 2020
+
+Contains helpers for converting ROS time into the time used by racecar_core
+"""
+
+
+def stamp_to_seconds(stamp) -> float:
+    """
+    Converts the stamp of a ROS message header into seconds since the epoch.
+
+    Args:
+        stamp: (ROS Time message) The stamp field of a message header.
+    """
+    return stamp.sec + stamp.nanosec * 1e-9
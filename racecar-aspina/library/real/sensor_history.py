@@ -0,0 +1,138 @@
+"""
+Copyright Harvey Mudd College
+MIT License
+Spring 2020
+
+Contains the per-sensor history and channel used to hand data to the run thread
+"""
+
+# General
+from typing import Generic, Optional, Tuple, TypeVar
+
+import numpy as np
+
+from double_buffer import DoubleBuffer
+
+T = TypeVar("T")
+
+
+class SensorHistory(Generic[T]):
+    """
+    A fixed-capacity ring of the most recent (timestamp, value) pairs of a sensor.
+
+    Values are pushed by a single writer (the ROS callback) and looked up by capture
+    time from the run thread.  Lookups scan at most capacity entries, so their cost
+    is bounded regardless of the sensor rate.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        assert capacity > 0, f"capacity ({capacity}) must be a positive integer."
+
+        self.__capacity: int = capacity
+
+        # One spare slot is kept so that the writer never fills a slot which a
+        # reader may be looking at until capacity newer values have been pushed
+        self.__num_slots: int = capacity + 1
+        self.__timestamps = np.zeros(self.__num_slots, np.float64)
+        self.__values: list = [None] * self.__num_slots
+
+        # Total number of values pushed, updated only after a slot is fully written
+        self.__count: int = 0
+
+    def push(self, timestamp: float, value: T) -> None:
+        """
+        Adds a value to the history, replacing the oldest value if it is full.
+
+        Args:
+            timestamp: The time at which the value was captured in seconds.
+            value: The captured value, which must not be modified afterwards.
+
+        Warning:
+            Only the thread receiving the sensor messages may call this function.
+        """
+        index = self.__count % self.__num_slots
+        self.__values[index] = value
+        self.__timestamps[index] = timestamp
+        self.__count += 1
+
+    def get_nearest(self, timestamp: float) -> Tuple[float, Optional[T]]:
+        """
+        Finds the value captured closest to the provided time.
+
+        Args:
+            timestamp: The time of interest in seconds.
+
+        Returns:
+            The capture time and value of the closest entry, or (0.0, None) if the
+            history is empty.
+        """
+        while True:
+            count = self.__count
+            oldest = max(0, count - self.__capacity)
+            if count == oldest:
+                return 0.0, None
+
+            entries = np.arange(oldest, count)
+            slots = entries % self.__num_slots
+            nearest = int(np.argmin(np.abs(self.__timestamps[slots] - timestamp)))
+            slot = slots[nearest]
+            result = (float(self.__timestamps[slot]), self.__values[slot])
+
+            # The slot is only reused once capacity newer values have been pushed, so
+            # the result is consistent unless the writer lapped us in the meantime
+            if self.__count - entries[nearest] <= self.__capacity:
+                return result
+
+    def get_capacity(self) -> int:
+        """
+        Returns the maximum number of values kept in the history.
+        """
+        return self.__capacity
+
+
+class SensorChannel(Generic[T]):
+    """
+    Hands timestamped sensor data from a ROS callback to the run thread.
+
+    The newest value is shared through a DoubleBuffer, and a SensorHistory of recent
+    values is kept so that the sensor can be aligned with the others.
+    """
+
+    def __init__(self, history_size: int) -> None:
+        self.__latest = DoubleBuffer((0.0, None))
+        self.__history = SensorHistory(history_size)
+
+    def publish(self, timestamp: float, value: T) -> None:
+        """
+        Makes a new value visible to the run thread.
+
+        Args:
+            timestamp: The time at which the value was captured in seconds.
+            value: The captured value, which must not be modified afterwards.
+
+        Warning:
+            Only the thread receiving the sensor messages may call this function.
+        """
+        self.__latest.publish((timestamp, value))
+        self.__history.push(timestamp, value)
+
+    def read(self) -> Tuple[int, float, Optional[T]]:
+        """
+        Returns the sequence number, capture time, and newest value, or
+        (0, 0.0, None) if nothing has been published.
+        """
+        sequence, (timestamp, value) = self.__latest.read()
+        return sequence, timestamp, value
+
+    def get_sequence(self) -> int:
+        """
+        Returns the number of values published so far.
+        """
+        return self.__latest.get_sequence()
+
+    def get_nearest(self, timestamp: float) -> Tuple[float, Optional[T]]:
+        """
+        Returns the capture time and value of the recent value captured closest to
+        timestamp, or (0.0, None) if nothing has been published.
+        """
+        return self.__history.get_nearest(timestamp)
@@ -0,0 +1,331 @@
+"""
+Copyright Harvey Mudd College
+MIT License
+Spring 2020
+
+Contains the child process which receives camera and lidar data on the real car
+"""
+
+# General
+import multiprocessing as mp
+from multiprocessing import shared_memory
+from typing import Any, Optional, Tuple
+
+import numpy as np
+from nptyping import NDArray
+
+
+class SharedFrameRing:
+    """
+    A ring of fixed-size frames in shared memory, written by one process and read by
+    another.
+
+    Every slot has a header holding the sequence number, capture time, and length of
+    its frame.  The headers and the index of the newest frame are only accessed while
+    holding a shared lock, so the frames themselves are copied without any locking.
+    The writer invalidates a slot before filling it, and the reader copies a frame
+    out of its slot and then checks that the slot still holds the same frame,
+    copying again if the writer reused the slot in the meantime.  The frames handed
+    out are therefore never torn or replaced, however long they are kept.
+
+    Note:
+        SharedFrameRing provides the same publish, read, get_sequence, and
+        get_nearest methods as SensorChannel, so the camera and lidar modules can use either.
+    """
+
+    # Offset of the frames from the start of the block, leaving room for the headers
+    __ALIGNMENT = 64
+
+    __HEADER_DTYPE = np.dtype(
+        [("sequence", np.int64), ("timestamp", np.float64), ("length", np.int64)]
+    )
+
+    def __init__(
+        self,
+        shape: Tuple[int, ...],
+        dtype: Any,
+        num_slots: int,
+        lock: Any,
+    ) -> None:
+        """
+        Allocates a ring in shared memory.
+
+        Args:
+            shape: The largest shape of a frame. Frames may be shorter along their
+                first dimension.
+            dtype: The numpy data type of each frame.
+            num_slots: The number of frames in the ring.
+            lock: A multiprocessing lock shared between the writer and the reader.
+
+        Note:
+            The ring must be created before the child process is forked, which then
+            inherits the mapping.
+        """
+        assert num_slots > 1, f"num_slots ({num_slots}) must be at least 2."
+
+        self.__shape = tuple(shape)
+        self.__num_slots: int = num_slots
+        self.__lock = lock
+
+        header_bytes = 8 + num_slots * self.__HEADER_DTYPE.itemsize
+        frames_offset = -(-header_bytes // self.__ALIGNMENT) * self.__ALIGNMENT
+        frame_bytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        self.__memory = shared_memory.SharedMemory(
+            create=True, size=frames_offset + num_slots * frame_bytes
+        )
+
+        buffer = self.__memory.buf
+        self.__latest = np.ndarray((1,), np.int64, buffer, 0)
+        self.__headers = np.ndarray((num_slots,), self.__HEADER_DTYPE, buffer, 8)
+        self.__frames = np.ndarray(
+            (num_slots,) + self.__shape, dtype, buffer, frames_offset
+        )
+
+        self.__latest[0] = -1
+        self.__headers["sequence"] = -1
+
+        # Sequence number of the next frame (only used by the writer)
+        self.__next: int = 0
+
+    def publish(self, timestamp: float, value: NDArray) -> None:
+        """
+        Copies a frame into the next slot and makes it the newest frame.
+
+        Args:
+            timestamp: The time at which the frame was captured in seconds.
+            value: The frame, with at most the shape given to the constructor.
+
+        Warning:
+            Only the writer process may call this function.
+        """
+        slot = self.__next % self.__num_slots
+        length = value.shape[0]
+
+        # Invalidate the slot so readers holding the frame it contains can tell
+        with self.__lock:
+            self.__headers[slot]["sequence"] = -1
+
+        np.copyto(self.__frames[slot, :length], value, casting="unsafe")
+
+        with self.__lock:
+            self.__headers[slot] = (self.__next, timestamp, length)
+            self.__latest[0] = self.__next
+        self.__next += 1
+
+    def read(self) -> Tuple[int, float, Optional[NDArray]]:
+        """
+        Returns the sequence number, capture time, and a copy of the newest frame.
+
+        Returns:
+            The number of frames published so far, the capture time of the newest
+            frame, and a copy of it, or (0, 0.0, None) if no frame has been
+            published.
+        """
+        while True:
+            with self.__lock:
+                latest = int(self.__latest[0])
+                if latest < 0:
+                    return 0, 0.0, None
+                slot = latest % self.__num_slots
+                timestamp = float(self.__headers[slot]["timestamp"])
+                length = int(self.__headers[slot]["length"])
+
+            frame = self.__frames[slot, :length].copy()
+            if self.is_valid(latest + 1):
+                return latest + 1, timestamp, frame
+
+    def get_sequence(self) -> int:
+        """
+        Returns the number of frames published so far, without copying any frame.
+        """
+        with self.__lock:
+            return int(self.__latest[0]) + 1
+
+    def get_nearest(self, timestamp: float) -> Tuple[float, Optional[NDArray]]:
+        """
+        Returns the capture time and a copy of the frame captured closest to
+        timestamp, or (0.0, None) if no frame has been published.
+        """
+        while True:
+            with self.__lock:
+                headers = self.__headers.copy()
+
+            valid = np.flatnonzero(headers["sequence"] >= 0)
+            if len(valid) == 0:
+                return 0.0, None
+
+            slot = valid[np.argmin(np.abs(headers["timestamp"][valid] - timestamp))]
+            length = int(headers[slot]["length"])
+            frame = self.__frames[slot, :length].copy()
+            if self.is_valid(int(headers[slot]["sequence"]) + 1):
+                return float(headers[slot]["timestamp"]), frame
+
+    def is_valid(self, sequence: int) -> bool:
+        """
+        Returns whether the slot of the frame returned by read() with this sequence
+        number still holds that frame, and is not being overwritten.
+        """
+        with self.__lock:
+            return (
+                self.__headers[(sequence - 1) % self.__num_slots]["sequence"]
+                == sequence - 1
+            )
+
+    def close(self, unlink: bool = False) -> None:
+        """
+        Releases this process's mapping of the ring.
+
+        Args:
+            unlink: If True, also frees the shared memory block. Only the process
+                which created the ring should do so.
+        """
+        # Drop our views so the buffer can be released
+        self.__latest = self.__headers = self.__frames = None
+        self.__memory.close()
+        if unlink:
+            self.__memory.unlink()
+
+
+class SensorProcess:
+    """
+    Runs the camera and lidar ROS subscribers in a child process.
+
+    JPEG decoding and message conversion then happen outside the process running the
+    user's update function, so they no longer compete for the same GIL.  Frames are
+    handed over through SharedFrameRings, from which the parent's camera and lidar
+    modules copy each new frame once.  While a recording is in progress, the child
+    records the camera and lidar messages it receives into the same directory as
+    the parent, in chunks of its own.
+    """
+
+    # Number of frames in each ring
+    __NUM_SLOTS = 4
+
+    # Largest number of samples in a lidar scan
+    __MAX_LIDAR_SAMPLES = 2048
+
+    def __init__(self, width: int, height: int) -> None:
+        # Forking (rather than spawning) avoids re-running the user's program, which
+        # creates the racecar at import time, in the child
+        context = mp.get_context("fork")
+        self.__lock = context.Lock()
+        self.__stop_event = context.Event()
+        # Recording paths (or None to stop recording) sent to the child
+        self.__recording_paths = context.SimpleQueue()
+
+        self.__color_ring = SharedFrameRing(
+            (height, width, 3), np.uint8, self.__NUM_SLOTS, self.__lock
+        )
+        self.__depth_ring = SharedFrameRing(
+            (height, width), np.uint16, self.__NUM_SLOTS, self.__lock
+        )
+        self.__lidar_ring = SharedFrameRing(
+            (self.__MAX_LIDAR_SAMPLES,), np.float32, self.__NUM_SLOTS, self.__lock
+        )
+
+        self.__process = context.Process(
+            target=self.__run, name="racecar_sensors", daemon=True
+        )
+
+    def start(self) -> None:
+        """
+        Starts the child process.
+
+        Warning:
+            Must be called before ROS is initialized in the parent process.
+        """
+        self.__process.start()
+
+    def stop(self) -> None:
+        """
+        Stops the child process and frees the shared memory.
+        """
+        self.__stop_event.set()
+        self.__process.join(timeout=2)
+        if self.__process.is_alive():
+            self.__process.terminate()
+
+        for ring in (self.__color_ring, self.__depth_ring, self.__lidar_ring):
+            ring.close(unlink=True)
+
+    def start_recording(self, path: str) -> None:
+        """
+        Starts recording the camera and lidar data received by the child into the
+        directory of a recording.
+        """
+        self.__recording_paths.put(path)
+
+    def stop_recording(self) -> None:
+        """
+        Stops the child's recording, which it closes in the background.
+        """
+        self.__recording_paths.put(None)
+
+    def get_pid(self) -> Optional[int]:
+        """
+        Returns the process id of the child, or None if it has not been started.
+        """
+        return self.__process.pid
+
+    def get_color_ring(self) -> SharedFrameRing:
+        """
+        Returns the ring of color images (BGR, uint8).
+        """
+        return self.__color_ring
+
+    def get_depth_ring(self) -> SharedFrameRing:
+        """
+        Returns the ring of raw depth images (mm, uint16).
+        """
+        return self.__depth_ring
+
+    def get_lidar_ring(self) -> SharedFrameRing:
+        """
+        Returns the ring of lidar scans (cm, float32).
+        """
+        return self.__lidar_ring
+
+    def __run(self) -> None:
+        """
+        Receives camera and lidar messages until the parent asks the child to stop.
+        """
+        # ROS is only imported in the child, which must initialize it separately
+        import rclpy as ros2
+        from rclpy.executors import SingleThreadedExecutor
+
+        import camera_real
+        import lidar_real
+        from sensor_log import SensorLogWriter
+
+        ros2.init()
+        camera = camera_real.CameraReal(self.__color_ring, self.__depth_ring)
+        lidar = lidar_real.LidarReal(self.__lidar_ring)
+
+        executor = SingleThreadedExecutor()
+        executor.add_node(camera.node)
+        executor.add_node(lidar.node)
+
+        logger = None
+        try:
+            while not self.__stop_event.is_set():
+                executor.spin_once(timeout_sec=0.1)
+
+                while not self.__recording_paths.empty():
+                    path = self.__recording_paths.get()
+                    if logger is not None:
+                        logger.stop(wait=False)
+                    logger = None
+                    if path is not None:
+                        logger = SensorLogWriter(path, name="chunk_sensors")
+                    camera._CameraReal__set_logger(logger)
+                    lidar._LidarReal__set_logger(logger)
+        except KeyboardInterrupt:
+            # CTRL-C is delivered to the whole process group; the parent stops us
+            pass
+        finally:
+            if logger is not None:
+                logger.stop()
+            executor.shutdown()
+            ros2.shutdown()
+            for ring in (self.__color_ring, self.__depth_ring, self.__lidar_ring):
+                ring.close()
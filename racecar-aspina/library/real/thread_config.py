@@ -0,0 +1,148 @@
+"""
+Copyright Harvey Mudd College
+MIT License
+Spring 2020
+
+Contains the CPU affinity and scheduling configuration of the racecar's threads
+"""
+
+# General
+import os
+from typing import Dict, FrozenSet, List, NamedTuple, Optional
+
+import sys
+
+sys.path.insert(0, "..")
+import racecar_utils as rc_utils
+
+
+class ThreadConfig(NamedTuple):
+    """
+    The CPU cores and real-time priority assigned to a thread.
+    """
+
+    # The cores the thread may run on, or None to leave the affinity unchanged
+    cpus: Optional[FrozenSet[int]] = None
+    # The SCHED_FIFO priority (1 to 99), or None to use the default scheduler
+    # (SCHED_OTHER)
+    priority: Optional[int] = None
+
+
+def parse_thread_config(text: str) -> Dict[str, ThreadConfig]:
+    """
+    Parses a thread configuration of the form "role=cpus[:priority],...".
+
+    Args:
+        text: Comma separated roles, each assigned a list of cores separated by "+"
+            (with "a-b" denoting a range) and optionally a SCHED_FIFO priority.
+
+    Returns:
+        The configuration of each role in text.
+
+    Example::
+
+        # Run the update loop on core 3 with priority 80, and ROS on cores 0 to 2
+        config = parse_thread_config("run=3:80,executor=0-2")
+    """
+    config = {}
+    for entry in filter(None, text.replace(" ", "").split(",")):
+        role, _, setting = entry.partition("=")
+        cpu_text, _, priority_text = setting.partition(":")
+
+        cpus = set()
+        for cpu_range in filter(None, cpu_text.split("+")):
+            first, _, last = cpu_range.partition("-")
+            cpus.update(range(int(first), int(last or first) + 1))
+
+        config[role] = ThreadConfig(
+            frozenset(cpus) if cpus else None,
+            int(priority_text) if priority_text else None,
+        )
+    return config
+
+
+def get_process_thread_ids(pid: int) -> List[int]:
+    """
+    Returns the native ids of all threads of a process, or [pid] if they cannot be
+    listed.
+    """
+    try:
+        return sorted(int(tid) for tid in os.listdir(f"/proc/{pid}/task"))
+    except OSError:
+        return [pid]
+
+
+def apply_thread_config(
+    role: str, config: ThreadConfig, tid: int = 0, is_process: bool = False
+) -> bool:
+    """
+    Applies a configuration to a thread and prints what was applied.
+
+    Args:
+        role: The name of the thread's role, used in the printed messages.
+        config: The cores and priority to assign.
+        tid: The native id of the thread, or 0 for the calling thread.
+        is_process: If True, tid is the pid of a process, and the configuration is
+            applied to every thread the process has started so far.
+
+    Returns:
+        True if the whole configuration was applied.
+
+    Note:
+        SCHED_FIFO requires root or the CAP_SYS_NICE capability; if it is denied, a
+        warning is printed and the thread keeps its current scheduler.  A priority
+        of None returns threads which were given a real-time priority earlier to
+        SCHED_OTHER, so that reconfiguring a role takes effect.
+    """
+    is_applied = True
+    applied = []
+    tids = get_process_thread_ids(tid) if is_process else [tid]
+
+    if config.cpus is not None:
+        try:
+            for thread_id in tids:
+                os.sched_setaffinity(thread_id, config.cpus)
+            applied.append(f"cpus {sorted(config.cpus)}")
+        except OSError as e:
+            rc_utils.print_warning(
+                f">> Could not set the CPU affinity of [{role}] to "
+                f"{sorted(config.cpus)}: {e}"
+            )
+            is_applied = False
+
+    if config.priority is not None:
+        try:
+            for thread_id in tids:
+                os.sched_setscheduler(
+                    thread_id, os.SCHED_FIFO, os.sched_param(config.priority)
+                )
+            applied.append(f"SCHED_FIFO priority {config.priority}")
+        except OSError as e:
+            rc_utils.print_warning(
+                f">> Could not set SCHED_FIFO priority {config.priority} for "
+                f"[{role}]: {e}"
+            )
+            is_applied = False
+    else:
+        try:
+            real_time = [
+                thread_id
+                for thread_id in tids
+                if os.sched_getscheduler(thread_id) in (os.SCHED_FIFO, os.SCHED_RR)
+            ]
+            for thread_id in real_time:
+                os.sched_setscheduler(thread_id, os.SCHED_OTHER, os.sched_param(0))
+            if real_time:
+                applied.append("SCHED_OTHER")
+        except OSError as e:
+            rc_utils.print_warning(
+                f">> Could not restore the default scheduler of [{role}]: {e}"
+            )
+            is_applied = False
+
+    if applied:
+        rc_utils.print_colored(
+            f">> Thread [{role}] configured with " + ", ".join(applied),
+            rc_utils.TerminalColor.blue,
+        )
+    return is_applied
@@ -0,0 +1,125 @@
+"""
+Copyright Harvey Mudd College
+MIT License
+Spring 2020
+
+Contains the Camera module of the racecar_core library
+"""
+
+from __future__ import annotations
+
+from camera import Camera
+
+# General
+from typing import Optional, Tuple
+import cv2 as cv
+import numpy as np
+from nptyping import NDArray
+
+import racecar_utils as rc_utils
+
+
+class CameraReplay(Camera):
+    # Factor converting raw depth values (mm) into cm
+    __DEPTH_SCALE = 0.1
+
+    def __init__(self):
+        # Recorded JPEG bytes and raw depth image of the current frame
+        self.__color_jpeg = None
+        self.__color_sequence = 0
+        self.__color_timestamp = 0.0
+        self.__depth_image_raw = None
+        self.__depth_sequence = 0
+        self.__depth_timestamp = 0.0
+
+        # Images decoded from the recording the first time they are requested
+        self.__color_image = None
+        self.__is_color_image_current = False
+        self.__depth_image = None
+        self.__is_depth_image_current = False
+
+        # The (camera matrix, distortion coefficients) stored in the recording
+        self.__camera_intrinsics = None
+
+    def __set_camera_info(self, camera_info: NDArray) -> None:
+        """
+        Uses the intrinsics of a camera_info record of the recording.
+        """
+        self.__camera_intrinsics = (
+            np.array(camera_info[:9], np.float64).reshape(3, 3),
+            np.array(camera_info[9:], np.float64),
+        )
+
+    def _get_camera_intrinsics(
+        self,
+    ) -> Optional[Tuple[NDArray[(3, 3), np.float64], NDArray]]:
+        return self.__camera_intrinsics
+
+    def __update(
+        self,
+        color_jpeg: Optional[NDArray],
+        color_timestamp: float,
+        raw_depth_image: Optional[NDArray[(480, 640), np.uint16]],
+        depth_timestamp: float,
+    ) -> None:
+        """
+        Replaces the current images with the newest recorded ones, if any.
+        """
+        if color_jpeg is not None:
+            self.__color_jpeg = color_jpeg
+            self.__color_sequence += 1
+            self.__color_timestamp = color_timestamp
+            self.__is_color_image_current = False
+            rc_utils.clear_frame_caches()
+
+        if raw_depth_image is not None:
+            self.__depth_image_raw = raw_depth_image
+            self.__depth_sequence += 1
+            self.__depth_timestamp = depth_timestamp
+            self.__is_depth_image_current = False
+            rc_utils.clear_frame_caches()
+
+    def get_color_image_no_copy(self) -> NDArray[(480, 640, 3), np.uint8]:
+        if not self.__is_color_image_current and self.__color_jpeg is not None:
+            self.__color_image = cv.imdecode(self.__color_jpeg, cv.IMREAD_COLOR)
+            self.__is_color_image_current = True
+        return self.__color_image
+
+    def get_color_image_async(self) -> NDArray[(480, 640, 3), np.uint8]:
+        return self.get_color_image()
+
+    def get_depth_image(self) -> NDArray[(480, 640), np.float32]:
+        if not self.__is_depth_image_current and self.__depth_image_raw is not None:
+            if self.__depth_image is None:
+                self.__depth_image = np.empty(self.__depth_image_raw.shape, np.float32)
+            np.multiply(
+                self.__depth_image_raw,
+                self.__DEPTH_SCALE,
+                out=self.__depth_image,
+                casting="unsafe",
+            )
+            self.__is_depth_image_current = True
+        return self.__depth_image
+
+    def get_depth_image_async(self) -> NDArray[(480, 640), np.float32]:
+        depth_image = self.get_depth_image()
+        return None if depth_image is None else depth_image.copy()
+
+    def get_depth_image_raw(self) -> NDArray[(480, 640), np.uint16]:
+        """
+        Returns the current depth image exactly as recorded, as a read-only view of
+        the recording.
+        """
+        return self.__depth_image_raw
+
+    def get_color_image_sequence(self) -> int:
+        return self.__color_sequence
+
+    def get_color_image_timestamp(self) -> float:
+        return self.__color_timestamp
+
+    def get_depth_image_sequence(self) -> int:
+        return self.__depth_sequence
+
+    def get_depth_image_timestamp(self) -> float:
+        return self.__depth_timestamp
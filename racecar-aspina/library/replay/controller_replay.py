@@ -0,0 +1,62 @@
+"""
+Copyright Harvey Mudd College
+MIT License
+Spring 2020
+
+Contains the Controller module of the racecar_core library
+"""
+
+from controller import Controller
+
+# General
+from typing import Optional, Tuple
+import numpy as np
+from nptyping import NDArray
+
+
+class ControllerReplay(Controller):
+    def __init__(self):
+        # Button state at the start of the last and this frame
+        self.__was_down = [False] * len(self.Button)
+        self.__is_down = [False] * len(self.Button)
+
+        # Trigger and joystick state at the start of this frame
+        self.__last_trigger = [0.0, 0.0]
+        self.__last_joystick = [(0.0, 0.0), (0.0, 0.0)]
+
+    def __update(self, state: Optional[NDArray]) -> None:
+        """
+        Applies the newest controller state recorded during the frame, if any.
+
+        Args:
+            state: The buttons down, then the triggers, then the (x, y) of each
+                joystick, as recorded by ControllerReal.
+        """
+        self.__was_down = self.__is_down
+        if state is None:
+            self.__is_down = list(self.__is_down)
+            return
+
+        num_buttons = len(self.Button)
+        values = state.tolist()
+        self.__is_down = [bool(value) for value in values[:num_buttons]]
+        self.__last_trigger = values[num_buttons : num_buttons + 2]
+        self.__last_joystick = [
+            tuple(values[num_buttons + 2 : num_buttons + 4]),
+            tuple(values[num_buttons + 4 : num_buttons + 6]),
+        ]
+
+    def is_down(self, button: Controller.Button) -> bool:
+        return self.__is_down[button.value]
+
+    def was_pressed(self, button: Controller.Button) -> bool:
+        return self.__is_down[button.value] and not self.__was_down[button.value]
+
+    def was_released(self, button: Controller.Button) -> bool:
+        return not self.__is_down[button.value] and self.__was_down[button.value]
+
+    def get_trigger(self, trigger: Controller.Trigger) -> float:
+        return self.__last_trigger[trigger.value]
+
+    def get_joystick(self, joystick: Controller.Joystick) -> Tuple[float, float]:
+        return self.__last_joystick[joystick.value]
@@ -0,0 +1,28 @@
+"""
+Copyright Harvey Mudd College
+MIT License
+Spring 2020
+
+Contains the Display module of the racecar_core library
+"""
+
+import cv2 as cv
+from nptyping import NDArray
+
+from display import Display
+
+
+class DisplayReplay(Display):
+    __WINDOW_NAME: str = "RACECAR replay window"
+
+    def __init__(self, isHeadless) -> None:
+        Display.__init__(self, isHeadless)
+
+    def create_window(self) -> None:
+        if not self._Display__isHeadless:
+            cv.namedWindow(self.__WINDOW_NAME, cv.WINDOW_NORMAL)
+
+    def show_color_image(self, image: NDArray) -> None:
+        if not self._Display__isHeadless:
+            cv.imshow(self.__WINDOW_NAME, image)
+            cv.waitKey(1)
@@ -0,0 +1,66 @@
+"""
+Copyright Harvey Mudd College
+MIT License
+Spring 2020
+
+Contains the Drive module of the racecar_core library
+"""
+
+from __future__ import annotations
+
+from drive import Drive
+
+# General
+from typing import Any
+import numpy as np
+from nptyping import NDArray
+
+
+class DriveReplay(Drive):
+    def __init__(self):
+        self.__max_speed = 0.25
+        self.__speed = 0.0
+        self.__angle = 0.0
+
+        # (frame timestamp, speed, angle) of the command at the end of every frame
+        self.__commands = []
+
+    def set_speed_angle(self, speed: float, angle: float) -> None:
+        assert (
+            -1.0 <= speed <= 1.0
+        ), f"speed [{speed}] must be between -1.0 and 1.0 inclusive."
+        assert (
+            -1.0 <= angle <= 1.0
+        ), f"angle [{angle}] must be between -1.0 and 1.0 inclusive."
+
+        self.__speed = speed * self.__max_speed
+        self.__angle = angle
+
+    def set_max_speed(self, max_speed: float = 0.25) -> None:
+        assert (
+            0.0 <= max_speed <= 1.0
+        ), f"max_speed [{max_speed}] must be between 0.0 and 1.0 inclusive."
+
+        self.__max_speed = max_speed
+
+    def get_commands(self) -> NDArray[(Any, 3), np.float64]:
+        """
+        Returns the command set by the program in every frame replayed so far.
+
+        Returns:
+            One (timestamp, speed, angle) row per frame, where timestamp is the
+            recorded time of the frame and speed is scaled by the max speed.
+
+        Example::
+
+            # Compare the program's steering with the steering of the recording
+            commands = rc.drive.get_commands()
+            angle_error = np.abs(commands[:, 2] - recorded_angles).mean()
+        """
+        return np.array(self.__commands, np.float64).reshape(-1, 3)
+
+    def __update(self, timestamp: float) -> None:
+        """
+        Stores the command in effect at the end of the frame.
+        """
+        self.__commands.append((timestamp, self.__speed, self.__angle))
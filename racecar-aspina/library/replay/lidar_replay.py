@@ -0,0 +1,44 @@
+"""
+Copyright Harvey Mudd College
+MIT License
+Spring 2020
+
+Contains the Lidar module of the racecar_core library
+"""
+
+from __future__ import annotations
+
+from lidar import Lidar
+
+# General
+from typing import Optional
+import numpy as np
+from nptyping import NDArray
+
+
+class LidarReplay(Lidar):
+    def __init__(self):
+        self.__samples = np.empty(0, np.float32)
+        self.__samples_sequence = 0
+        self.__samples_timestamp = 0.0
+
+    def __update(self, samples: Optional[NDArray], timestamp: float) -> None:
+        """
+        Replaces the current scan with the newest recorded one, if any.
+        """
+        if samples is not None:
+            self.__samples = samples
+            self.__samples_sequence += 1
+            self.__samples_timestamp = timestamp
+
+    def get_samples(self) -> NDArray[720, np.float32]:
+        return self.__samples
+
+    def get_samples_async(self) -> NDArray[720, np.float32]:
+        return self.__samples
+
+    def get_samples_sequence(self) -> int:
+        return self.__samples_sequence
+
+    def get_samples_timestamp(self) -> float:
+        return self.__samples_timestamp
@@ -0,0 +1,56 @@
+"""
+Copyright Harvey Mudd College
+MIT License
+Spring 2020
+
+Contains the Physics module of the racecar_core library
+"""
+
+from __future__ import annotations
+
+from physics import Physics
+
+# General
+from typing import Any
+import numpy as np
+from nptyping import NDArray
+
+
+class PhysicsReplay(Physics):
+    def __init__(self):
+        self.__acceleration = np.zeros(3, np.float64)
+        self.__angular_velocity = np.zeros(3, np.float64)
+        self.__imu_sequence = 0
+        self.__imu_timestamp = 0.0
+
+    def __update(
+        self,
+        acceleration_samples: NDArray[(Any, 3), np.float64],
+        angular_velocity_samples: NDArray[(Any, 3), np.float64],
+        timestamp: float,
+    ) -> None:
+        """
+        Averages the IMU samples recorded during the frame, keeping the previous
+        mean of an axis if none were recorded.
+        """
+        if len(acceleration_samples) > 0:
+            self.__acceleration = acceleration_samples.mean(axis=0)
+        if len(angular_velocity_samples) > 0:
+            self.__angular_velocity = angular_velocity_samples.mean(axis=0)
+
+        num_samples = len(acceleration_samples) + len(angular_velocity_samples)
+        if num_samples > 0:
+            self.__imu_sequence += num_samples
+            self.__imu_timestamp = timestamp
+
+    def get_linear_acceleration(self) -> NDArray[3, np.float32]:
+        return np.array(self.__acceleration)
+
+    def get_angular_velocity(self) -> NDArray[3, np.float32]:
+        return np.array(self.__angular_velocity)
+
+    def get_imu_sequence(self) -> int:
+        return self.__imu_sequence
+
+    def get_imu_timestamp(self) -> float:
+        return self.__imu_timestamp
@@ -0,0 +1,247 @@
+"""
+Copyright Harvey Mudd College
+MIT License
+Spring 2020
+
+Contains the Racecar class which replays a recording of the real car
+"""
+
+# General
+import time
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+# racecar_core modules
+import camera_replay
+import controller_replay
+import display_replay
+import drive_replay
+import lidar_replay
+import physics_replay
+
+from frame_gc import FrameGc, GcStats
+from racecar_core import Racecar
+import racecar_utils as rc_utils
+from sensor_log import SensorLogReader, Stream
+
+
+class RacecarReplay(Racecar):
+    """
+    Runs a program on the data of a recording made with RacecarReal.start_recording.
+
+    Every frame advances the recorded time by a fixed period, and each module
+    returns the newest data recorded up to that time.  Frames are either paced to
+    the recorded time or run as fast as possible, which turns a program into an
+    offline benchmark or regression test.  The recording is memory-mapped, so only
+    the pages of the records actually used are read from disk.
+    """
+
+    # Default number of frames per second of recorded time
+    __DEFAULT_FRAME_RATE = 60
+
+    def __init__(
+        self,
+        path: str,
+        isHeadless: bool = False,
+        isRealTime: bool = True,
+        frameRate: float = __DEFAULT_FRAME_RATE,
+    ) -> None:
+        """
+        Opens a recording for replay.
+
+        Args:
+            path: The directory of the recording.
+            isHeadless: If True, the display module does not create windows.
+            isRealTime: If True, frames are paced to the recorded time; otherwise
+                they are run as fast as possible.
+            frameRate: The number of frames per second of recorded time.
+        """
+        self.camera = camera_replay.CameraReplay()
+        self.controller = controller_replay.ControllerReplay()
+        self.display = display_replay.DisplayReplay(isHeadless)
+        self.drive = drive_replay.DriveReplay()
+        self.lidar = lidar_replay.LidarReplay()
+        self.physics = physics_replay.PhysicsReplay()
+
+        self.__reader = SensorLogReader(path)
+        self.__is_real_time = isRealTime
+        self.__period = 1 / frameRate
+
+        # Positions in the index of the records of each stream, and the number of
+        # records of each stream replayed so far
+        streams = self.__reader.get_index()["stream"]
+        timestamps = self.__reader.get_index()["timestamp"]
+        self.__positions: Dict[Stream, np.ndarray] = {}
+        self.__timestamps: Dict[Stream, np.ndarray] = {}
+        self.__cursors: Dict[Stream, int] = {}
+        for stream in Stream:
+            self.__positions[stream] = np.flatnonzero(streams == stream)
+            self.__timestamps[stream] = timestamps[self.__positions[stream]]
+            self.__cursors[stream] = 0
+
+        # Recordings made before the camera info was recorded fall back to the
+        # nominal intrinsics
+        camera_info_positions = self.__positions[Stream.camera_info]
+        if len(camera_info_positions) > 0:
+            _, _, camera_info = self.__reader.get_record(camera_info_positions[0])
+            self.camera._CameraReplay__set_camera_info(camera_info)
+
+        self.__start_time = float(timestamps[0]) if len(timestamps) > 0 else 0.0
+        self.__end_time = float(timestamps[-1]) if len(timestamps) > 0 else 0.0
+        self.__time = self.__start_time
+
+        self.__start: Optional[Callable[[], None]] = None
+        self.__update: Optional[Callable[[], None]] = None
+        self.__update_slow: Optional[Callable[[], None]] = None
+        self.__update_slow_time: float = 1
+        self.__update_slow_counter: float = 0
+
+        self.__frame_gc = FrameGc()
+
+    def go(self) -> None:
+        if self.__start is None or self.__update is None:
+            rc_utils.print_error(
+                ">> No user start and update functions found.  Did you call "
+                "set_start_update with valid start and update functions?"
+            )
+            return
+
+        num_frames = int((self.__end_time - self.__start_time) / self.__period) + 1
+        rc_utils.print_colored(
+            f">> Replaying {len(self.__reader)} records from "
+            f"{self.__reader.get_path()} ({num_frames} frames, "
+            f"{'real time' if self.__is_real_time else 'as fast as possible'})",
+            rc_utils.TerminalColor.green,
+        )
+
+        self.__advance(self.__start_time)
+        self.__start()
+        self.__frame_gc.start()
+
+        update_times = np.empty(num_frames)
+        replay_start = time.perf_counter()
+        for frame in range(num_frames):
+            frame_start = time.perf_counter()
+            self.__advance(self.__start_time + frame * self.__period)
+
+            self.__frame_gc.begin_update()
+            self.__update()
+            self.__frame_gc.end_update()
+
+            if self.__update_slow is not None:
+                self.__update_slow_counter -= self.__period
+                if self.__update_slow_counter < 0:
+                    self.__update_slow()
+                    self.__update_slow_counter = self.__update_slow_time
+
+            self.drive._DriveReplay__update(self.__time)
+            update_times[frame] = time.perf_counter() - frame_start
+
+            if self.__is_real_time:
+                next_frame_start = replay_start + (frame + 1) * self.__period
+                self.__frame_gc.collect(next_frame_start - time.perf_counter())
+                delay = next_frame_start - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            else:
+                self.__frame_gc.collect(0)
+
+        total_time = time.perf_counter() - replay_start
+        rc_utils.print_colored(
+            f">> Replay finished: {num_frames} frames in {total_time:.2f} s | "
+            f"update mean {update_times.mean() * 1000:.3f} ms, "
+            f"max {update_times.max() * 1000:.3f} ms",
+            rc_utils.TerminalColor.green,
+        )
+
+    def set_start_update(
+        self,
+        start: Callable[[], None],
+        update: Callable[[], None],
+        update_slow: Optional[Callable[[], None]] = None,
+    ) -> None:
+        self.__start = start
+        self.__update = update
+        self.__update_slow = update_slow
+
+    def get_delta_time(self) -> float:
+        return self.__period
+
+    def set_update_slow_time(self, time: float = 1.0) -> None:
+        self.__update_slow_time = time
+
+    def set_gc_managed(self, is_managed: bool = True) -> None:
+        self.__frame_gc.set_managed(is_managed)
+
+    def get_gc_stats(self) -> GcStats:
+        stats = self.__frame_gc.get_stats()
+        self.__frame_gc.reset_stats()
+        return stats
+
+    def get_replay_time(self) -> float:
+        """
+        Returns the recorded time (in seconds since the epoch) of the current frame.
+        """
+        return self.__time
+
+    def __advance(self, timestamp: float) -> None:
+        """
+        Hands every record up to timestamp to the modules.
+        """
+        self.__time = timestamp
+
+        color_jpeg, color_time = self.__read_newest(Stream.color_image)
+        raw_depth_image, depth_time = self.__read_newest(Stream.depth_image)
+        self.camera._CameraReplay__update(
+            color_jpeg, color_time, raw_depth_image, depth_time
+        )
+
+        samples, samples_time = self.__read_newest(Stream.lidar_samples)
+        self.lidar._LidarReplay__update(samples, samples_time)
+
+        acceleration, acceleration_time = self.__read_all(Stream.linear_acceleration)
+        angular_velocity, angular_time = self.__read_all(Stream.angular_velocity)
+        self.physics._PhysicsReplay__update(
+            acceleration, angular_velocity, max(acceleration_time, angular_time)
+        )
+
+        state, _ = self.__read_newest(Stream.controller)
+        self.controller._ControllerReplay__update(state)
+
+    def __advance_cursor(self, stream: Stream) -> range:
+        """
+        Moves the cursor of a stream past the records up to the current time, and
+        returns the positions it moved past in the stream.
+        """
+        start = self.__cursors[stream]
+        end = int(np.searchsorted(self.__timestamps[stream], self.__time, side="right"))
+        self.__cursors[stream] = end
+        return range(start, end)
+
+    def __read_newest(self, stream: Stream):
+        """
+        Returns a view of the newest new record of a stream and its timestamp, or
+        (None, 0.0) if there is no new record.
+        """
+        new_records = self.__advance_cursor(stream)
+        if len(new_records) == 0:
+            return None, 0.0
+        _, timestamp, data = self.__reader.get_record(
+            self.__positions[stream][new_records[-1]]
+        )
+        return data, timestamp
+
+    def __read_all(self, stream: Stream):
+        """
+        Returns every new record of a stream stacked into rows, and the newest
+        timestamp, or 0.0 if there is no new record.
+        """
+        new_records = self.__advance_cursor(stream)
+        if len(new_records) == 0:
+            return np.empty((0, 3)), 0.0
+
+        records = [
+            self.__reader.get_record(self.__positions[stream][i]) for i in new_records
+        ]
+        return np.array([data for _, _, data in records]), records[-1][1]
@@ -0,0 +1,434 @@
+"""
+Copyright Harvey Mudd College
+MIT License
+Spring 2020
+
+Contains the chunked, memory-mapped file format used to record and replay sensor data
+"""
+
+from __future__ import annotations
+
+# General
+from enum import IntEnum
+import glob
+import mmap
+import os
+import queue
+import threading
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from nptyping import NDArray
+
+
+class Stream(IntEnum):
+    """
+    The kinds of records stored in a sensor log.
+    """
+
+    # JPEG bytes exactly as received from the camera
+    color_image = 0
+    # Raw depth image in mm
+    depth_image = 1
+    # Lidar samples in cm
+    lidar_samples = 2
+    # A single (x, y, z) IMU sample
+    linear_acceleration = 3
+    angular_velocity = 4
+    # Buttons down, then the triggers, then the (x, y) of each joystick
+    controller = 5
+    # (speed, steering angle) as published to the motor controller
+    drive = 6
+    # The 3x3 camera matrix of the color camera (row by row) followed by its
+    # distortion coefficients
+    camera_info = 7
+
+
+# The (little-endian) data type in which each stream is stored
+STREAM_DTYPES: Dict[Stream, np.dtype] = {
+    Stream.color_image: np.dtype(np.uint8),
+    Stream.depth_image: np.dtype("<u2"),
+    Stream.lidar_samples: np.dtype("<f4"),
+    Stream.linear_acceleration: np.dtype("<f8"),
+    Stream.angular_velocity: np.dtype("<f8"),
+    Stream.controller: np.dtype("<f4"),
+    Stream.drive: np.dtype("<f4"),
+    Stream.camera_info: np.dtype("<f8"),
+}
+
+# One entry per record; cols is 0 for one dimensional records
+INDEX_DTYPE = np.dtype(
+    [
+        ("stream", np.uint8),
+        ("timestamp", "<f8"),
+        ("offset", "<u8"),
+        ("rows", "<u4"),
+        ("cols", "<u4"),
+    ]
+)
+
+
+class RecordingStats(NamedTuple):
+    """
+    The number of records of each stream written to and dropped from a sensor log.
+    """
+
+    num_written: Dict[Stream, int]
+    # Records discarded because the writer thread could not keep up with the disk
+    num_dropped: Dict[Stream, int]
+    num_bytes: int
+    num_chunks: int
+
+
+class SensorLogWriter:
+    """
+    Writes timestamped sensor records into a directory of chunk files.
+
+    Each chunk is a memory-mapped file holding the payloads of its records back to
+    back, with a separate .npy index giving the stream, timestamp, offset, and shape
+    of every record.  Records are handed to a background thread through a bounded
+    queue per stream, so record() never blocks; when a queue is full the record is
+    dropped and counted instead.
+
+    Note:
+        While a chunk is being written, its index entries are also appended to a
+        .idx file after every batch of records, which is replaced by the .npy index
+        when the chunk is full or the writer is stopped.  If the program is
+        interrupted, SensorLogReader rebuilds the index from the .idx file, so only
+        the records of the last batch can be lost.
+    """
+
+    # Default size of a chunk file in bytes
+    __DEFAULT_CHUNK_SIZE = 256 * 1024 * 1024
+
+    # Records start at multiples of this many bytes, so their views are aligned
+    __ALIGNMENT = 8
+
+    # Number of records of each stream which may wait to be written
+    __QUEUE_SIZES = {
+        Stream.color_image: 30,
+        Stream.depth_image: 30,
+        Stream.lidar_samples: 40,
+        Stream.linear_acceleration: 2000,
+        Stream.angular_velocity: 2000,
+        Stream.controller: 200,
+        Stream.drive: 200,
+        Stream.camera_info: 4,
+    }
+
+    def __init__(
+        self,
+        path: str,
+        chunk_size: int = __DEFAULT_CHUNK_SIZE,
+        name: str = "chunk",
+    ) -> None:
+        """
+        Creates the directory of the log and starts the writer thread.
+
+        Args:
+            path: The directory in which to store the chunks.
+            chunk_size: The size of each chunk file in bytes, which must be larger
+                than any single record.
+            name: The prefix of the chunk files, which must start with "chunk" so
+                that SensorLogReader finds them.  Writers in separate processes
+                may share a directory if they use different names.
+        """
+        assert name.startswith("chunk"), f"name ({name}) must start with chunk."
+
+        os.makedirs(path, exist_ok=True)
+        self.__path = path
+        self.__chunk_size = chunk_size
+        self.__name = name
+
+        self.__queues = {
+            stream: queue.Queue(size) for stream, size in self.__QUEUE_SIZES.items()
+        }
+        self.__num_written = {stream: 0 for stream in Stream}
+        self.__num_dropped = {stream: 0 for stream in Stream}
+        self.__num_bytes = 0
+        self.__num_chunks = 0
+
+        # State of the current chunk, only used by the writer thread
+        self.__file = None
+        self.__map: Optional[mmap.mmap] = None
+        self.__offset = 0
+        self.__index: List[Tuple] = []
+        self.__index_file = None
+
+        self.__has_records = threading.Event()
+        self.__is_stopping = False
+        self.__on_stopped: Optional[Callable[[RecordingStats], None]] = None
+        self.__thread = threading.Thread(target=self.__run, daemon=True)
+        self.__thread.start()
+
+    def record(self, stream: Stream, timestamp: float, data: Any) -> None:
+        """
+        Queues a record to be written, or counts it as dropped if the queue is full.
+
+        Args:
+            stream: The kind of record.
+            timestamp: The capture time in seconds.
+            data: An array (or sequence) convertible to the stream's data type,
+                which must not be modified afterwards.
+        """
+        try:
+            self.__queues[stream].put_nowait((timestamp, data))
+        except queue.Full:
+            self.__num_dropped[stream] += 1
+            return
+        self.__has_records.set()
+
+    def stop(
+        self,
+        wait: bool = True,
+        on_stopped: Optional[Callable[[RecordingStats], None]] = None,
+    ) -> Optional[RecordingStats]:
+        """
+        Writes the remaining records and closes the current chunk.
+
+        Args:
+            wait: If True, waits until the log is closed.  Otherwise, the log is
+                closed by the writer thread and this returns immediately.
+            on_stopped: Called by the writer thread with the final statistics once
+                the log is closed.
+
+        Returns:
+            The final statistics if wait is True, or otherwise None.
+        """
+        self.__on_stopped = on_stopped
+        self.__is_stopping = True
+        self.__has_records.set()
+        if not wait:
+            return None
+        self.__thread.join()
+        return self.get_stats()
+
+    def get_stats(self) -> RecordingStats:
+        """
+        Returns the number of records written and dropped so far.
+        """
+        return RecordingStats(
+            dict(self.__num_written),
+            dict(self.__num_dropped),
+            self.__num_bytes,
+            self.__num_chunks,
+        )
+
+    def __run(self) -> None:
+        """
+        Writes queued records until the writer is stopped.
+        """
+        while True:
+            self.__has_records.wait()
+            self.__has_records.clear()
+            is_stopping = self.__is_stopping
+
+            for stream, records in self.__queues.items():
+                while True:
+                    try:
+                        timestamp, data = records.get_nowait()
+                    except queue.Empty:
+                        break
+                    self.__write(stream, timestamp, data)
+
+            if self.__index_file is not None:
+                self.__index_file.flush()
+
+            if is_stopping:
+                break
+
+        if self.__map is not None:
+            self.__close_chunk()
+        if self.__on_stopped is not None:
+            self.__on_stopped(self.get_stats())
+
+    def __write(self, stream: Stream, timestamp: float, data: Any) -> None:
+        """
+        Appends a record to the current chunk, starting a new chunk if it is full.
+        """
+        array = np.ascontiguousarray(data, STREAM_DTYPES[stream])
+        assert (
+            array.nbytes <= self.__chunk_size
+        ), f"record of {array.nbytes} bytes is larger than chunk_size."
+
+        if self.__map is None or self.__offset + array.nbytes > self.__chunk_size:
+            if self.__map is not None:
+                self.__close_chunk()
+            self.__open_chunk()
+
+        end = self.__offset + array.nbytes
+        self.__map[self.__offset : end] = memoryview(array).cast("B")
+
+        rows = array.shape[0] if array.ndim > 0 else 1
+        cols = array.shape[1] if array.ndim > 1 else 0
+        entry = (stream, timestamp, self.__offset, rows, cols)
+        self.__index.append(entry)
+        self.__index_file.write(np.array(entry, INDEX_DTYPE).tobytes())
+
+        self.__offset = -(-end // self.__ALIGNMENT) * self.__ALIGNMENT
+        self.__num_written[stream] += 1
+        self.__num_bytes += array.nbytes
+
+    def __open_chunk(self) -> None:
+        path = os.path.join(self.__path, f"{self.__name}_{self.__num_chunks:05d}.bin")
+        self.__file = open(path, "w+b")
+        self.__file.truncate(self.__chunk_size)
+        self.__map = mmap.mmap(self.__file.fileno(), self.__chunk_size)
+        self.__offset = 0
+        self.__index = []
+        self.__index_file = open(path.replace(".bin", ".idx"), "wb")
+        self.__num_chunks += 1
+
+    def __close_chunk(self) -> None:
+        self.__map.flush()
+        self.__map.close()
+        self.__map = None
+
+        # Trim the unused end of the chunk before saving its index
+        self.__file.truncate(min(self.__offset, self.__chunk_size))
+        np.save(
+            self.__file.name.replace(".bin", ".idx.npy"),
+            np.array(self.__index, INDEX_DTYPE),
+        )
+        self.__file.close()
+
+        # The complete index replaces the one written while recording
+        self.__index_file.close()
+        os.remove(self.__index_file.name)
+        self.__index_file = None
+
+
+class SensorLogReader:
+    """
+    Reads the records of a sensor log without copying them out of the chunk files.
+
+    The chunks are memory-mapped read-only, so records are paged in from disk on
+    first access and the pages are shared by every process reading the same log.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Opens every chunk of a sensor log.
+
+        Args:
+            path: The directory passed to the SensorLogWriter.
+
+        Note:
+            The index of a chunk which was not closed, because the recording
+            program was interrupted, is rebuilt from the entries written while
+            recording, and entries whose records lie past the end of the chunk are
+            ignored.
+        """
+        self.__path = path
+        self.__maps: List[Optional[mmap.mmap]] = []
+        indices = []
+
+        for chunk_path in sorted(glob.glob(os.path.join(path, "chunk_*.bin"))):
+            index = self.__load_index(chunk_path)
+            if index is None:
+                continue
+            chunk = np.full(len(index), len(self.__maps), np.uint32)
+            indices.append((index, chunk))
+
+            size = os.path.getsize(chunk_path)
+            if size == 0:
+                self.__maps.append(None)
+                continue
+            with open(chunk_path, "rb") as file:
+                self.__maps.append(
+                    mmap.mmap(file.fileno(), size, access=mmap.ACCESS_READ)
+                )
+
+        # Merge the chunks into a single index ordered by timestamp
+        if indices:
+            index = np.concatenate([index for index, _ in indices])
+            chunks = np.concatenate([chunk for _, chunk in indices])
+        else:
+            index = np.empty(0, INDEX_DTYPE)
+            chunks = np.empty(0, np.uint32)
+        order = np.argsort(index["timestamp"], kind="stable")
+        self.__index = index[order]
+        self.__chunks = chunks[order]
+
+    @staticmethod
+    def __load_index(chunk_path: str) -> Optional[NDArray[Any, Any]]:
+        """
+        Returns the index of a chunk, or None if it has none.
+        """
+        index_path = chunk_path.replace(".bin", ".idx.npy")
+        if os.path.exists(index_path):
+            return np.load(index_path)
+
+        partial_path = chunk_path.replace(".bin", ".idx")
+        if not os.path.exists(partial_path):
+            return None
+
+        # Drop a partially written last entry, and entries past the end of the chunk
+        with open(partial_path, "rb") as file:
+            data = file.read()
+        num_entries = len(data) // INDEX_DTYPE.itemsize
+        index = np.frombuffer(data, INDEX_DTYPE, num_entries)
+
+        sizes = [STREAM_DTYPES[Stream(int(stream))].itemsize for stream in Stream]
+        itemsizes = np.array(sizes, np.uint64)[index["stream"]]
+        ends = index["offset"] + itemsizes * index["rows"] * np.maximum(
+            index["cols"], 1
+        ).astype(np.uint64)
+        return index[ends <= os.path.getsize(chunk_path)].copy()
+
+    def __len__(self) -> int:
+        return len(self.__index)
+
+    def get_path(self) -> str:
+        """
+        Returns the directory of the log.
+        """
+        return self.__path
+
+    def get_index(self) -> NDArray[Any, Any]:
+        """
+        Returns the index of every record in timestamp order, as a structured array
+        with stream, timestamp, offset, rows, and cols fields.
+        """
+        return self.__index
+
+    def get_timestamps(self, stream: Stream) -> NDArray[Any, np.float64]:
+        """
+        Returns the timestamps of the records of a stream in ascending order.
+        """
+        return self.__index["timestamp"][self.__index["stream"] == stream]
+
+    def get_record(self, i: int) -> Tuple[Stream, float, NDArray]:
+        """
+        Returns the stream, timestamp, and a read-only view of the i-th record.
+        """
+        entry = self.__index[i]
+        stream = Stream(int(entry["stream"]))
+        dtype = STREAM_DTYPES[stream]
+        rows, cols = int(entry["rows"]), int(entry["cols"])
+        shape = (rows, cols) if cols > 0 else (rows,)
+
+        data = np.frombuffer(
+            self.__maps[self.__chunks[i]],
+            dtype,
+            rows * max(cols, 1),
+            int(entry["offset"]),
+        ).reshape(shape)
+        return stream, float(entry["timestamp"]), data
+
+    def close(self) -> None:
+        """
+        Unmaps the chunks.
+
+        Warning:
+            Records returned by get_record must no longer be used.
+        """
+        for chunk_map in self.__maps:
+            if chunk_map is not None:
+                try:
+                    chunk_map.close()
+                except BufferError:
+                    # A record is still referenced; the chunk is unmapped once it
+                    # is garbage collected
+                    pass
+        self.__maps = []
@@ -1,9 +1,14 @@
+from __future__ import annotations
+
 import sys
+import time
+from typing import Tuple
 import numpy as np
 import cv2 as cv
 from nptyping import NDArray
 
 from camera import Camera
+import racecar_utils as rc_utils
 
 
 class CameraSim(Camera):
@@ -14,9 +19,22 @@ class CameraSim(Camera):
         self.__depth_image: NDArray[(480, 640), np.float32] = None
         self.__is_depth_image_current: bool = False
 
+        # RacecarSim renders a new image every frame, so both images share the
+        # frame counter and the time at which the frame started
+        self.__sequence: int = 0
+        self.__timestamp: float = time.time()
+
         self._MAX_DEPTH_WIDTH: int = self._WIDTH // 8
         self._MAX_DEPTH_HEIGHT: int = self._HEIGHT // 8
 
+    def _get_camera_intrinsics(
+        self,
+    ) -> Tuple[NDArray[(3, 3), np.float64], NDArray]:
+        # RacecarSim renders through an ideal pinhole camera (without distortion,
+        # centered on the image); it does not report its field of view, so that of
+        # the car's camera is assumed
+        return self._get_nominal_intrinsics()
+
     def get_color_image_no_copy(self) -> NDArray[(480, 640, 3), np.uint8]:
         if not self.__is_color_image_current:
             self.__color_image = self.__request_color_image(False)
@@ -37,9 +55,24 @@ class CameraSim(Camera):
     def get_depth_image_async(self) -> NDArray[(480, 640), np.float32]:
         return self.__request_depth_image(True)
 
+    def get_color_image_sequence(self) -> int:
+        return self.__sequence
+
+    def get_color_image_timestamp(self) -> float:
+        return self.__timestamp
+
+    def get_depth_image_sequence(self) -> int:
+        return self.__sequence
+
+    def get_depth_image_timestamp(self) -> float:
+        return self.__timestamp
+
     def __update(self) -> None:
         self.__is_color_image_current = False
         self.__is_depth_image_current = False
+        self.__sequence += 1
+        self.__timestamp = time.time()
+        rc_utils.clear_frame_caches()
 
     def __request_color_image(self, isAsync: bool) -> NDArray[(480, 640), np.uint8]:
         # Ask for a the current color image
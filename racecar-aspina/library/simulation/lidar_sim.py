@@ -1,5 +1,8 @@
+from __future__ import annotations
+
 import sys
 import struct
+import time
 import numpy as np
 from nptyping import NDArray
 
@@ -11,6 +14,8 @@ class LidarSim(Lidar):
         self.__racecar = racecar
         self.__ranges: NDArray[720, np.float32]
         self.__is_current: bool = False
+        self.__sequence: int = 0
+        self.__timestamp: float = time.time()
 
     def get_samples(self) -> NDArray[720, np.float32]:
         if not self.__is_current:
@@ -33,5 +38,13 @@ class LidarSim(Lidar):
         )
         return np.frombuffer(raw_bytes, dtype=np.float32)
 
+    def get_samples_sequence(self) -> int:
+        return self.__sequence
+
+    def get_samples_timestamp(self) -> float:
+        return self.__timestamp
+
     def __update(self) -> None:
         self.__is_current = False
+        self.__sequence += 1
+        self.__timestamp = time.time()
@@ -1,5 +1,8 @@
+from __future__ import annotations
+
 import sys
 import struct
+import time
 import numpy as np
 from nptyping import NDArray
 
@@ -8,6 +11,8 @@ from physics import Physics
 class PhysicsSim(Physics):
     def __init__(self, racecar) -> None:
         self.__racecar = racecar
+        self.__sequence: int = 0
+        self.__timestamp: float = time.time()
 
     def get_linear_acceleration(self) -> NDArray[3, np.float32]:
         self.__racecar._RacecarSim__send_header(
@@ -22,3 +27,13 @@ class PhysicsSim(Physics):
         )
         values = struct.unpack("fff", self.__racecar._RacecarSim__receive_data(12))
         return np.array(values)
+
+    def get_imu_sequence(self) -> int:
+        return self.__sequence
+
+    def get_imu_timestamp(self) -> float:
+        return self.__timestamp
+
+    def __update(self) -> None:
+        self.__sequence += 1
+        self.__timestamp = time.time()
@@ -9,6 +9,7 @@ Manages communication with RacecarSim.
 import struct
 import socket
 import select
+import time
 from enum import IntEnum
 from signal import signal, SIGINT
 from typing import Callable, Optional
@@ -20,6 +21,7 @@ import drive_sim
 import lidar_sim
 import physics_sim
 
+from frame_gc import FrameGc, GcStats
 from racecar_core import Racecar
 import racecar_utils as rc_utils
 
@@ -119,6 +121,12 @@ class RacecarSim(Racecar):
         self.__update_slow_counter: float = 0
         self.__delta_time: float = -1
 
+        # Garbage collection policy, and the time between and spent in updates used
+        # to estimate the slack time left in a frame
+        self.__frame_gc = FrameGc()
+        self.__frame_start: float = 0
+        self.__frame_period: float = 0
+
         self.__socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         self.__in_call: bool = False
 
@@ -163,6 +171,7 @@ class RacecarSim(Racecar):
                     self.__in_call = True
                     self.set_update_slow_time()
                     self.__start()
+                    self.__frame_gc.start()
                     self.__in_call = False
                 except SystemExit:
                     raise
@@ -196,6 +205,11 @@ class RacecarSim(Racecar):
 
             self.__send_header(self.Header.python_finished)
 
+            # RacecarSim simulates the next frame while we collect garbage
+            if header == self.Header.unity_update.value:
+                elapsed = time.perf_counter() - self.__frame_start
+                self.__frame_gc.collect(self.__frame_period - elapsed)
+
     def set_start_update(
         self,
         start: Callable[[], None],
@@ -216,8 +230,23 @@ class RacecarSim(Racecar):
     def set_update_slow_time(self, update_slow_time: float = 1.0) -> None:
         self.__update_slow_time = update_slow_time
 
+    def set_gc_managed(self, is_managed: bool = True) -> None:
+        self.__frame_gc.set_managed(is_managed)
+
+    def get_gc_stats(self) -> GcStats:
+        stats = self.__frame_gc.get_stats()
+        self.__frame_gc.reset_stats()
+        return stats
+
     def __handle_update(self) -> None:
+        frame_start = time.perf_counter()
+        if self.__frame_start > 0:
+            self.__frame_period = frame_start - self.__frame_start
+        self.__frame_start = frame_start
+
+        self.__frame_gc.begin_update()
         self.__update()
+        self.__frame_gc.end_update()
 
         self.__delta_time = -1
         if self.__update_slow is not None:
@@ -229,6 +258,7 @@ class RacecarSim(Racecar):
         self.camera._CameraSim__update()
         self.controller._ControllerSim__update()
         self.lidar._LidarSim__update()
+        self.physics._PhysicsSim__update()
 
     def __handle_sigint(self, signal_received: int, frame) -> None:
         # Send exit command to sync port if we are in the middle of servicing a start
@@ -0,0 +1,286 @@
+"""
+Copyright Harvey Mudd College
+MIT License
+Spring 2020
+
+Contains the parameter sweep runner, which replays a recording through a lab program
+for every combination of parameter values
+
+Usage: python3 sweep.py LAB_FILE RECORDING -s NAME=VALUE,VALUE... [-j JOBS] [-o CSV]
+
+Example::
+
+    # Try 9 combinations of controller gains of lab 3C on 4 cores
+    python3 ../../library/sweep.py lab3c.py recordings/parking \\
+        -s ANGLE_KP=0.005,0.01,0.02 -s SPEED_KP=100,200,400 -j 4 -o lab3c_sweep.csv
+"""
+
+from __future__ import annotations
+
+# General
+import argparse
+import ast
+from concurrent.futures import ProcessPoolExecutor
+import contextlib
+import csv
+import importlib.util
+import itertools
+import os
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+from nptyping import NDArray
+
+from sensor_log import SensorLogReader, Stream
+
+########################################################################################
+# Metrics
+########################################################################################
+
+
+def get_recorded_commands(reader: SensorLogReader) -> NDArray[(Any, 3), np.float64]:
+    """
+    Returns one (timestamp, speed, angle) row per drive command in a recording,
+    with the angle in the sign convention of Drive.set_speed_angle.
+    """
+    index = reader.get_index()
+    positions = np.flatnonzero(index["stream"] == Stream.drive)
+    commands = np.empty((len(positions), 3))
+    for row, position in enumerate(positions):
+        _, timestamp, (speed, steering_angle) = reader.get_record(position)
+        # DriveReal publishes the negated angle
+        commands[row] = (timestamp, speed, -steering_angle)
+    return commands
+
+
+def _hold_recorded(
+    commands: NDArray[(Any, 3), np.float64], recorded: NDArray[(Any, 3), np.float64]
+) -> Optional[NDArray[(Any, 3), np.float64]]:
+    """
+    Returns the recorded command in effect at each frame of commands, or None if
+    nothing was recorded.
+    """
+    if len(recorded) == 0:
+        return None
+    rows = np.searchsorted(recorded[:, 0], commands[:, 0], side="right") - 1
+    return recorded[np.maximum(rows, 0)]
+
+
+def angle_error(commands, recorded) -> float:
+    """
+    The mean absolute difference between the program's angle and the angle of the
+    recorded driver, a proxy for lateral error when driving a recorded lap.
+    """
+    held = _hold_recorded(commands, recorded)
+    if held is None:
+        return float("nan")
+    return float(np.abs(commands[:, 2] - held[:, 2]).mean())
+
+
+def speed_error(commands, recorded) -> float:
+    """
+    The mean absolute difference between the program's speed and the speed of the
+    recorded driver.
+    """
+    held = _hold_recorded(commands, recorded)
+    if held is None:
+        return float("nan")
+    return float(np.abs(commands[:, 1] - held[:, 1]).mean())
+
+
+def time_to_stop(commands, recorded) -> float:
+    """
+    The seconds from the first frame until the program stops the car for good, or
+    infinity if it is still moving at the end of the recording.
+    """
+    is_moving = np.abs(commands[:, 1]) > 1e-3
+    if is_moving[-1]:
+        return float("inf")
+    moving_frames = np.flatnonzero(is_moving)
+    last_frame = moving_frames[-1] + 1 if len(moving_frames) > 0 else 0
+    return float(commands[last_frame, 0] - commands[0, 0])
+
+
+def steering_oscillation(commands, recorded) -> float:
+    """
+    The mean absolute change in angle between frames, which grows when a controller
+    overshoots and oscillates.
+    """
+    return float(np.abs(np.diff(commands[:, 2])).mean()) if len(commands) > 1 else 0.0
+
+
+# Metrics computed for every run from the program's and the recorded commands
+METRICS: Dict[str, Callable[[np.ndarray, np.ndarray], float]] = {
+    "angle_error": angle_error,
+    "speed_error": speed_error,
+    "time_to_stop": time_to_stop,
+    "steering_oscillation": steering_oscillation,
+}
+
+########################################################################################
+# Sweep
+########################################################################################
+
+
+def run_once(lab_path: str, recording: str, parameters: Dict[str, Any]) -> Dict:
+    """
+    Replays a recording through a lab program with the given module-level constants.
+
+    Args:
+        lab_path: The path of the lab program.
+        recording: The directory of the recording.
+        parameters: The value to assign to each constant of the lab program.
+
+    Returns:
+        The parameters, the value of each metric, and the wall time of the run.
+
+    Note:
+        Constants are replaced after the lab program is imported, so values which
+        the program derives from them at import time keep their original values.
+    """
+    lab_path = os.path.abspath(lab_path)
+    recording = os.path.abspath(recording)
+    lab_directory = os.path.dirname(lab_path)
+
+    # Lab programs create their racecar at import time from the command line, and
+    # use paths relative to their directory
+    os.chdir(lab_directory)
+    sys.path.insert(0, lab_directory)
+    sys.argv = [lab_path, "-h", "-f", "-p", recording]
+
+    start_time = time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        # A unique module name gives every run fresh global variables
+        spec = importlib.util.spec_from_file_location(
+            f"sweep_lab_{os.getpid()}_{time.perf_counter_ns()}", lab_path
+        )
+        lab = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(lab)
+
+        for name, value in parameters.items():
+            assert hasattr(lab, name), f"{lab_path} has no parameter [{name}]."
+            setattr(lab, name, value)
+
+        rc = lab.rc
+        rc.set_start_update(lab.start, lab.update, getattr(lab, "update_slow", None))
+        rc.go()
+
+    commands = rc.drive.get_commands()
+    reader = SensorLogReader(recording)
+    recorded = get_recorded_commands(reader)
+
+    result = dict(parameters)
+    for name, metric in METRICS.items():
+        result[name] = metric(commands, recorded) if len(commands) > 0 else np.nan
+    result["run_time"] = time.perf_counter() - start_time
+    return result
+
+
+def run_sweep(
+    lab_path: str,
+    recording: str,
+    sweep: Dict[str, Sequence[Any]],
+    num_jobs: Optional[int] = None,
+) -> List[Dict]:
+    """
+    Runs a lab program on a recording for every combination of parameter values.
+
+    Args:
+        lab_path: The path of the lab program.
+        recording: The directory of the recording.
+        sweep: The values to try for each module-level constant of the program.
+        num_jobs: The number of worker processes, or None for one per core.
+
+    Returns:
+        The result of run_once for every combination, in the order of
+        itertools.product over sweep.
+
+    Note:
+        Every worker memory-maps the recording read-only, so its pages are read
+        from disk once and shared through the page cache rather than copied into
+        each worker.
+    """
+    # Workers change directory, so paths must not be relative
+    lab_path = os.path.abspath(lab_path)
+    recording = os.path.abspath(recording)
+
+    names = list(sweep)
+    combinations = [
+        dict(zip(names, values)) for values in itertools.product(*sweep.values())
+    ]
+    with ProcessPoolExecutor(num_jobs) as executor:
+        futures = [
+            executor.submit(run_once, lab_path, recording, parameters)
+            for parameters in combinations
+        ]
+        return [future.result() for future in futures]
+
+
+def write_results(results: List[Dict], path: str) -> None:
+    """
+    Writes the results of a sweep to a CSV file with one row per run.
+    """
+    with open(path, "w", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=list(results[0]))
+        writer.writeheader()
+        writer.writerows(results)
+
+
+def print_results(results: List[Dict], sort_by: str) -> None:
+    """
+    Prints the results of a sweep as a table, best first.
+    """
+    columns = list(results[0])
+    widths = [max(len(column), 12) for column in columns]
+    print(" | ".join(column.rjust(width) for column, width in zip(columns, widths)))
+    print("-+-".join("-" * width for width in widths))
+    for result in sorted(results, key=lambda result: result[sort_by]):
+        print(
+            " | ".join(
+                (
+                    f"{result[column]:.4g}"
+                    if isinstance(result[column], float)
+                    else str(result[column])
+                ).rjust(width)
+                for column, width in zip(columns, widths)
+            )
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Replays a recording through a lab program for every "
+        "combination of parameter values."
+    )
+    parser.add_argument("lab", help="the lab program, such as lab3c.py")
+    parser.add_argument("recording", help="the directory of the recording")
+    parser.add_argument(
+        "-s",
+        "--sweep",
+        action="append",
+        default=[],
+        metavar="NAME=VALUE,...",
+        help="a constant of the lab program and the values to try",
+    )
+    parser.add_argument("-j", "--jobs", type=int, help="the number of processes")
+    parser.add_argument("-o", "--output", help="a CSV file to write the results to")
+    parser.add_argument(
+        "--sort", default="angle_error", choices=METRICS, help="the metric to rank by"
+    )
+    args = parser.parse_args()
+
+    sweep = {}
+    for entry in args.sweep:
+        name, _, values = entry.partition("=")
+        sweep[name] = [ast.literal_eval(value) for value in values.split(",")]
+
+    results = run_sweep(args.lab, args.recording, sweep, args.jobs)
+    print_results(results, args.sort)
+    if args.output is not None:
+        write_results(results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""
+Copyright Harvey Mudd College
+MIT License
+Spring 2020
+
+Contains the warm runner, which keeps a connection to RacecarSim open and reloads a lab
+program whenever its file is saved
+
+Usage: python3 warm_runner.py LAB_FILE [-h] [-d] [-g]
+
+Example::
+
+    # Edit lab1.py while the car drives; every save takes effect within a frame
+    cd labs/lab1
+    python3 ../../library/warm_runner.py lab1.py
+"""
+
+# General
+import importlib.util
+import os
+import sys
+import time
+import traceback
+from types import ModuleType
+from typing import Dict, Optional
+
+import racecar_core
+import racecar_utils as rc_utils
+
+
+class WarmRunner:
+    """
+    Runs a lab program in RacecarSim, reloading it without restarting Python.
+
+    The racecar, its connection to RacecarSim, and every imported library stay alive
+    for the lifetime of the runner.  The lab program is loaded as a fresh module, so
+    its global variables are reinitialized, and the runner's racecar is handed to it
+    in place of a new one from create_racecar.  Once a reload succeeds, the start
+    function of the new program is called and its update function takes over on the
+    next frame.
+
+    If the program raises an exception, the traceback is printed, the car is stopped,
+    and the runner waits for the next save instead of closing the connection.
+
+    Note:
+        Modules imported by the lab program from its own directory are reloaded with
+        it, but changes to the racecar library itself require a restart.
+    """
+
+    # Seconds between checks for changes to the lab program
+    __CHECK_INTERVAL = 0.25
+
+    def __init__(self, lab_path: str) -> None:
+        """
+        Creates the racecar and loads a lab program.
+
+        Args:
+            lab_path: The path of the lab program.
+
+        Note:
+            The command line flags are passed on to create_racecar, which always
+            creates a RacecarSim.
+        """
+        self.__lab_path = os.path.abspath(lab_path)
+        self.__lab_directory = os.path.dirname(self.__lab_path)
+
+        # Lab programs use paths relative to their directory
+        os.chdir(self.__lab_directory)
+        sys.path.insert(0, self.__lab_directory)
+
+        self.__racecar = racecar_core.create_racecar(True)
+
+        # Lab programs create their racecar when they are loaded, so give them this
+        # one instead of connecting another
+        racecar_core.create_racecar = lambda *args, **kwargs: self.__racecar
+
+        self.__lab: Optional[ModuleType] = None
+        self.__is_running = False
+        # RacecarSim only accepts drive commands once it has called start
+        self.__is_connected = False
+        # Modification time of the lab program and each module it imported from its
+        # directory when it was last loaded
+        self.__watched: Dict[str, float] = {}
+        self.__next_check = 0.0
+        self.__num_reloads = 0
+
+        self.__load()
+        self.__racecar.set_start_update(self.__start, self.__update, self.__update_slow)
+
+    def go(self) -> None:
+        """
+        Runs the lab program until the script is closed, reconnecting to RacecarSim
+        whenever it exits.
+        """
+        while True:
+            self.__racecar.go()
+            rc_utils.print_colored(
+                ">> Keeping the lab program loaded; reconnecting to RacecarSim...",
+                rc_utils.TerminalColor.blue,
+            )
+
+    def __start(self) -> None:
+        """
+        Calls the start function of the latest version of the lab program.
+        """
+        self.__is_connected = True
+        self.__next_check = 0.0
+        self.__check_for_changes()
+        self.__call_start()
+
+    def __update(self) -> None:
+        """
+        Reloads the lab program if it changed, then calls its update function.
+        """
+        if time.perf_counter() >= self.__next_check:
+            if self.__check_for_changes():
+                self.__call_start()
+                return
+
+        if self.__is_running:
+            self.__call("update")
+
+    def __update_slow(self) -> None:
+        if self.__is_running and hasattr(self.__lab, "update_slow"):
+            self.__call("update_slow")
+
+    def __call_start(self) -> None:
+        if self.__lab is None:
+            return
+        self.__racecar.set_update_slow_time()
+        self.__is_running = True
+        self.__call("start")
+
+    def __call(self, name: str) -> None:
+        """
+        Calls a function of the lab program, stopping the car if it raises.
+        """
+        try:
+            getattr(self.__lab, name)()
+        except (SystemExit, KeyboardInterrupt):
+            raise
+        except Exception:
+            traceback.print_exc()
+            self.__fail(f"{name} raised an exception")
+
+    def __fail(self, reason: str) -> None:
+        self.__is_running = False
+        if self.__is_connected:
+            self.__racecar.drive.stop()
+        rc_utils.print_error(
+            f">> {os.path.basename(self.__lab_path)}: {reason}. The car is stopped "
+            "until the file is saved again."
+        )
+
+    def __check_for_changes(self) -> bool:
+        """
+        Reloads the lab program if it or one of its modules was modified since it
+        was loaded, and returns whether it was reloaded successfully.
+        """
+        self.__next_check = time.perf_counter() + self.__CHECK_INTERVAL
+        for path, modified_time in self.__watched.items():
+            try:
+                if os.stat(path).st_mtime != modified_time:
+                    return self.__load()
+            except OSError:
+                # The file is being replaced by the editor; check again later
+                return False
+        return False
+
+    def __load(self) -> bool:
+        """
+        Loads the lab program as a fresh module, and returns whether it succeeded.
+        """
+        load_start = time.perf_counter()
+
+        # Forget the modules imported from the lab's directory so they reload too
+        for name, module in list(sys.modules.items()):
+            if self.__is_local(module):
+                del sys.modules[name]
+
+        self.__watched = {self.__lab_path: os.stat(self.__lab_path).st_mtime}
+        self.__is_running = False
+        if self.__is_connected:
+            self.__racecar.drive.stop()
+
+        try:
+            name = os.path.splitext(os.path.basename(self.__lab_path))[0]
+            spec = importlib.util.spec_from_file_location(name, self.__lab_path)
+            lab = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(lab)
+            assert hasattr(lab, "start") and hasattr(
+                lab, "update"
+            ), "the lab program must define start and update functions"
+        except (SystemExit, KeyboardInterrupt):
+            raise
+        except Exception:
+            traceback.print_exc()
+            self.__fail("failed to load")
+            return False
+        finally:
+            for module in list(sys.modules.values()):
+                if self.__is_local(module):
+                    self.__watched[module.__file__] = os.stat(module.__file__).st_mtime
+
+        self.__lab = lab
+        if self.__num_reloads > 0:
+            rc_utils.print_colored(
+                f">> Reloaded {os.path.basename(self.__lab_path)} in "
+                f"{(time.perf_counter() - load_start) * 1000:.1f} ms",
+                rc_utils.TerminalColor.green,
+            )
+        self.__num_reloads += 1
+        return True
+
+    def __is_local(self, module: ModuleType) -> bool:
+        """
+        Returns whether a module was imported from the lab program's directory.
+        """
+        path = getattr(module, "__file__", None)
+        return path is not None and os.path.dirname(path) == self.__lab_directory
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or not sys.argv[1].endswith(".py"):
+        rc_utils.print_error(">> Usage: python3 warm_runner.py LAB_FILE [-h] [-d] [-g]")
+        sys.exit(1)
+
+    runner = WarmRunner(sys.argv[1])
+    runner.go()
@@ -25,6 +25,8 @@ racecar() {
       racecar sync all
     elif [ $# -ge 2 ] && [ "$1" = "sim" ]; then
       poetry run python "$2" -s "$3" "$4" "$5" "$6"
+    elif [ $# -ge 2 ] && [ "$1" = "warm" ]; then
+      poetry run python "$RACECAR_ABSOLUTE_PATH"/library/warm_runner.py "$2" "$3" "$4" "$5"
     elif [ $# -eq 2 ] && [ "$1" = "sync" ]; then
       local valid_command=false
       if [ "$2" = "library" ] || [ "$2" = "all" ]; then
@@ -63,6 +65,7 @@ racecar() {
       echo "  racecar remove: removes your team directory from your car."
       echo "  racecar setup: sets up your team directory on your car."
       echo "  racecar sim <filename.py>: runs the specified racecar program for use with RacecarSim."
+      echo "  racecar warm <filename.py>: runs the specified racecar program in RacecarSim, reloading it whenever it is saved."
       echo "  racecar sync library: copies your local RACECAR library folder to your car with scp."
       echo "  racecar sync labs: copies your local RACECAR labs folder to your car with scp."
       echo "  racecar sync all: copies all local RACECAR files to you car with scp."